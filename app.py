@@ -1,14 +1,31 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from concurrent.futures import TimeoutError as QueryTimeoutError
 from datetime import datetime, timedelta
+from functools import partial
+import logging
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
 from config import Config
-import math
 
 # Firebase imports
-from firebase_models import FirebaseEmployee, FirebaseAdmin, FirebaseAttendance, FirebaseTimesheet
-from firebase_service import get_firebase_service
+from firebase_models import FirebaseEmployee, FirebaseAdmin, FirebaseAttendance, FirebaseTimesheet, attach_employees
+from storage_backend import get_storage_backend, get_storage_status, start_storage_warm_up, SignOutStatus
+from async_backend import gather
+from query_pool import fan_out
+from office_registry import get_office_registry, validate_offices
+from record_export import EXPORT_FIELDS, EXPORT_MIMETYPES, PAYROLL_COLUMNS, export_rows, export_chunks
+import request_metrics
+from logging_config import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+# Geofence checks run on every login/sign-in/sign-out; a separate logger so they can be
+# sampled (LOG_SAMPLE_RATES=app.geofence=0.01) without muting the rest of the app
+geofence_logger = logging.getLogger('app.geofence')
+
+# Shown when a page's storage reads outlast QUERY_TIMEOUT_SECONDS and it renders without them
+QUERY_TIMEOUT_MESSAGE = 'Some records could not be loaded in time. Please refresh the page to try again.'
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -18,14 +35,9 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'admin_login'
 
-# Initialize Firebase service
-try:
-    firebase_service = get_firebase_service()
-    print("✅ Firebase service initialized")
-except Exception as e:
-    print(f"⚠️ Firebase service failed to initialize: {e}")
-    print("🔄 App will continue without Firebase")
-    firebase_service = None
+# Per-request backend/template timings (Server-Timing header, /admin/metrics)
+if Config.REQUEST_METRICS_ENABLED:
+    request_metrics.init_app(app)
 
 
 
@@ -37,43 +49,36 @@ def load_user(user_id):
         return FirebaseAdmin.find_by_doc_id(doc_id)
     elif user_id.startswith("employee-"):
         doc_id = user_id.split("-")[1]
-        return FirebaseEmployee.find_by_doc_id(doc_id)
+        employee = FirebaseEmployee.find_by_doc_id(doc_id)
+        # Deactivation ends the session; within LOOKUP_CACHE_TTL_SECONDS on the other workers
+        return employee if employee and employee.is_active else None
     return None
 
-# Geofence functions (same as before)
-def haversine_distance_m(lat1, lon1, lat2, lon2):
-    R = 6371000.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
+# Status filters of the admin attendance page and the attendance_status each one lists
+ATTENDANCE_STATUS_FILTERS = {'incomplete_sessions': 'incomplete', 'completed_sessions': 'completed'}
 
+# Geofence functions
 def is_within_office_geofence(lat, lon):
     if lat is None or lon is None:
-        print(f"DEBUG Geofence: Missing coordinates lat={lat}, lon={lon}")
+        geofence_logger.debug("Missing coordinates lat=%s, lon=%s", lat, lon)
         return False
     try:
         user_lat = float(lat)
         user_lon = float(lon)
         
-        # Use the new multi-location system
-        is_within, office_name = Config.is_within_office_location(user_lat, user_lon)
+        offices = get_office_registry().current()
+        match = offices.index.locate(user_lat, user_lon)
         
-        if is_within:
-            print(f"DEBUG Geofence: user=({user_lat}, {user_lon}) is within {office_name}")
-        else:
-            print(f"DEBUG Geofence: user=({user_lat}, {user_lon}) is not within any office location")
-            # Debug: show distances to all offices
-            for office in Config.OFFICE_LOCATIONS:
-                distance = haversine_distance_m(user_lat, user_lon, office['latitude'], office['longitude'])
-                print(f"  - Distance to {office['name']}: {distance:.2f}m (radius: {office['radius_meters']}m)")
+        if match.within:
+            geofence_logger.debug("User=(%s, %s) is within %s (%.2fm)", user_lat, user_lon, match.office_name, match.distance_m)
+        elif geofence_logger.isEnabledFor(logging.DEBUG):
+            nearest = offices.index.nearest(user_lat, user_lon)
+            geofence_logger.debug("User=(%s, %s) is not within any office location; nearest is %s at %.2fm",
+                                  user_lat, user_lon, nearest.office_name, nearest.distance_m or 0.0)
         
-        return is_within
+        return match.within
     except Exception as e:
-        print(f"DEBUG Geofence error: {e} with lat={lat} lon={lon}")
+        geofence_logger.debug("Error: %s with lat=%s lon=%s", e, lat, lon)
         return False
 
 # Routes
@@ -82,13 +87,26 @@ def index():
     """Main page - redirects to appropriate login"""
     return render_template('index.html')
 
+@app.route('/readyz')
+def readiness():
+    """Readiness probe: 200 once the storage backend is connected, 503 while it warms up
+    
+    The backend (with Firestore: the SDK, credentials and gRPC channel) is not created at import;
+    a cold probe starts the warm-up so the first real request does not pay for it.
+    """
+    status = get_storage_status()
+    if status['state'] == 'cold':
+        start_storage_warm_up(on_ready=create_sample_data)
+        status = get_storage_status()
+    return jsonify(status), 200 if status['state'] == 'ready' else 503
+
 
 
 @app.route('/employee')
 def employee_portal():
     """Employee portal"""
     return render_template('employee_portal.html', 
-                         office_locations=Config.OFFICE_LOCATIONS,
+                         office_locations=get_office_registry().current().offices,
                          office_lat=Config.OFFICE_LATITUDE, 
                          office_lng=Config.OFFICE_LONGITUDE, 
                          office_radius=Config.OFFICE_RADIUS_METERS)
@@ -101,23 +119,24 @@ def employee_login():
         password = request.form.get('password')
         lat = request.form.get('latitude')
         lon = request.form.get('longitude')
-        print(f"DEBUG Route: /employee/login POST lat={lat} lon={lon}")
+        logger.debug("/employee/login POST lat=%s lon=%s", lat, lon)
         
         # Enforce geofence for employee login
         if not is_within_office_geofence(lat, lon):
             flash('Access denied: You are not within any office location.', 'error')
             return render_template('employee_login.html', 
-                                 office_locations=Config.OFFICE_LOCATIONS,
+                                 office_locations=get_office_registry().current().offices,
                                  office_lat=Config.OFFICE_LATITUDE, 
                                  office_lng=Config.OFFICE_LONGITUDE, 
                                  office_radius=Config.OFFICE_RADIUS_METERS)
         
-        employee = FirebaseEmployee.find_by_employee_id(employee_id)
+        # Read past the lookup cache, which another worker's deactivation or password change does not reach
+        employee = FirebaseEmployee.find_by_employee_id(employee_id, fresh=True)
         
         if not employee or not employee.is_active or not employee.check_password(password):
             flash('Invalid Employee ID or Password. Please check your credentials and try again.', 'error')
             return render_template('employee_login.html', 
-                                 office_locations=Config.OFFICE_LOCATIONS,
+                                 office_locations=get_office_registry().current().offices,
                                  office_lat=Config.OFFICE_LATITUDE, 
                                  office_lng=Config.OFFICE_LONGITUDE, 
                                  office_radius=Config.OFFICE_RADIUS_METERS)
@@ -129,7 +148,7 @@ def employee_login():
         return redirect(url_for('employee_dashboard'))
     
     return render_template('employee_login.html', 
-                         office_locations=Config.OFFICE_LOCATIONS,
+                         office_locations=get_office_registry().current().offices,
                          office_lat=Config.OFFICE_LATITUDE, 
                          office_lng=Config.OFFICE_LONGITUDE, 
                          office_radius=Config.OFFICE_RADIUS_METERS)
@@ -145,7 +164,7 @@ def employee_signin():
         employee_id = current_user.employee_id
         lat = request.form.get('latitude')
         lon = request.form.get('longitude')
-        print(f"DEBUG Route: /employee/signin POST lat={lat} lon={lon}")
+        logger.debug("/employee/signin POST lat=%s lon=%s", lat, lon)
         
         # Enforce geofence for sign-in
         if not is_within_office_geofence(lat, lon):
@@ -172,18 +191,18 @@ def employee_signin():
             attendance = existing_attendance
             attendance.sign_in_time = datetime.now()
         
-        print(f"DEBUG: Attempting to save attendance for {employee_id} on {today}")
+        logger.debug("Attempting to save attendance for %s on %s", employee_id, today)
         if attendance.save():
-            print(f"DEBUG: Successfully saved attendance record")
+            logger.debug("Successfully saved attendance record")
             flash(f'Welcome {current_user.name}! You have successfully signed in at {datetime.now().strftime("%H:%M:%S")}', 'success')
         else:
-            print(f"DEBUG: Failed to save attendance record")
+            logger.warning("Failed to save attendance record for %s on %s", employee_id, today)
             flash('Error recording sign-in. Please try again.', 'error')
         
         return redirect(url_for('employee_dashboard'))
     
     return render_template('employee_signin.html', 
-                         office_locations=Config.OFFICE_LOCATIONS,
+                         office_locations=get_office_registry().current().offices,
                          office_lat=Config.OFFICE_LATITUDE, 
                          office_lng=Config.OFFICE_LONGITUDE, 
                          office_radius=Config.OFFICE_RADIUS_METERS)
@@ -198,7 +217,7 @@ def employee_signout():
     if request.method == 'GET':
         return render_template(
             'employee_signout.html',
-            office_locations=Config.OFFICE_LOCATIONS,
+            office_locations=get_office_registry().current().offices,
             office_lat=Config.OFFICE_LATITUDE,
             office_lng=Config.OFFICE_LONGITUDE,
             office_radius=Config.OFFICE_RADIUS_METERS,
@@ -207,57 +226,37 @@ def employee_signout():
     # POST: perform geofence check and complete sign-out
     lat = request.form.get('latitude')
     lon = request.form.get('longitude')
-    print(f"DEBUG Route: /employee/signout POST lat={lat} lon={lon}")
+    logger.debug("/employee/signout POST lat=%s lon=%s", lat, lon)
     
     if not is_within_office_geofence(lat, lon):
         flash('Sign-out denied: You are not within any office location.', 'error')
         return redirect(url_for('employee_dashboard'))
 
-    employee_id = current_user.employee_id
-    today = datetime.now().date()
-    attendance = FirebaseAttendance.find_by_employee_and_date(employee_id, today)
+    # Read attendance/timesheet and write the sign-out in one transaction
+    result = FirebaseAttendance.complete_sign_out(current_user.employee_id, datetime.now())
 
-    if not attendance or not attendance.sign_in_time:
+    if result.status == SignOutStatus.NOT_SIGNED_IN:
         flash('You have not signed in today!', 'error')
-        return redirect(url_for('employee_dashboard'))
-
-    if attendance.sign_out_time:
+    elif result.status == SignOutStatus.ALREADY_SIGNED_OUT:
         flash('You have already signed out today!', 'error')
-        return redirect(url_for('employee_dashboard'))
-
-    # Check if timesheet is required for sign-out
-    if Config.REQUIRE_TIMESHEET_FOR_SIGNOUT:
-        existing_timesheet = FirebaseTimesheet.find_by_employee_and_date(employee_id, today)
-        if not existing_timesheet:
-            flash('You must submit your daily timesheet before signing out.', 'error')
-            return render_template(
-                'employee_signout.html',
-                office_locations=Config.OFFICE_LOCATIONS,
-                office_lat=Config.OFFICE_LATITUDE,
-                office_lng=Config.OFFICE_LONGITUDE,
-                office_radius=Config.OFFICE_RADIUS_METERS,
-                show_timesheet_requirement=True
-            )
-
-    # Calculate working hours
-    sign_out_time = datetime.now()
-    attendance.sign_out_time = sign_out_time
-
-    sign_in_datetime = attendance.get_sign_in_datetime()
-    if sign_in_datetime:
-        time_diff = sign_out_time - sign_in_datetime
-        total_hours = time_diff.total_seconds() / 3600
-        attendance.total_hours = round(total_hours, 2)
-
-        hours = int(total_hours)
-        minutes = int((total_hours - hours) * 60)
-
-        if attendance.save():
-            flash(f'Goodbye {current_user.name}! You have worked for {hours} hours and {minutes} minutes today.', 'success')
-        else:
-            flash('Error recording sign-out. Please try again.', 'error')
-    else:
+    elif result.status == SignOutStatus.TIMESHEET_REQUIRED:
+        flash('You must submit your daily timesheet before signing out.', 'error')
+        return render_template(
+            'employee_signout.html',
+            office_locations=get_office_registry().current().offices,
+            office_lat=Config.OFFICE_LATITUDE,
+            office_lng=Config.OFFICE_LONGITUDE,
+            office_radius=Config.OFFICE_RADIUS_METERS,
+            show_timesheet_requirement=True
+        )
+    elif result.status == SignOutStatus.INVALID_SIGN_IN:
         flash('Error calculating working hours. Please contact admin.', 'error')
+    elif result.status == SignOutStatus.SIGNED_OUT:
+        hours = int(result.total_hours)
+        minutes = int((result.total_hours - hours) * 60)
+        flash(f'Goodbye {current_user.name}! You have worked for {hours} hours and {minutes} minutes today.', 'success')
+    else:
+        flash('Error recording sign-out. Please try again.', 'error')
     
     return redirect(url_for('employee_dashboard'))
 
@@ -268,22 +267,12 @@ def employee_dashboard():
     if not isinstance(current_user, FirebaseEmployee):
         return redirect(url_for('employee_portal'))
     
-    # Get today's attendance for this employee
+    # Recent attendance records, newest first; today's record is the first one if it exists
     today = datetime.now().date()
-    today_attendance = FirebaseAttendance.find_by_employee_and_date(current_user.employee_id, today)
-    print(f"DEBUG: Today attendance query for {current_user.employee_id} on {today}: {today_attendance.to_dict() if today_attendance else 'None'}")
-    
-    # Get recent attendance records (last 10 days)
     recent_attendance = FirebaseAttendance.get_by_employee(current_user.employee_id, limit=10)
-    print(f"DEBUG: Employee {current_user.employee_id} ({current_user.name}) has {len(recent_attendance)} attendance records")
-    
-    # If today's attendance exists but not in recent attendance, add it manually
-    if today_attendance and not any(r.date == today_attendance.date for r in recent_attendance):
-        print(f"DEBUG: Today's attendance exists but not in recent list - adding it manually")
-        recent_attendance.insert(0, today_attendance)
-    
-    for i, record in enumerate(recent_attendance):
-        print(f"DEBUG: Record {i}: {record.to_dict()}")
+    today_date = today.strftime('%Y-%m-%d')
+    today_attendance = recent_attendance[0] if recent_attendance and recent_attendance[0].date == today_date else None
+    logger.debug("Employee %s (%s) has %s attendance records", current_user.employee_id, current_user.name, len(recent_attendance))
     
     return render_template('employee_dashboard.html',
                          today_attendance=today_attendance,
@@ -298,71 +287,44 @@ def employee_attendance():
     
     # Get date filter
     date_filter = request.args.get('date')
-    print(f"DEBUG: Date filter received: {date_filter}")
+    logger.debug("Date filter received: %s", date_filter)
     
+    stats_period = request.args.get('period', 'all')
+    filter_date = None
     if date_filter:
         try:
             filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-            print(f"DEBUG: Parsed filter date: {filter_date}")
-            attendance_records = [FirebaseAttendance.find_by_employee_and_date(current_user.employee_id, filter_date)]
-            attendance_records = [record for record in attendance_records if record is not None]
-            print(f"DEBUG: Found {len(attendance_records)} records for filtered date {filter_date}")
-            if len(attendance_records) == 0:
-                print(f"DEBUG: No attendance records found for {current_user.employee_id} on {filter_date}")
+            logger.debug("Parsed filter date: %s", filter_date)
         except ValueError as e:
-            print(f"DEBUG: Error parsing date filter: {e}")
-            attendance_records = FirebaseAttendance.get_by_employee(current_user.employee_id, limit=50)
-    else:
-        print(f"DEBUG: No date filter, getting all records")
+            logger.debug("Error parsing date filter: %s", e)
+    
+    # Statistics come from the running aggregates unless a date filter is given
+    if filter_date:
+        attendance_records = [FirebaseAttendance.find_by_employee_and_date(current_user.employee_id, filter_date)]
+        attendance_records = [record for record in attendance_records if record is not None]
+        logger.debug("Found %s records for filtered date %s", len(attendance_records), filter_date)
+        stats = FirebaseAttendance.summarize(attendance_records)
+    elif date_filter:
         attendance_records = FirebaseAttendance.get_by_employee(current_user.employee_id, limit=50)
+        stats = FirebaseAttendance.summarize(attendance_records)
+    else:
+        # The records and the aggregates are independent reads, so fetch them concurrently
+        logger.debug("No date filter, getting all records")
+        try:
+            attendance_records, stats = gather(
+                FirebaseAttendance.get_by_employee_async(current_user.employee_id, limit=50),
+                FirebaseAttendance.get_employee_stats_async(current_user.employee_id, stats_period))
+        except QueryTimeoutError:
+            flash(QUERY_TIMEOUT_MESSAGE, 'error')
+            attendance_records = []
+            stats = FirebaseAttendance.summarize(attendance_records)
     
-    print(f"DEBUG: Employee attendance view - {current_user.employee_id} has {len(attendance_records)} total records")
-    
-    # Calculate statistics
-    total_days = len(attendance_records)
-    total_hours = sum([r.total_hours or 0 for r in attendance_records])
-    complete_days = len([r for r in attendance_records if r.sign_in_time and r.sign_out_time])
-    
-    # Calculate average hours per day
-    avg_hours_per_day = total_hours / total_days if total_days > 0 else 0
-    
-    # Calculate average sign-in and sign-out times
-    signin_times = []
-    signout_times = []
-    
-    for record in attendance_records:
-        signin_dt = record.get_sign_in_datetime()
-        signout_dt = record.get_sign_out_datetime()
-        if signin_dt:
-            signin_times.append(signin_dt)
-        if signout_dt:
-            signout_times.append(signout_dt)
-    
-    avg_signin_time = "09:00"  # Default
-    avg_signout_time = "17:00"  # Default
-    
-    if signin_times:
-        avg_hour = sum([t.hour for t in signin_times]) / len(signin_times)
-        avg_minute = sum([t.minute for t in signin_times]) / len(signin_times)
-        avg_signin_time = f"{int(avg_hour):02d}:{int(avg_minute):02d}"
-    
-    if signout_times:
-        avg_hour = sum([t.hour for t in signout_times]) / len(signout_times)
-        avg_minute = sum([t.minute for t in signout_times]) / len(signout_times)
-        avg_signout_time = f"{int(avg_hour):02d}:{int(avg_minute):02d}"
-    
-    stats = {
-        'total_days': total_days,
-        'total_hours': total_hours,
-        'complete_days': complete_days,
-        'avg_hours_per_day': avg_hours_per_day,
-        'avg_signin_time': avg_signin_time,
-        'avg_signout_time': avg_signout_time
-    }
+    logger.debug("Employee attendance view - %s has %s total records", current_user.employee_id, len(attendance_records))
     
     return render_template('employee_attendance_view.html',
                          attendance_records=attendance_records,
-                         stats=stats)
+                         stats=stats,
+                         stats_period=stats_period)
 
 @app.route('/employee/logout')
 @login_required
@@ -425,10 +387,14 @@ def employee_timesheet():
     today = datetime.now().date()
     today_date = today.strftime('%Y-%m-%d')
     
-    # Get existing timesheet for today
-    existing_timesheet = FirebaseTimesheet.find_by_employee_and_date(current_user.employee_id, today)
+    # Today's timesheet, and the last 5 timesheets before today for display
+    find_existing = partial(FirebaseTimesheet.find_by_employee_and_date, current_user.employee_id, today)
+    get_recent = partial(FirebaseTimesheet.get_by_employee, current_user.employee_id, limit=5,
+                         select=Config.TIMESHEET_LIST_FIELDS, end_date=today - timedelta(days=1))
     
     if request.method == 'POST':
+        existing_timesheet = find_existing()
+        
         # Get form data
         daily_report = request.form.get('daily_report', '').strip()
         
@@ -468,10 +434,14 @@ def employee_timesheet():
             return redirect(url_for('employee_dashboard'))
         else:
             flash('Error saving timesheet. Please try again.', 'error')
-    
-    # Get recent timesheets for display (excluding today's)
-    recent_timesheets = FirebaseTimesheet.get_by_employee(current_user.employee_id, limit=10)
-    recent_timesheets = [ts for ts in recent_timesheets if ts.date != today_date][:5]  # Show last 5 excluding today
+        recent_timesheets = get_recent()
+    else:
+        # Independent reads, so fetch them side by side
+        try:
+            existing_timesheet, recent_timesheets = fan_out(find_existing, get_recent)
+        except QueryTimeoutError:
+            flash(QUERY_TIMEOUT_MESSAGE, 'error')
+            existing_timesheet, recent_timesheets = None, []
     
     return render_template('employee_timesheet.html',
                          today_date=today_date,
@@ -503,24 +473,27 @@ def admin_dashboard():
     if not isinstance(current_user, FirebaseAdmin):
         return redirect(url_for('admin_login'))
     
-    # Get today's attendance
+    # Today's attendance (the full list lives on the attendance page), all active employees and
+    # the statistics from the materialized daily summary, read side by side
     today = datetime.now().date()
-    today_attendance = FirebaseAttendance.get_by_date(today)
-    
-    # Get all employees
-    employees = FirebaseEmployee.get_active()
-    
-    # Get attendance statistics
+    try:
+        today_attendance, employees, today_summary = fan_out(
+            partial(FirebaseAttendance.get_by_date, today, limit=Config.ADMIN_PAGE_SIZE),
+            partial(FirebaseEmployee.get_active, select=Config.EMPLOYEE_LIST_FIELDS),
+            partial(FirebaseAttendance.get_daily_summary, today))
+    except QueryTimeoutError:
+        flash(QUERY_TIMEOUT_MESSAGE, 'error')
+        today_attendance, employees, today_summary = [], [], FirebaseAttendance.empty_daily_summary(today)
+    attach_employees(today_attendance, employees)
     total_employees = len(employees)
-    signed_in_today = len([a for a in today_attendance if a.sign_in_time and not a.sign_out_time])
-    signed_out_today = len([a for a in today_attendance if a.sign_out_time])
     
     return render_template('admin_dashboard.html',
                          employees=employees,
                          today_attendance=today_attendance,
+                         today_summary=today_summary,
                          total_employees=total_employees,
-                         signed_in_today=signed_in_today,
-                         signed_out_today=signed_out_today,
+                         signed_in_today=today_summary['signed_in'],
+                         signed_out_today=today_summary['signed_out'],
                          datetime=datetime)
 
 @app.route('/admin/employees')
@@ -530,7 +503,7 @@ def admin_employees():
     if not isinstance(current_user, FirebaseAdmin):
         return redirect(url_for('admin_login'))
     
-    employees = FirebaseEmployee.get_all()
+    employees = FirebaseEmployee.get_all(select=Config.EMPLOYEE_LIST_FIELDS)
     return render_template('admin_employees.html', employees=employees)
 
 @app.route('/admin/employees/add', methods=['GET', 'POST'])
@@ -605,7 +578,7 @@ def admin_toggle_employee_status(employee_doc_id):
 @app.route('/admin/employees/<employee_doc_id>/delete', methods=['POST'])
 @login_required
 def admin_delete_employee(employee_doc_id):
-    """Permanently delete an employee and their attendance records"""
+    """Permanently delete an employee and their attendance and timesheet records"""
     if not isinstance(current_user, FirebaseAdmin):
         return redirect(url_for('admin_login'))
 
@@ -615,13 +588,74 @@ def admin_delete_employee(employee_doc_id):
         return redirect(url_for('admin_employees'))
 
     employee_name = employee.name
-    if employee.delete():
-        flash(f'Employee {employee_name} and their attendance records have been deleted.', 'success')
+    job_id = employee.delete_in_background()
+    if job_id:
+        flash(f'Employee {employee_name} has been deactivated. Their attendance and timesheet records '
+              f'are being deleted in the background (job {job_id}).', 'success')
     else:
         flash('Error deleting employee. Please try again.', 'error')
 
     return redirect(url_for('admin_employees'))
 
+@app.route('/admin/jobs/<job_id>')
+@login_required
+def admin_job_status(job_id):
+    """Progress of a background admin job as JSON; a job whose worker stopped is resumed here"""
+    if not isinstance(current_user, FirebaseAdmin):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    storage = get_storage_backend()
+    job = storage.get_job(job_id)
+    if job and storage.resume_job(job):
+        job = storage.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    """Per-route request counts, backend reads/writes/documents and backend vs render time as JSON"""
+    if not isinstance(current_user, FirebaseAdmin):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify({
+        'enabled': Config.REQUEST_METRICS_ENABLED,
+        'routes': request_metrics.route_stats.snapshot(),
+        'lookup_cache': get_storage_backend().get_cache_stats()
+    })
+
+@app.route('/admin/office_locations', methods=['GET', 'POST'])
+@login_required
+def admin_office_locations():
+    """Current office locations as JSON; POST {"offices": [...]} replaces them when they are
+    stored in the backend (OFFICE_LOCATIONS_SOURCE=backend)"""
+    if not isinstance(current_user, FirebaseAdmin):
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    registry = get_office_registry()
+    if request.method == 'POST':
+        if Config.OFFICE_LOCATIONS_SOURCE != 'backend':
+            return jsonify({'error': f"Office locations come from '{Config.OFFICE_LOCATIONS_SOURCE}'; "
+                                     "set OFFICE_LOCATIONS_SOURCE=backend to edit them here"}), 409
+        try:
+            offices = validate_offices((request.get_json(silent=True) or {}).get('offices'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if get_storage_backend().set_office_locations(offices) is None:
+            return jsonify({'error': 'Failed to save office locations'}), 500
+        # This worker switches now; the others pick the new version up on their next poll
+        registry.reload()
+    
+    snapshot = registry.current()
+    return jsonify({
+        'source': Config.OFFICE_LOCATIONS_SOURCE,
+        'version': snapshot.version,
+        'loaded_at': datetime.fromtimestamp(snapshot.loaded_at).isoformat(),
+        'poll_seconds': registry.poll_seconds,
+        'offices': list(snapshot.offices)
+    })
+
 @app.route('/admin/employees/<employee_doc_id>/edit', methods=['GET', 'POST'])
 @login_required
 def admin_edit_employee(employee_doc_id):
@@ -676,32 +710,39 @@ def admin_attendance():
     # Get filters
     date_filter = request.args.get('date')
     status_filter = request.args.get('status')
+    page_token = request.args.get('page_token')
+    next_page_token = None
     
-    # Get base attendance records
+    # The status filter runs in the query, so every page is full up to the last one
+    status = ATTENDANCE_STATUS_FILTERS.get(status_filter)
+    
+    # Get base attendance records, and the employees to label them with at the same time
+    filter_date = None
     if date_filter:
         try:
             filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-            attendance_records = FirebaseAttendance.get_by_date(filter_date)
         except ValueError:
-            attendance_records = FirebaseAttendance.get_recent(limit=100)
-    else:
-        attendance_records = FirebaseAttendance.get_recent(limit=100)
-    
-    # Apply status filter
-    if status_filter == 'incomplete_sessions':
-        # Filter for employees who signed in but didn't sign out
-        attendance_records = [record for record in attendance_records 
-                            if record.sign_in_time and not record.sign_out_time]
-    elif status_filter == 'completed_sessions':
-        # Filter for employees who completed their day
-        attendance_records = [record for record in attendance_records 
-                            if record.sign_in_time and record.sign_out_time]
-    
-    employees = FirebaseEmployee.get_all()
+            pass
+    try:
+        if filter_date:
+            attendance_records, employees = gather(
+                FirebaseAttendance.get_by_date_async(filter_date, status=status),
+                FirebaseEmployee.get_all_async(select=Config.EMPLOYEE_LIST_FIELDS))
+        else:
+            (attendance_records, next_page_token), employees = gather(
+                FirebaseAttendance.get_recent_page_async(Config.ADMIN_PAGE_SIZE, page_token, status=status),
+                FirebaseEmployee.get_all_async(select=Config.EMPLOYEE_LIST_FIELDS))
+    except QueryTimeoutError:
+        flash(QUERY_TIMEOUT_MESSAGE, 'error')
+        attendance_records, employees, next_page_token = [], [], None
+    
+    attach_employees(attendance_records, employees)
     return render_template('admin_attendance.html', 
                          attendance_records=attendance_records, 
                          employees=employees,
-                         status_filter=status_filter)
+                         status_filter=status_filter,
+                         page_token=page_token,
+                         next_page_token=next_page_token)
 
 @app.route('/admin/timesheets')
 @login_required
@@ -713,39 +754,140 @@ def admin_timesheets():
     # Get filters
     date_filter = request.args.get('date')
     employee_filter = request.args.get('employee_id')
+    page_token = request.args.get('page_token')
+    next_page_token = None
     
-    # Get timesheet records based on filters
-    if date_filter and employee_filter:
-        # Filter by both date and employee
-        try:
-            filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-            timesheet_records = [FirebaseTimesheet.find_by_employee_and_date(employee_filter, filter_date)]
-            timesheet_records = [record for record in timesheet_records if record is not None]
-        except ValueError:
-            timesheet_records = []
-    elif date_filter:
-        # Filter by date only
+    filter_date = None
+    if date_filter:
         try:
             filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-            timesheet_records = FirebaseTimesheet.get_by_date(filter_date)
         except ValueError:
-            timesheet_records = FirebaseTimesheet.get_recent(limit=100)
-    elif employee_filter:
-        # Filter by employee only
-        timesheet_records = FirebaseTimesheet.get_by_employee(employee_filter, limit=100)
-    else:
-        # No filters - get recent records
-        timesheet_records = FirebaseTimesheet.get_recent(limit=100)
+            pass
     
-    # Get all employees for dropdown and employee lookup
-    employees = FirebaseEmployee.get_all()
-    employees_dict = {emp.employee_id: emp for emp in employees}
+    # Get timesheet records based on filters, together with all employees for the dropdown
+    # and employee lookup
+    try:
+        employees_query = FirebaseEmployee.get_all_async(select=Config.EMPLOYEE_LIST_FIELDS)
+        if date_filter and employee_filter:
+            # Filter by both date and employee
+            if filter_date:
+                timesheet_record, employees = gather(
+                    FirebaseTimesheet.find_by_employee_and_date_async(employee_filter, filter_date), employees_query)
+                timesheet_records = [timesheet_record] if timesheet_record is not None else []
+            else:
+                timesheet_records = []
+                [employees] = gather(employees_query)
+        elif filter_date:
+            # Filter by date only
+            timesheet_records, employees = gather(
+                FirebaseTimesheet.get_by_date_async(filter_date, select=Config.TIMESHEET_LIST_FIELDS), employees_query)
+        elif employee_filter:
+            # Filter by employee only
+            timesheet_records, employees = gather(
+                FirebaseTimesheet.get_by_employee_async(employee_filter, limit=100, select=Config.TIMESHEET_LIST_FIELDS),
+                employees_query)
+        else:
+            # No filters (or an unparseable date) - get one page of recent records
+            (timesheet_records, next_page_token), employees = gather(
+                FirebaseTimesheet.get_recent_page_async(Config.ADMIN_PAGE_SIZE, page_token, select=Config.TIMESHEET_LIST_FIELDS),
+                employees_query)
+    except QueryTimeoutError:
+        flash(QUERY_TIMEOUT_MESSAGE, 'error')
+        timesheet_records, employees, next_page_token = [], [], None
+    
+    attach_employees(timesheet_records, employees)
     
     return render_template('admin_timesheets.html', 
                          timesheet_records=timesheet_records, 
                          employees=employees,
-                         employees_dict=employees_dict)
+                         page_token=page_token,
+                         next_page_token=next_page_token)
 
+@app.route('/admin/export')
+@login_required
+def admin_export():
+    """Stream attendance or timesheet records for a date range (and optionally one department)
+    as a CSV or XLSX download"""
+    if not isinstance(current_user, FirebaseAdmin):
+        return redirect(url_for('admin_login'))
+    
+    kind = request.args.get('kind', 'attendance')
+    export_format = request.args.get('format', 'csv')
+    department = request.args.get('department') or None
+    if kind not in EXPORT_FIELDS:
+        flash('Unknown export type.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    back = url_for('admin_attendance' if kind == 'attendance' else 'admin_timesheets')
+    if export_format not in EXPORT_MIMETYPES:
+        flash('Export format must be CSV or XLSX.', 'error')
+        return redirect(back)
+    
+    try:
+        start_date = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        flash('Please choose a valid start and end date to export.', 'error')
+        return redirect(back)
+    if start_date > end_date:
+        flash('The export start date must not be after the end date.', 'error')
+        return redirect(back)
+    
+    # Rows are read and written a page at a time while the response is sent
+    rows = export_rows(get_storage_backend(), kind, start_date.isoformat(), end_date.isoformat(), department)
+    filename = f"{kind}_{start_date.isoformat()}_{end_date.isoformat()}"
+    if department:
+        filename += '_' + ''.join(c if c.isalnum() else '_' for c in department)
+    return Response(
+        stream_with_context(export_chunks(rows, export_format, sheet_name=kind.capitalize())),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'})
+
+
+@app.route('/admin/payroll')
+@login_required
+def admin_payroll():
+    """Monthly payroll report: days present, hours, late arrivals and early departures per
+    employee, as a page or (format=csv) a download"""
+    if not isinstance(current_user, FirebaseAdmin):
+        return redirect(url_for('admin_login'))
+    
+    try:
+        month = datetime.strptime(request.args.get('month') or datetime.now().strftime('%Y-%m'), '%Y-%m')
+    except ValueError:
+        flash('Please choose a valid month.', 'error')
+        return redirect(url_for('admin_payroll'))
+    
+    # Reuses the stored rollup unless the month's attendance changed; not fanned out, since
+    # recomputing a large month can outlast QUERY_TIMEOUT_SECONDS
+    payroll = FirebaseAttendance.get_monthly_payroll(month)
+    employees = FirebaseEmployee.get_all(select=Config.EMPLOYEE_LIST_FIELDS)
+    
+    # Active employees without attendance still get a row of zeros
+    employees_by_id = {employee.employee_id: employee for employee in employees}
+    employee_ids = set(payroll['employees']) | {employee.employee_id for employee in employees if employee.is_active}
+    payroll_entries = []
+    for employee_id in sorted(employee_ids):
+        employee = employees_by_id.get(employee_id)
+        totals = payroll['employees'].get(employee_id, {})
+        payroll_entries.append({
+            'employee_id': employee_id,
+            'name': employee.name if employee else 'Unknown',
+            'department': (employee.department if employee else None) or 'Unassigned',
+            'days_present': totals.get('days_present', 0),
+            'total_hours': totals.get('total_hours', 0),
+            'late_arrivals': totals.get('late_arrivals', 0),
+            'early_departures': totals.get('early_departures', 0)
+        })
+    
+    if request.args.get('format') == 'csv':
+        rows = [PAYROLL_COLUMNS] + [[entry[column] for column in PAYROLL_COLUMNS] for entry in payroll_entries]
+        return Response(export_chunks(rows, 'csv'), mimetype=EXPORT_MIMETYPES['csv'],
+                        headers={'Content-Disposition': f'attachment; filename="payroll_{payroll["month"]}.csv"'})
+    
+    return render_template('admin_payroll.html',
+                         month=payroll['month'],
+                         payroll_entries=payroll_entries,
+                         working_hours=(Config.WORKING_HOURS_START, Config.WORKING_HOURS_END))
 
 
 @app.route('/admin/logout')
@@ -760,7 +902,7 @@ def create_test_attendance(employee_id):
     """Debug route to create test attendance data"""
     try:
         from datetime import datetime
-        print(f"DEBUG: Creating test attendance for {employee_id}")
+        logger.debug("Creating test attendance for %s", employee_id)
         
         test_attendance = FirebaseAttendance({
             'employee_id': employee_id,
@@ -770,21 +912,21 @@ def create_test_attendance(employee_id):
             'total_hours': 8.5
         })
         
-        print(f"DEBUG: Test attendance object created: {test_attendance.to_dict()}")
+        logger.debug("Test attendance object created: %s", test_attendance.to_dict())
         
         if test_attendance.save():
-            print(f"DEBUG: Successfully saved test attendance")
+            logger.debug("Successfully saved test attendance")
             return f"✅ Test attendance created for {employee_id} on {datetime.now().strftime('%Y-%m-%d')}"
         else:
-            print(f"DEBUG: Failed to save test attendance")
+            logger.debug("Failed to save test attendance")
             return f"❌ Failed to create test attendance for {employee_id}"
     except Exception as e:
-        print(f"DEBUG: Exception in create_test_attendance: {e}")
+        logger.debug("Exception in create_test_attendance: %s", e)
         return f"❌ Error: {e}"
 
 def create_sample_data():
     """Create sample data for testing"""
-    print("🔥 Initializing Firebase database...")
+    logger.info("Initializing Firebase database...")
     
     # Create default admin if none exists
     admin = FirebaseAdmin.find_by_username(Config.DEFAULT_ADMIN_USERNAME)
@@ -795,12 +937,12 @@ def create_sample_data():
             'name': Config.DEFAULT_ADMIN_NAME
         })
         if admin.save():
-            print(f"✅ Default admin created: {Config.DEFAULT_ADMIN_USERNAME}")
+            logger.info("Default admin created: %s", Config.DEFAULT_ADMIN_USERNAME)
         else:
-            print("❌ Failed to create default admin")
+            logger.error("Failed to create default admin")
     
     if Config.SEED_SAMPLE_DATA:
-        print("🌱 Seeding sample employees...")
+        logger.info("Seeding sample employees...")
         # Create sample employees
         for emp_data in Config.SAMPLE_EMPLOYEES:
             existing_employee = FirebaseEmployee.find_by_employee_id(emp_data['employee_id'])
@@ -811,12 +953,13 @@ def create_sample_data():
                 emp_copy['password_hash'] = generate_password_hash(password)
                 employee = FirebaseEmployee(emp_copy)
                 if employee.save():
-                    print(f"✅ Sample employee created: {emp_data['employee_id']}")
+                    logger.info("Sample employee created: %s", emp_data['employee_id'])
                 else:
-                    print(f"❌ Failed to create sample employee: {emp_data['employee_id']}")
+                    logger.error("Failed to create sample employee: %s", emp_data['employee_id'])
 
 if __name__ == '__main__':
-    create_sample_data()
+    # Connect and seed in the background so the server starts listening straight away
+    start_storage_warm_up(on_ready=create_sample_data)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
 
@@ -0,0 +1,129 @@
+"""
+Asynchronous access to the storage backend, for views that make several independent queries
+
+Views stay synchronous (they run on gunicorn's worker threads) and hand their queries to
+gather(), which runs them concurrently as coroutines on one event loop per process and blocks
+until all have finished, so a page waits for its slowest query instead of the sum of them.
+The loop runs on a background thread for the life of the process because the Firestore async
+client's gRPC channel is bound to the loop it first ran on.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+from config import Config
+from storage_backend import StorageBackend, get_storage_backend
+from query_pool import get_query_pool
+
+class AsyncStorageBackend:
+    """Coroutine interface to a StorageBackend
+    
+    Every public StorageBackend method is available as a coroutine that runs the synchronous
+    method on the shared query pool; subclasses override the ones they can await natively.
+    """
+    
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+    
+    def __getattr__(self, name: str):
+        if name.startswith('_') or not callable(getattr(StorageBackend, name, None)):
+            raise AttributeError(name)
+        method = getattr(self.backend, name)
+        
+        async def call(*args, **kwargs):
+            # to_thread carries the request context over, so the call is still metered
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+class EventLoopThread:
+    """An asyncio event loop running on a daemon thread"""
+    
+    def __init__(self, name: str = 'storage-event-loop'):
+        self.loop = asyncio.new_event_loop()
+        # Blocking calls (asyncio.to_thread) share the bounded pool fan_out() uses
+        self.loop.set_default_executor(get_query_pool().executor)
+        self.thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self.thread.start()
+    
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run coroutine on the loop in a copy of the caller's context (so flask.g and the request
+        metrics are visible to it) and wait for its result; it is cancelled if the wait ends early"""
+        future = asyncio.run_coroutine_threadsafe(_run_in_context(contextvars.copy_context(), coroutine), self.loop)
+        try:
+            return future.result(timeout)
+        finally:
+            future.cancel()
+
+async def _run_in_context(context: contextvars.Context, coroutine: Awaitable) -> Any:
+    # A task starts with a copy of the context current when it is created
+    return await context.run(asyncio.ensure_future, coroutine)
+
+# Global async backend and its event loop, created per process on first use
+async_storage_backend = None
+_event_loop = None
+_async_lock = threading.Lock()
+_async_hooks = []
+
+def on_async_storage_backend_created(hook: Callable[[AsyncStorageBackend], Any]):
+    """Run hook(async_backend) when the async backend is created, or now if it already exists"""
+    with _async_lock:
+        if async_storage_backend is None:
+            _async_hooks.append(hook)
+            return
+    hook(async_storage_backend)
+
+def _create_async_storage_backend(backend: StorageBackend) -> AsyncStorageBackend:
+    if Config.STORAGE_BACKEND == 'firestore' and getattr(backend, 'db', None) is not None:
+        from async_firebase_service import AsyncFirebaseService
+        return AsyncFirebaseService(backend)
+    return AsyncStorageBackend(backend)
+
+def get_async_storage_backend() -> AsyncStorageBackend:
+    """Get or create the async counterpart of get_storage_backend()"""
+    global async_storage_backend
+    if async_storage_backend is None:
+        backend = get_storage_backend()
+        with _async_lock:
+            if async_storage_backend is None:
+                async_backend = _create_async_storage_backend(backend)
+                for hook in _async_hooks:
+                    hook(async_backend)
+                async_storage_backend = async_backend
+    return async_storage_backend
+
+def _get_event_loop() -> EventLoopThread:
+    global _event_loop
+    if _event_loop is None:
+        with _async_lock:
+            if _event_loop is None:
+                _event_loop = EventLoopThread()
+    return _event_loop
+
+def gather(*coroutines: Awaitable, timeout: Optional[float] = None) -> List[Any]:
+    """Run coroutines concurrently on the storage event loop and return their results in order
+    
+    Blocks the calling thread for up to timeout seconds (default Config.QUERY_TIMEOUT_SECONDS,
+    0 waits indefinitely), then cancels them and raises TimeoutError. The first exception
+    raised by any of them is re-raised here.
+    """
+    # Create the backends here rather than on the loop, where it would stall every other request
+    get_async_storage_backend()
+    
+    if timeout is None:
+        timeout = Config.QUERY_TIMEOUT_SECONDS
+    
+    async def run_all():
+        return await asyncio.gather(*coroutines)
+    return _get_event_loop().run(run_all(), timeout or None)
+
+def _reset_after_fork():
+    """The loop thread does not survive fork() and the async client must not be shared"""
+    global async_storage_backend, _event_loop, _async_lock
+    async_storage_backend = None
+    _event_loop = None
+    _async_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
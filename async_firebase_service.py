@@ -0,0 +1,180 @@
+import logging
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import quote
+from firebase_admin import firestore_async
+from config import Config
+from async_backend import AsyncStorageBackend
+from firebase_service import FirebaseService, record_doc_id
+from storage_backend import count_store_operation, complete_daily_summary
+
+logger = logging.getLogger(__name__)
+
+def _doc_data(doc) -> Dict[str, Any]:
+    data = doc.to_dict()
+    data['id'] = doc.id
+    return data
+
+async def _read_doc(doc_ref):
+    """Await one document snapshot, counting the read for request metrics"""
+    doc = await doc_ref.get()
+    count_store_operation(reads=1, documents=1 if doc.exists else 0)
+    return doc
+
+async def _read_query(query) -> list:
+    """Await a query's documents, counting the read and the documents it returned for request metrics"""
+    docs = list(await query.get())
+    count_store_operation(reads=1, documents=len(docs))
+    return docs
+
+class AsyncFirebaseService(AsyncStorageBackend):
+    """The read queries of FirebaseService on the Firestore async client
+    
+    Covers the list and lookup queries behind the admin and employee views, so several can be
+    in flight at once on one event loop. Writes, transactions and rebuilds fall through to the
+    synchronous FirebaseService on a worker thread.
+    """
+    
+    # Query building is shared with the synchronous service; only awaiting the results differs
+    _project = staticmethod(FirebaseService._project)
+    _employee_date_range_query = FirebaseService._employee_date_range_query
+    _recent_page_query = FirebaseService._recent_page_query
+    _page_result = staticmethod(FirebaseService._page_result)
+    
+    def __init__(self, backend: FirebaseService):
+        super().__init__(backend)
+        if Config.FIRESTORE_IN_MEMORY:
+            self.db = backend.db.async_client()
+        else:
+            # Uses the app initialized by FirebaseService; the channel opens on the first await
+            self.db = firestore_async.client()
+        logger.info("Async Firestore client ready")
+    
+    # Employee Operations
+    async def get_all_employees(self, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all employees, optionally projected to the given fields"""
+        try:
+            docs = await _read_query(self._project(self.db.collection('employees'), select))
+            return [_doc_data(doc) for doc in docs]
+        except Exception as e:
+            logger.error("Error getting all employees: %s", e)
+            return []
+    
+    # Attendance Operations
+    async def get_attendance_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get attendance record for specific employee and date"""
+        try:
+            doc = await self._get_daily_record_snapshot('attendance', employee_id, date_str)
+            return _doc_data(doc) if doc else None
+        except Exception as e:
+            logger.error("Error getting attendance: %s", e)
+            return None
+    
+    async def get_attendance_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                         start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get an employee's newest attendance records, optionally within [start_date, end_date]"""
+        try:
+            query = self._employee_date_range_query('attendance', employee_id, start_date, end_date)
+            docs = await _read_query(self._project(query, select, 'date').limit(limit))
+            return [_doc_data(doc) for doc in docs]
+        except Exception as e:
+            logger.exception("Error getting employee attendance: %s", e)
+            return []
+    
+    async def get_attendance_by_date(self, date_str: str, limit: Optional[int] = None, select: Optional[List[str]] = None,
+                                     status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all attendance records for a specific date (at most limit when given), optionally projected
+        and restricted to one attendance status"""
+        try:
+            query = self._project(self.db.collection('attendance').where('date', '==', date_str), select)
+            if status:
+                query = query.where('status', '==', status)
+            if limit:
+                query = query.limit(limit)
+            return [_doc_data(doc) for doc in await _read_query(query)]
+        except Exception as e:
+            logger.error("Error getting attendance by date: %s", e)
+            return []
+    
+    async def get_recent_attendance_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None,
+                                         status: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of recent attendance records (optionally of one attendance status) and the
+        token for the next page (None on the last page)"""
+        try:
+            docs = await _read_query(self._recent_page_query('attendance', limit, page_token, select, status))
+            return self._page_result(docs, limit)
+        except Exception as e:
+            logger.error("Error getting recent attendance: %s", e)
+            return [], None
+    
+    async def get_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get the materialized attendance counters for a date, None until it has been rebuilt once"""
+        try:
+            doc = await _read_doc(self.db.collection('daily_summaries').document(date_str))
+            if doc.exists and (doc.to_dict() or {}).get('initialized'):
+                return complete_daily_summary(_doc_data(doc))
+            return None
+        except Exception as e:
+            logger.error("Error getting daily summary: %s", e)
+            return None
+    
+    async def get_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Get the running attendance aggregates for an employee, None until they have been rebuilt once"""
+        try:
+            doc = await _read_doc(self.db.collection('employee_stats').document(quote(str(employee_id), safe='')))
+            return _doc_data(doc) if doc.exists and (doc.to_dict() or {}).get('initialized') else None
+        except Exception as e:
+            logger.error("Error getting employee stats: %s", e)
+            return None
+    
+    # Timesheet Operations
+    async def get_timesheet_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get timesheet record for specific employee and date"""
+        try:
+            doc = await self._get_daily_record_snapshot('timesheets', employee_id, date_str)
+            return _doc_data(doc) if doc else None
+        except Exception as e:
+            logger.error("Error getting timesheet: %s", e)
+            return None
+    
+    async def get_timesheets_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                         start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get an employee's newest timesheet records, optionally within [start_date, end_date]"""
+        try:
+            query = self._employee_date_range_query('timesheets', employee_id, start_date, end_date)
+            docs = await _read_query(self._project(query, select, 'date').limit(limit))
+            return [_doc_data(doc) for doc in docs]
+        except Exception as e:
+            logger.exception("Error getting employee timesheets: %s", e)
+            return []
+    
+    async def get_timesheets_by_date(self, date_str: str, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all timesheet records for a specific date, optionally projected to the given fields"""
+        try:
+            docs = await _read_query(self._project(self.db.collection('timesheets').where('date', '==', date_str), select))
+            return [_doc_data(doc) for doc in docs]
+        except Exception as e:
+            logger.error("Error getting timesheets by date: %s", e)
+            return []
+    
+    async def get_recent_timesheets_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of recent timesheet records and the token for the next page (None on the last page)"""
+        try:
+            docs = await _read_query(self._recent_page_query('timesheets', limit, page_token, select))
+            return self._page_result(docs, limit)
+        except Exception as e:
+            logger.error("Error getting recent timesheets: %s", e)
+            return [], None
+    
+    async def _get_daily_record_snapshot(self, collection_name: str, employee_id: str, date_str: str):
+        """Snapshot of an employee's attendance/timesheet document for a date, or None"""
+        if Config.COMPOSITE_RECORD_IDS:
+            doc = await _read_doc(self.db.collection(collection_name).document(record_doc_id(employee_id, date_str)))
+            return doc if doc.exists else None
+        
+        docs = await _read_query(self.db.collection(collection_name)
+                                 .where('employee_id', '==', employee_id)
+                                 .where('date', '==', date_str)
+                                 .limit(1))
+        for doc in docs:
+            return doc
+        return None
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+One-off tool to store the 'status' field (see storage_backend.attendance_status) on attendance
+documents written before it existed, so the admin attendance status filter finds them
+
+Usage:
+    python backfill_attendance_status.py             # backfill every attendance document
+    python backfill_attendance_status.py --dry-run   # report what would change without writing
+"""
+
+import argparse
+import os
+import sys
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BATCH_SIZE = 400  # Firestore caps batches at 500 writes
+
+
+def backfill_status(db, dry_run=False):
+    """Set the status of every attendance document whose stored status is missing or wrong,
+    returns (updated, unchanged)"""
+    from storage_backend import attendance_status
+
+    print("\n📋 Backfilling attendance status...")
+    updated = 0
+    unchanged = 0
+    batch = db.batch()
+    pending = 0
+    fields = ['sign_in_time', 'sign_out_time', 'status']
+    for doc in db.collection('attendance').select(fields).stream():
+        data = doc.to_dict() or {}
+        status = attendance_status(data)
+        if data.get('status') == status:
+            unchanged += 1
+            continue
+        updated += 1
+        if not dry_run:
+            batch.update(doc.reference, {'status': status})
+            pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    action = "Would update" if dry_run else "Updated"
+    print(f"✅ {action} {updated} documents, {unchanged} already current")
+    return updated, unchanged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store the status field on existing attendance documents")
+    parser.add_argument('--dry-run', action='store_true', help="report changes without writing")
+    args = parser.parse_args()
+
+    print("🏷️  Attendance Status Backfill Tool")
+    print("=" * 50)
+
+    from firebase_service import get_firebase_service
+    firebase_service = get_firebase_service()
+    if not firebase_service.db:
+        print("❌ Firebase connection failed")
+        sys.exit(1)
+
+    backfill_status(firebase_service.db, dry_run=args.dry_run)
+
+    if not args.dry_run:
+        print("\n🎉 Backfill completed! Deploy firestore.indexes.json for the status filter index.")
+
+
+if __name__ == '__main__':
+    main()
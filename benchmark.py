@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the morning/evening rush: N employees log in, sign in, submit
+their timesheet and sign out concurrently, driven through the Flask test client against
+a local backend (in-memory Firestore with injected latency, or SQLite)
+
+Usage:
+    python benchmark.py                                  # 200 employees, 16 workers, in-memory Firestore
+    python benchmark.py --employees 2000 --concurrency 64 --latency-ms 20
+    python benchmark.py --backend sqlite --output sqlite.json
+    python benchmark.py --compare benchmark_results.json # print p95 changes against an earlier run
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = 'bench-password'
+DEPARTMENTS = ['IT', 'HR', 'Sales', 'Marketing', 'Finance']
+# Inside the Main Office geofence in Config.OFFICE_LOCATIONS
+LOCATION = {'latitude': '12.92499', 'longitude': '77.61800'}
+SERVER_TIMING_DURATION = re.compile(r'(\w+);dur=([\d.]+)')
+# (route label, path, form data) for each employee, in order
+STEPS = [
+    ('login', '/employee/login', None),
+    ('signin', '/employee/signin', LOCATION),
+    ('timesheet', '/employee/timesheet', {'daily_report': 'Benchmark run'}),
+    ('signout', '/employee/signout', LOCATION),
+]
+
+
+def configure_environment(args):
+    """Select the backend through the environment; Config reads it when first imported"""
+    os.environ['SEED_SAMPLE_DATA'] = 'false'
+    if not args.verbose:
+        os.environ['LOG_LEVEL'] = 'WARNING'
+    if args.backend == 'memory':
+        os.environ['STORAGE_BACKEND'] = 'firestore'
+        os.environ['FIRESTORE_IN_MEMORY'] = 'true'
+        os.environ['FIRESTORE_IN_MEMORY_LATENCY_MS'] = str(args.latency_ms)
+        os.environ['FIRESTORE_IN_MEMORY_JITTER_MS'] = str(args.jitter_ms)
+    else:
+        os.environ['STORAGE_BACKEND'] = 'sqlite'
+        os.environ['SQLITE_DATABASE_PATH'] = args.sqlite_path or os.path.join(
+            tempfile.mkdtemp(prefix='attendance-bench-'), 'bench.db')
+
+
+class CallCounter:
+    """Per-thread counts of storage calls and store round trips for the request in flight"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.calls = 0
+        self._local.round_trips = 0
+        self._local.depth = 0
+
+    def snapshot(self):
+        return getattr(self._local, 'calls', 0), getattr(self._local, 'round_trips', 0)
+
+    def wrap_call(self, method):
+        """Count only outermost calls, not a backend method calling another"""
+        def counted(*args, **kwargs):
+            local = self._local
+            local.depth = getattr(local, 'depth', 0) + 1
+            if local.depth == 1:
+                local.calls = getattr(local, 'calls', 0) + 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                local.depth -= 1
+        return counted
+
+    def wrap_round_trip(self, round_trip):
+        def counted():
+            self._local.round_trips = getattr(self._local, 'round_trips', 0) + 1
+            return round_trip()
+        return counted
+
+
+def instrument(storage, counter):
+    """Count public StorageBackend calls and, for the in-memory client, its round trips"""
+    from storage_backend import StorageBackend
+    for name in dir(StorageBackend):
+        if not name.startswith('_') and callable(getattr(storage, name)):
+            setattr(storage, name, counter.wrap_call(getattr(storage, name)))
+    db = getattr(storage, 'db', None)
+    if db is not None and hasattr(db, '_round_trip'):
+        db._round_trip = counter.wrap_round_trip(db._round_trip)
+        return True
+    return False
+
+
+def seed_employees(storage, count, password_hash_method=None):
+    """Create count active employees sharing one password hash, returns their employee IDs"""
+    from werkzeug.security import generate_password_hash
+    options = {'method': password_hash_method} if password_hash_method else {}
+    password_hash = generate_password_hash(PASSWORD, **options)
+
+    # Seeding is setup, not part of the measurement
+    db = getattr(storage, 'db', None)
+    latency = getattr(db, 'latency_ms', None)
+    if latency is not None:
+        db.latency_ms = 0
+    employee_ids = []
+    for index in range(count):
+        employee_id = f"BENCH{index + 1:05d}"
+        storage.create_employee({
+            'employee_id': employee_id,
+            'name': f"Bench Employee {index + 1}",
+            'email': f"bench{index + 1}@example.com",
+            'department': DEPARTMENTS[index % len(DEPARTMENTS)],
+            'password_hash': password_hash,
+            'is_active': True
+        })
+        employee_ids.append(employee_id)
+    if latency is not None:
+        db.latency_ms = latency
+    return employee_ids
+
+
+def server_timing(response):
+    """{metric: milliseconds} from the Server-Timing header set by request_metrics"""
+    header = response.headers.get('Server-Timing', '')
+    return {name: float(duration) for name, duration in SERVER_TIMING_DURATION.findall(header)}
+
+
+def run_employee(app, counter, employee_id):
+    """One employee's day, returns [(route, seconds, status_code, calls, round_trips, backend_ms, render_ms)]"""
+    client = app.test_client()
+    samples = []
+    for route, path, form in STEPS:
+        if route == 'login':
+            form = dict(LOCATION, employee_id=employee_id, password=PASSWORD)
+        counter.reset()
+        started = time.perf_counter()
+        response = client.post(path, data=form)
+        elapsed = time.perf_counter() - started
+        calls, round_trips = counter.snapshot()
+        timing = server_timing(response)
+        samples.append((route, elapsed, response.status_code, calls, round_trips,
+                        timing.get('backend'), timing.get('render')))
+    return samples
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, wall_seconds, count_round_trips):
+    """Latency percentiles (ms), throughput and calls per request, per route and overall"""
+    def average(values):
+        values = [value for value in values if value is not None]
+        return round(sum(values) / len(values), 2) if values else None
+
+    def stats(group):
+        latencies = sorted(sample[1] * 1000 for sample in group)
+        errors = sum(1 for sample in group if sample[2] >= 400)
+        return {
+            'requests': len(group),
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'max_ms': round(latencies[-1], 2),
+            'requests_per_second': round(len(group) / wall_seconds, 1) if wall_seconds else None,
+            'backend_calls_per_request': round(sum(sample[3] for sample in group) / len(group), 2),
+            'round_trips_per_request': (round(sum(sample[4] for sample in group) / len(group), 2)
+                                        if count_round_trips else None),
+            'backend_ms_mean': average(sample[5] for sample in group),
+            'render_ms_mean': average(sample[6] for sample in group)
+        }
+
+    routes = {}
+    for route, _, _ in STEPS:
+        group = [sample for sample in samples if sample[0] == route]
+        if group:
+            routes[route] = stats(group)
+    overall = stats(samples)
+    overall['wall_seconds'] = round(wall_seconds, 3)
+    return overall, routes
+
+
+def suggest_sizing(overall, cpu_seconds, target_rps=None):
+    """gunicorn workers x threads from CPU time and backend wait per request
+
+    A worker's threads share one core (the GIL), so it needs enough of them to keep the core
+    busy while the others wait on the backend: 1 + wait/cpu. Its throughput tops out near
+    1000/cpu_ms requests per second. CPU time covers the whole benchmark process, test clients
+    included, so capacity is a lower bound.
+    """
+    requests = overall['requests']
+    cpu_ms = cpu_seconds * 1000 / requests if requests else 0.0
+    wait_ms = overall['backend_ms_mean'] or 0.0
+    if not cpu_ms:
+        return None
+    worker_rps = 1000 / cpu_ms
+    cores = os.cpu_count() or 1
+    return {
+        'cpu_ms_per_request': round(cpu_ms, 2),
+        'backend_wait_ms_per_request': round(wait_ms, 2),
+        'threads_per_worker': min(32, max(1, math.ceil(1 + wait_ms / cpu_ms))),
+        'worker_capacity_rps': round(worker_rps, 1),
+        'target_rps': target_rps,
+        'workers': max(1, math.ceil(target_rps / worker_rps)) if target_rps else cores,
+        'cores': cores
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(result):
+    print(f"\n📊 {result['run']['employees']} employees, {result['run']['concurrency']} workers, "
+          f"backend={result['run']['backend']}")
+    print(f"{'route':<12}{'reqs':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'calls':>7}{'trips':>7}"
+          f"{'backend':>9}{'render':>8}")
+    for route, stats in list(result['routes'].items()) + [('overall', result['overall'])]:
+        optional = [stats['round_trips_per_request'], stats['backend_ms_mean'], stats['render_ms_mean']]
+        trips, backend, render = ('-' if value is None else value for value in optional)
+        print(f"{route:<12}{stats['requests']:>7}{stats['errors']:>5}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+              f"{stats['p99_ms']:>9}{stats['requests_per_second']:>9}{stats['backend_calls_per_request']:>7}"
+              f"{trips:>7}{backend:>9}{render:>8}")
+    print(f"✅ {result['completed_sign_outs']}/{result['run']['employees']} sign-outs recorded "
+          f"in {result['overall']['wall_seconds']}s")
+
+
+def print_sizing(sizing):
+    if not sizing:
+        return
+    basis = (f"for {sizing['target_rps']} rps" if sizing['target_rps']
+             else f"one per core ({sizing['cores']} cores)")
+    print(f"\n⚙️  Per request: {sizing['cpu_ms_per_request']} ms CPU, {sizing['backend_wait_ms_per_request']} ms "
+          f"backend wait -> ~{sizing['worker_capacity_rps']} rps per worker")
+    print(f"   WEB_CONCURRENCY={sizing['workers']} GUNICORN_THREADS={sizing['threads_per_worker']}  ({basis})")
+
+
+def print_comparison(result, baseline):
+    """p95 latency and throughput changes against a previous run"""
+    print(f"\n🔍 Compared with {baseline['run'].get('git_commit') or 'baseline'} "
+          f"({baseline['run'].get('timestamp')})")
+    rows = list(result['routes'].items()) + [('overall', result['overall'])]
+    for route, stats in rows:
+        before = baseline['overall'] if route == 'overall' else baseline.get('routes', {}).get(route)
+        if not before:
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        print(f"{route:<12} p95 {before['p95_ms']:>9} -> {stats['p95_ms']:>9} ms ({change:+.1f}%)   "
+              f"rps {before['requests_per_second']} -> {stats['requests_per_second']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the employee sign-in/sign-out rush")
+    parser.add_argument('--employees', type=int, default=200, help="employees to seed and drive")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent employees")
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory',
+                        help="in-memory Firestore stand-in or embedded SQLite")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="injected round trip latency (memory)")
+    parser.add_argument('--jitter-ms', type=float, default=5.0, help="+/- latency jitter (memory)")
+    parser.add_argument('--sqlite-path', help="SQLite file (default: a fresh temporary file)")
+    parser.add_argument('--password-hash-method',
+                        help="werkzeug hash method for seeded passwords, e.g. pbkdf2:sha256:1000 "
+                             "to take password hashing out of the login numbers")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to save the JSON results")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--target-rps', type=float, help="peak requests/second to size gunicorn workers for")
+    parser.add_argument('--verbose', action='store_true', help="show the app's own output")
+    args = parser.parse_args()
+
+    configure_environment(args)
+
+    print("⏱️  Attendance Rush Benchmark")
+    print("=" * 50)
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    with quiet:
+        from app import app
+        from storage_backend import get_storage_backend
+        storage = get_storage_backend()
+        employee_ids = seed_employees(storage, args.employees, args.password_hash_method)
+        counter = CallCounter()
+        count_round_trips = instrument(storage, counter)
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            runs = list(executor.map(lambda employee_id: run_employee(app, counter, employee_id), employee_ids))
+        wall_seconds = time.perf_counter() - started
+        cpu_seconds = time.process_time() - cpu_started
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        completed = sum(1 for employee_id in employee_ids
+                        if (storage.get_attendance_by_employee_and_date(employee_id, today) or {}).get('sign_out_time'))
+
+    samples = [sample for run in runs for sample in run]
+    overall, routes = summarize(samples, wall_seconds, count_round_trips)
+    result = {
+        'run': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'employees': args.employees,
+            'concurrency': args.concurrency,
+            'latency_ms': args.latency_ms if args.backend == 'memory' else None,
+            'jitter_ms': args.jitter_ms if args.backend == 'memory' else None,
+            'password_hash_method': args.password_hash_method
+        },
+        'overall': overall,
+        'routes': routes,
+        'completed_sign_outs': completed,
+        'sizing': suggest_sizing(overall, cpu_seconds, args.target_rps)
+    }
+
+    print_report(result)
+    print_sizing(result['sizing'])
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(result, json.load(f))
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
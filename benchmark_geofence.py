@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the compiled geofence engine (geofence.GeofenceIndex) against the original
+per-call loop over OFFICE_LOCATIONS, on a synthetic city of circle and polygon offices
+
+Usage:
+    python benchmark_geofence.py                              # 40 circles + 20 polygons
+    python benchmark_geofence.py --circles 200 --polygons 100 --points 100000
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CITY_CENTER = (12.95, 77.60)
+CITY_SPAN_DEGREES = 0.3
+
+
+def loop_is_within(offices, user_latitude, user_longitude):
+    """The lookup as Config.is_within_office_location did it before the index: a nested haversine
+    per call and full trig against every office, extended with a plain per-call polygon test"""
+    def calculate_distance(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+        return 2 * math.asin(math.sqrt(a)) * 6371000
+
+    def point_in_polygon(vertices, lat, lon):
+        inside = False
+        for (lat1, lon1), (lat2, lon2) in zip(vertices, vertices[1:] + vertices[:1]):
+            if (lat1 <= lat < lat2 or lat2 <= lat < lat1) and lon < lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1):
+                inside = not inside
+        return inside
+
+    for office in offices:
+        if office.get('polygon'):
+            if point_in_polygon(office['polygon'], user_latitude, user_longitude):
+                return True, office['name']
+        elif calculate_distance(user_latitude, user_longitude,
+                                office['latitude'], office['longitude']) <= office['radius_meters']:
+            return True, office['name']
+    return False, None
+
+
+def random_polygon(rng, center_lat, center_lon, radius_m, sides):
+    """A star-shaped (so simple) polygon of roughly radius_m around the center"""
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(sides))
+    vertices = []
+    for angle in angles:
+        r = radius_m * rng.uniform(0.5, 1.0)
+        vertices.append([center_lat + (r * math.cos(angle)) / 111195,
+                         center_lon + (r * math.sin(angle)) / (111195 * math.cos(math.radians(center_lat)))])
+    return vertices
+
+
+def synthetic_offices(rng, circles, polygons):
+    def random_point():
+        return (CITY_CENTER[0] + rng.uniform(-1, 1) * CITY_SPAN_DEGREES / 2,
+                CITY_CENTER[1] + rng.uniform(-1, 1) * CITY_SPAN_DEGREES / 2)
+
+    offices = []
+    for i in range(circles):
+        lat, lon = random_point()
+        offices.append({'name': f'Branch {i}', 'latitude': lat, 'longitude': lon,
+                        'radius_meters': rng.choice([150, 300, 500, 1000])})
+    for i in range(polygons):
+        lat, lon = random_point()
+        offices.append({'name': f'Campus {i}', 'polygon': random_polygon(rng, lat, lon, rng.uniform(200, 800), rng.randint(4, 24))})
+    return offices
+
+
+def time_per_call(fn, points):
+    started = time.perf_counter()
+    results = [fn(lat, lon) for lat, lon in points]
+    return results, (time.perf_counter() - started) / len(points) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled geofence index against the per-office loop")
+    parser.add_argument('--circles', type=int, default=40, help="circle offices (default: 40)")
+    parser.add_argument('--polygons', type=int, default=20, help="polygon offices (default: 20)")
+    parser.add_argument('--points', type=int, default=50000, help="lookups to time (default: 50000)")
+    parser.add_argument('--seed', type=int, default=7, help="random seed (default: 7)")
+    args = parser.parse_args()
+
+    from geofence import GeofenceIndex, np
+
+    rng = random.Random(args.seed)
+    offices = synthetic_offices(rng, args.circles, args.polygons)
+    points = [(CITY_CENTER[0] + rng.uniform(-1, 1) * CITY_SPAN_DEGREES / 2,
+               CITY_CENTER[1] + rng.uniform(-1, 1) * CITY_SPAN_DEGREES / 2) for _ in range(args.points)]
+
+    print("📍 Geofence Engine Benchmark")
+    print("=" * 50)
+    print(f"{args.circles} circles, {args.polygons} polygons, {args.points} lookups")
+
+    started = time.perf_counter()
+    index = GeofenceIndex(offices)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    loop_results, loop_us = time_per_call(lambda lat, lon: loop_is_within(offices, lat, lon), points)
+    index_results, index_us = time_per_call(index.locate, points)
+    mismatches = sum(within != match.within for (within, _), match in zip(loop_results, index_results))
+
+    latitudes = [lat for lat, _ in points]
+    longitudes = [lon for _, lon in points]
+    started = time.perf_counter()
+    office_indexes, _ = index.locate_many(latitudes, longitudes)
+    batch_us = (time.perf_counter() - started) / len(points) * 1e6
+    mismatches += sum((i >= 0) != match.within for i, match in zip(office_indexes, index_results))
+
+    inside = sum(match.within for match in index_results)
+    print(f"\nCompile:            {compile_ms:8.2f} ms")
+    print(f"Per-office loop:    {loop_us:8.2f} us/lookup")
+    print(f"Compiled index:     {index_us:8.2f} us/lookup  ({loop_us / index_us:.1f}x)")
+    print(f"Batch ({'NumPy' if np is not None else 'pure Python'}):{' ' * (7 if np is not None else 1)}{batch_us:8.2f} us/point")
+    print(f"\n{inside} of {len(points)} points inside an office, {mismatches} disagreements")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
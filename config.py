@@ -1,18 +1,86 @@
 import os
 from datetime import datetime
+from geofence import GeofenceIndex
 
 class Config:
     """Configuration settings for the Attendance System"""
     
     # Flask Configuration
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-this-in-production'
-    # Always use the DB inside the instance folder to avoid CWD/path mismatches
-    _default_db_path = os.path.join(os.path.dirname(__file__), 'instance', 'attendance.db')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f"sqlite:///{_default_db_path}"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
     # Control whether to auto-seed sample admin and employees on startup
     SEED_SAMPLE_DATA = (os.environ.get('SEED_SAMPLE_DATA', 'false').lower() == 'true')
     
+    # Storage backend the models call through: 'firestore' (default) or 'sqlite' for a
+    # single-site deployment served from an embedded database file
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'firestore').lower()
+    SQLITE_DATABASE_PATH = os.environ.get('SQLITE_DATABASE_PATH') or os.path.join(
+        os.path.dirname(__file__), 'instance', 'attendance_store.db')
+    
+    # Replace the Firestore client with the in-process stand-in in memory_firestore.py, for
+    # offline load testing and profiling. Each round trip sleeps for the injected latency.
+    FIRESTORE_IN_MEMORY = (os.environ.get('FIRESTORE_IN_MEMORY', 'false').lower() == 'true')
+    FIRESTORE_IN_MEMORY_LATENCY_MS = float(os.environ.get('FIRESTORE_IN_MEMORY_LATENCY_MS', '0'))
+    FIRESTORE_IN_MEMORY_JITTER_MS = float(os.environ.get('FIRESTORE_IN_MEMORY_JITTER_MS', '0'))
+    
+    # Time every storage call and template render per request; reported in a Server-Timing
+    # response header and aggregated per route at /admin/metrics
+    REQUEST_METRICS_ENABLED = (os.environ.get('REQUEST_METRICS_ENABLED', 'true').lower() == 'true')
+    
+    # Log level (WARNING in production, INFO otherwise; DEBUG shows per-request tracing) and
+    # per-logger sampling of records below WARNING, e.g. "app.geofence=0.01,firebase_service=0.1"
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or ('WARNING' if os.environ.get('FLASK_ENV') == 'production' else 'INFO')
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+    
+    # Lookup cache for employee/admin documents read on every authenticated request. It is per
+    # worker process: writes invalidate only the writing worker's copy, so the others can serve a
+    # changed is_active or password_hash to sessions for up to LOOKUP_CACHE_TTL_SECONDS. Logins
+    # always read the stored document.
+    LOOKUP_CACHE_MAX_SIZE = int(os.environ.get('LOOKUP_CACHE_MAX_SIZE', '2048'))
+    LOOKUP_CACHE_TTL_SECONDS = float(os.environ.get('LOOKUP_CACHE_TTL_SECONDS', '5'))
+    
+    # Store attendance/timesheet records under '<employee_id>_<YYYY-MM-DD>' document IDs so
+    # per-day lookups are point reads. Run rekey_records.py before enabling on existing data.
+    COMPOSITE_RECORD_IDS = (os.environ.get('COMPOSITE_RECORD_IDS', 'false').lower() == 'true')
+    
+    # Maintain per-day counters in 'daily_summaries' on every attendance write so the admin
+    # dashboard reads one document. Missing days are rebuilt from attendance on first view.
+    # Off: the dashboard counts the day's records on every view and stores nothing.
+    DAILY_SUMMARY_ENABLED = (os.environ.get('DAILY_SUMMARY_ENABLED', 'true').lower() == 'true')
+    
+    # Maintain running per-employee aggregates in 'employee_stats' on every attendance write
+    # so the employee stats panel is one read covering the full history. Aggregates not yet
+    # rebuilt from the full history are rebuilt on first view. Off: computed on every view.
+    EMPLOYEE_STATS_ENABLED = (os.environ.get('EMPLOYEE_STATS_ENABLED', 'true').lower() == 'true')
+    
+    # Mark a month in 'monthly_rollups' on every attendance write so the payroll report reuses
+    # stored totals and recomputes only months whose attendance changed. Off: every view recomputes
+    # without storing; switching it back on marks every stored month changed at the next start.
+    MONTHLY_ROLLUPS_ENABLED = (os.environ.get('MONTHLY_ROLLUPS_ENABLED', 'true').lower() == 'true')
+    
+    # Shared threads for storage calls a view runs side by side (query_pool.fan_out and the
+    # async backend's thread fallback), and how long a view waits for them (0 = no limit)
+    QUERY_POOL_WORKERS = int(os.environ.get('QUERY_POOL_WORKERS', '16'))
+    QUERY_TIMEOUT_SECONDS = float(os.environ.get('QUERY_TIMEOUT_SECONDS', '15'))
+    
+    # Records per page on the admin attendance/timesheet listings
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', '100'))
+    
+    # Records read per page while streaming a date range (admin exports, payroll rollups);
+    # bounds their memory use
+    EXPORT_PAGE_SIZE = int(os.environ.get('EXPORT_PAGE_SIZE', '500'))
+    
+    # Field projections for list views, so they never transfer password hashes or report
+    # fields they do not display
+    EMPLOYEE_LIST_FIELDS = ['employee_id', 'name', 'email', 'department', 'is_active']
+    TIMESHEET_LIST_FIELDS = ['employee_id', 'date', 'tasks_completed', 'submitted_at']
+    
+    # Background jobs (employee deletion) are stored in the backend and renew a lease after every
+    # chunk; a job whose lease lapses (its worker was recycled or killed) is resumed by the next
+    # worker to warm up or to report its status
+    JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '60'))
+    
+    # Documents per WriteBatch commit for bulk operations (Firestore allows at most 500)
+    WRITE_BATCH_SIZE = 400
     
     # Timesheet Configuration
     TIMESHEET_ENABLED = True
@@ -97,49 +165,57 @@ class Config:
         #     'longitude': 00.0000,
         #     'radius_meters': 1000
         # }
+        # Campuses can use a polygon of [latitude, longitude] vertices instead of a radius:
+        # {
+        #     'name': '***',
+        #     'polygon': [[00.0000, 00.0000], [00.0000, 00.0010], [00.0010, 00.0010], [00.0010, 00.0000]]
+        # }
     ]
     
+    # Where office locations come from: 'config' (OFFICE_LOCATIONS above), 'file' (a JSON list
+    # at OFFICE_LOCATIONS_FILE) or 'backend' (saved through /admin/office_locations). Workers
+    # poll the source's version every OFFICE_LOCATIONS_POLL_SECONDS and swap in changes.
+    OFFICE_LOCATIONS_SOURCE = os.environ.get('OFFICE_LOCATIONS_SOURCE', 'config').lower()
+    OFFICE_LOCATIONS_FILE = os.environ.get('OFFICE_LOCATIONS_FILE') or os.path.join(
+        os.path.dirname(__file__), 'instance', 'office_locations.json')
+    OFFICE_LOCATIONS_POLL_SECONDS = float(os.environ.get('OFFICE_LOCATIONS_POLL_SECONDS', '30'))
+    
     # Legacy single location settings (for backward compatibility)
     OFFICE_LATITUDE = float(os.environ.get('OFFICE_LATITUDE', '12.92499'))
     OFFICE_LONGITUDE = float(os.environ.get('OFFICE_LONGITUDE', '77.6180062'))
     OFFICE_RADIUS_METERS = float(os.environ.get('OFFICE_RADIUS_METERS', '1000'))
     
+    _office_index = None
+    
     @staticmethod
     def is_office_hours():
         """Check if current time is within office hours"""
         now = datetime.now()
         return Config.WORKING_HOURS_START <= now.hour < Config.WORKING_HOURS_END
     
+    @staticmethod
+    def office_index():
+        """OFFICE_LOCATIONS compiled into a GeofenceIndex, built on first use"""
+        index = Config._office_index
+        if index is None or index.source is not Config.OFFICE_LOCATIONS:
+            index = GeofenceIndex(Config.OFFICE_LOCATIONS)
+            index.source = Config.OFFICE_LOCATIONS
+            Config._office_index = index
+        return index
+    
+    @staticmethod
+    def locate_office(user_latitude, user_longitude):
+        """
+        Find the nearest office whose boundary (circle or polygon) contains the user's location
+        Returns: GeofenceMatch(within, office_name, distance_m)
+        """
+        return Config.office_index().locate(user_latitude, user_longitude)
+    
     @staticmethod
     def is_within_office_location(user_latitude, user_longitude):
         """
         Check if user's location is within any of the defined office locations
         Returns: (is_within_office, office_name) - tuple of boolean and office name if found
         """
-        import math
-        
-        def calculate_distance(lat1, lon1, lat2, lon2):
-            """Calculate distance between two points using Haversine formula"""
-            # Convert latitude and longitude from degrees to radians
-            lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-            
-            # Haversine formula
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            
-            # Radius of earth in meters
-            r = 6371000
-            return c * r
-        
-        for office in Config.OFFICE_LOCATIONS:
-            distance = calculate_distance(
-                user_latitude, user_longitude,
-                office['latitude'], office['longitude']
-            )
-            
-            if distance <= office['radius_meters']:
-                return True, office['name']
-        
-        return False, None 
+        match = Config.locate_office(user_latitude, user_longitude)
+        return match.within, match.office_name
@@ -1,14 +1,27 @@
+import logging
 from flask_login import UserMixin
 from datetime import datetime
-from firebase_service import get_firebase_service
+from config import Config
+from storage_backend import (get_storage_backend, attendance_summary_counts, employee_stats_counts,
+                             monthly_rollup_is_current, SignOutResult)
+from async_backend import get_async_storage_backend
 from werkzeug.security import check_password_hash
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+def project_fields(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Restrict data to the fields a projected document was loaded with (all of it when fields is None)"""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
 
 class FirebaseEmployee(UserMixin):
     """Firebase Employee model for Flask-Login"""
     
-    def __init__(self, employee_data: Dict[str, Any]):
+    def __init__(self, employee_data: Dict[str, Any], fields: Optional[List[str]] = None):
         self.id = employee_data.get('id')  # Firestore document ID
+        self._fields = fields  # Fields loaded by a projected query, None for a full document
         self.employee_id = employee_data.get('employee_id')
         self.name = employee_data.get('name')
         self.email = employee_data.get('email')
@@ -35,10 +48,11 @@ class FirebaseEmployee(UserMixin):
         return check_password_hash(self.password_hash, password)
     
     @staticmethod
-    def find_by_employee_id(employee_id: str) -> Optional['FirebaseEmployee']:
-        """Find employee by employee_id"""
-        firebase_service = get_firebase_service()
-        employee_data = firebase_service.get_employee_by_id(employee_id)
+    def find_by_employee_id(employee_id: str, fresh: bool = False) -> Optional['FirebaseEmployee']:
+        """Find employee by employee_id; fresh=True bypasses the lookup cache (for login, which
+        checks is_active and the password hash)"""
+        storage = get_storage_backend()
+        employee_data = storage.get_employee_by_id(employee_id, use_cache=not fresh)
         if employee_data:
             return FirebaseEmployee(employee_data)
         return None
@@ -46,28 +60,36 @@ class FirebaseEmployee(UserMixin):
     @staticmethod
     def find_by_doc_id(doc_id: str) -> Optional['FirebaseEmployee']:
         """Find employee by Firestore document ID"""
-        firebase_service = get_firebase_service()
-        employee_data = firebase_service.get_employee_by_doc_id(doc_id)
+        storage = get_storage_backend()
+        employee_data = storage.get_employee_by_doc_id(doc_id)
         if employee_data:
             return FirebaseEmployee(employee_data)
         return None
     
     @staticmethod
-    def get_all() -> List['FirebaseEmployee']:
-        """Get all employees"""
-        firebase_service = get_firebase_service()
-        employees_data = firebase_service.get_all_employees()
-        return [FirebaseEmployee(emp_data) for emp_data in employees_data]
+    def get_all(select: Optional[List[str]] = None) -> List['FirebaseEmployee']:
+        """Get all employees, optionally loading only the given fields"""
+        storage = get_storage_backend()
+        employees_data = storage.get_all_employees(select)
+        return [FirebaseEmployee(emp_data, select) for emp_data in employees_data]
+    
+    @staticmethod
+    async def get_all_async(select: Optional[List[str]] = None) -> List['FirebaseEmployee']:
+        """get_all() as a coroutine, for async_backend.gather()"""
+        employees_data = await get_async_storage_backend().get_all_employees(select)
+        return [FirebaseEmployee(emp_data, select) for emp_data in employees_data]
     
     @staticmethod
-    def get_active() -> List['FirebaseEmployee']:
-        """Get all active employees"""
-        all_employees = FirebaseEmployee.get_all()
+    def get_active(select: Optional[List[str]] = None) -> List['FirebaseEmployee']:
+        """Get all active employees, optionally loading only the given fields"""
+        if select and 'is_active' not in select:
+            select = [*select, 'is_active']
+        all_employees = FirebaseEmployee.get_all(select)
         return [emp for emp in all_employees if emp._is_active]
     
     def save(self) -> bool:
         """Save employee to Firebase"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         employee_data = {
             'employee_id': self.employee_id,
             'name': self.name,
@@ -78,12 +100,12 @@ class FirebaseEmployee(UserMixin):
         }
         
         if self.id:
-            # Update existing employee
-            return firebase_service.update_employee(self.id, employee_data)
+            # Update existing employee, never blanking fields a projected query did not load
+            return storage.update_employee(self.id, project_fields(employee_data, self._fields))
         else:
             # Create new employee
             try:
-                doc_id = firebase_service.create_employee(employee_data)
+                doc_id = storage.create_employee(employee_data)
                 self.id = doc_id
                 return True
             except Exception:
@@ -93,8 +115,15 @@ class FirebaseEmployee(UserMixin):
         """Delete employee from Firebase"""
         if not self.id:
             return False
-        firebase_service = get_firebase_service()
-        return firebase_service.delete_employee(self.id)
+        storage = get_storage_backend()
+        return storage.delete_employee(self.id)
+    
+    def delete_in_background(self) -> Optional[str]:
+        """Deactivate now and delete employee with their records in a background job, returns job ID"""
+        if not self.id:
+            return None
+        storage = get_storage_backend()
+        return storage.start_delete_employee_job(self.id)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -131,8 +160,8 @@ class FirebaseAdmin(UserMixin):
     @staticmethod
     def find_by_username(username: str) -> Optional['FirebaseAdmin']:
         """Find admin by username"""
-        firebase_service = get_firebase_service()
-        admin_data = firebase_service.get_admin_by_username(username)
+        storage = get_storage_backend()
+        admin_data = storage.get_admin_by_username(username)
         if admin_data:
             return FirebaseAdmin(admin_data)
         return None
@@ -140,15 +169,15 @@ class FirebaseAdmin(UserMixin):
     @staticmethod
     def find_by_doc_id(doc_id: str) -> Optional['FirebaseAdmin']:
         """Find admin by Firestore document ID"""
-        firebase_service = get_firebase_service()
-        admin_data = firebase_service.get_admin_by_doc_id(doc_id)
+        storage = get_storage_backend()
+        admin_data = storage.get_admin_by_doc_id(doc_id)
         if admin_data:
             return FirebaseAdmin(admin_data)
         return None
     
     def save(self) -> bool:
         """Save admin to Firebase"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         admin_data = {
             'username': self.username,
             'password_hash': self.password_hash,
@@ -158,10 +187,10 @@ class FirebaseAdmin(UserMixin):
         try:
             if self.id:
                 # Update existing admin
-                return firebase_service.update_admin(self.id, admin_data)
+                return storage.update_admin(self.id, admin_data)
             else:
                 # Create new admin
-                doc_id = firebase_service.create_admin(admin_data)
+                doc_id = storage.create_admin(admin_data)
                 self.id = doc_id
                 return True
         except Exception:
@@ -170,50 +199,185 @@ class FirebaseAdmin(UserMixin):
 class FirebaseAttendance:
     """Firebase Attendance model"""
     
-    def __init__(self, attendance_data: Dict[str, Any]):
+    def __init__(self, attendance_data: Dict[str, Any], fields: Optional[List[str]] = None):
         self.id = attendance_data.get('id')  # Firestore document ID
+        self._fields = fields  # Fields loaded by a projected query, None for a full document
         self.employee_id = attendance_data.get('employee_id')
         self.date = attendance_data.get('date')  # String format: YYYY-MM-DD
         self.sign_in_time = attendance_data.get('sign_in_time')  # ISO string or datetime
         self.sign_out_time = attendance_data.get('sign_out_time')  # ISO string or datetime
         self.total_hours = attendance_data.get('total_hours')
         self.created_at = attendance_data.get('created_at')
+        self.employee = None  # FirebaseEmployee, set by attach_employees()
     
     @staticmethod
     def find_by_employee_and_date(employee_id: str, date: datetime) -> Optional['FirebaseAttendance']:
         """Find attendance record by employee and date"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         date_str = date.strftime('%Y-%m-%d')
-        attendance_data = firebase_service.get_attendance_by_employee_and_date(employee_id, date_str)
+        attendance_data = storage.get_attendance_by_employee_and_date(employee_id, date_str)
         if attendance_data:
             return FirebaseAttendance(attendance_data)
         return None
     
     @staticmethod
-    def get_by_employee(employee_id: str, limit: int = 50) -> List['FirebaseAttendance']:
-        """Get attendance records for an employee"""
-        firebase_service = get_firebase_service()
-        attendance_data_list = firebase_service.get_attendance_by_employee(employee_id, limit)
-        return [FirebaseAttendance(data) for data in attendance_data_list]
+    async def find_by_employee_and_date_async(employee_id: str, date: datetime) -> Optional['FirebaseAttendance']:
+        """find_by_employee_and_date() as a coroutine"""
+        attendance_data = await get_async_storage_backend().get_attendance_by_employee_and_date(
+            employee_id, date.strftime('%Y-%m-%d'))
+        return FirebaseAttendance(attendance_data) if attendance_data else None
     
     @staticmethod
-    def get_by_date(date: datetime) -> List['FirebaseAttendance']:
+    def get_by_employee(employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                        start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List['FirebaseAttendance']:
+        """Get an employee's newest attendance records, optionally within an inclusive date range"""
+        storage = get_storage_backend()
+        attendance_data_list = storage.get_attendance_by_employee(
+            employee_id, limit, select,
+            start_date.strftime('%Y-%m-%d') if start_date else None,
+            end_date.strftime('%Y-%m-%d') if end_date else None)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list]
+    
+    @staticmethod
+    async def get_by_employee_async(employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List['FirebaseAttendance']:
+        """get_by_employee() as a coroutine"""
+        attendance_data_list = await get_async_storage_backend().get_attendance_by_employee(
+            employee_id, limit, select,
+            start_date.strftime('%Y-%m-%d') if start_date else None,
+            end_date.strftime('%Y-%m-%d') if end_date else None)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list]
+    
+    @staticmethod
+    def get_by_date(date: datetime, limit: Optional[int] = None, select: Optional[List[str]] = None) -> List['FirebaseAttendance']:
         """Get all attendance records for a specific date"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         date_str = date.strftime('%Y-%m-%d')
-        attendance_data_list = firebase_service.get_attendance_by_date(date_str)
-        return [FirebaseAttendance(data) for data in attendance_data_list]
+        attendance_data_list = storage.get_attendance_by_date(date_str, limit, select)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list]
     
     @staticmethod
-    def get_recent(limit: int = 100) -> List['FirebaseAttendance']:
+    async def get_by_date_async(date: datetime, limit: Optional[int] = None, select: Optional[List[str]] = None,
+                                status: Optional[str] = None) -> List['FirebaseAttendance']:
+        """get_by_date() as a coroutine, optionally only records with the given attendance status"""
+        attendance_data_list = await get_async_storage_backend().get_attendance_by_date(
+            date.strftime('%Y-%m-%d'), limit, select, status)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list]
+    
+    @staticmethod
+    def get_daily_summary(date: datetime) -> Dict[str, Any]:
+        """Get attendance counters for a date, rebuilding them from the records if missing"""
+        storage = get_storage_backend()
+        date_str = date.strftime('%Y-%m-%d')
+        if not Config.DAILY_SUMMARY_ENABLED:
+            # Writes no longer increment a stored summary, so one saved now would go stale
+            summary = storage.compute_daily_summary(date_str)
+        else:
+            summary = storage.get_daily_summary(date_str)
+            if summary is None:
+                summary = storage.rebuild_daily_summary(date_str)
+        # A failed read shows an empty day rather than failing the page
+        return summary or FirebaseAttendance.empty_daily_summary(date)
+    
+    @staticmethod
+    def empty_daily_summary(date: datetime) -> Dict[str, Any]:
+        """All-zero attendance counters for a date, for pages shown without their summary"""
+        return {'date': date.strftime('%Y-%m-%d'), 'departments': {}, **attendance_summary_counts(None)}
+    
+    @staticmethod
+    def get_monthly_payroll(month: datetime) -> Dict[str, Any]:
+        """Get per-employee payroll totals for the month containing a date (days present, hours,
+        late arrivals, early departures), recomputing them only if its attendance has changed"""
+        storage = get_storage_backend()
+        month_str = month.strftime('%Y-%m')
+        if not Config.MONTHLY_ROLLUPS_ENABLED:
+            # Writes no longer mark changed months, so a rollup saved now could later pass for current
+            rollup = storage.compute_monthly_rollup(month_str)
+        else:
+            rollup = storage.get_monthly_rollup(month_str)
+            if not monthly_rollup_is_current(rollup):
+                rollup = storage.rebuild_monthly_rollup(month_str)
+        return {'month': month_str, 'employees': {}, **(rollup or {})}
+    
+    @staticmethod
+    def get_recent(limit: int = 100, start_after: Optional[str] = None, select: Optional[List[str]] = None) -> List['FirebaseAttendance']:
         """Get recent attendance records"""
-        firebase_service = get_firebase_service()
-        attendance_data_list = firebase_service.get_recent_attendance(limit)
-        return [FirebaseAttendance(data) for data in attendance_data_list]
+        storage = get_storage_backend()
+        attendance_data_list = storage.get_recent_attendance(limit, start_after, select)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list]
+    
+    @staticmethod
+    def get_recent_page(limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List['FirebaseAttendance'], Optional[str]]:
+        """Get a page of recent attendance records and the next page token"""
+        storage = get_storage_backend()
+        attendance_data_list, next_page_token = storage.get_recent_attendance_page(limit, page_token, select)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list], next_page_token
+    
+    @staticmethod
+    async def get_recent_page_async(limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None,
+                                    status: Optional[str] = None) -> Tuple[List['FirebaseAttendance'], Optional[str]]:
+        """get_recent_page() as a coroutine, optionally only records with the given attendance status"""
+        attendance_data_list, next_page_token = await get_async_storage_backend().get_recent_attendance_page(
+            limit, page_token, select, status)
+        return [FirebaseAttendance(data, select) for data in attendance_data_list], next_page_token
+    
+    @staticmethod
+    def complete_sign_out(employee_id: str, now: datetime) -> SignOutResult:
+        """Record an employee's sign-out for now's date in a single transaction"""
+        storage = get_storage_backend()
+        return storage.complete_sign_out(employee_id, now.strftime('%Y-%m-%d'), now)
+    
+    @staticmethod
+    def get_employee_stats(employee_id: str, period: str = 'all', date: Optional[datetime] = None) -> Dict[str, Any]:
+        """Get display statistics for an employee from their running aggregates
+        
+        period is 'all', 'year' or 'month'; year/month windows are the ones containing date (default today).
+        """
+        storage = get_storage_backend()
+        if not Config.EMPLOYEE_STATS_ENABLED:
+            # Writes no longer increment stored aggregates, so ones saved now would go stale
+            stats_data = storage.compute_employee_stats(employee_id)
+        else:
+            stats_data = storage.get_employee_stats(employee_id)
+            if stats_data is None:
+                stats_data = storage.rebuild_employee_stats(employee_id)
+        return FirebaseAttendance._period_stats(stats_data or {}, period, date)
+    
+    @staticmethod
+    async def get_employee_stats_async(employee_id: str, period: str = 'all', date: Optional[datetime] = None) -> Dict[str, Any]:
+        """get_employee_stats() as a coroutine"""
+        storage = get_async_storage_backend()
+        if not Config.EMPLOYEE_STATS_ENABLED:
+            stats_data = await storage.compute_employee_stats(employee_id)
+        else:
+            stats_data = await storage.get_employee_stats(employee_id)
+            if stats_data is None:
+                stats_data = await storage.rebuild_employee_stats(employee_id)
+        return FirebaseAttendance._period_stats(stats_data or {}, period, date)
+    
+    @staticmethod
+    def _period_stats(stats_data: Dict[str, Any], period: str, date: Optional[datetime]) -> Dict[str, Any]:
+        date = date or datetime.now()
+        if period == 'year':
+            counters = stats_data.get('years', {}).get(date.strftime('%Y'), {})
+        elif period == 'month':
+            counters = stats_data.get('months', {}).get(date.strftime('%Y-%m'), {})
+        else:
+            counters = stats_data.get('all', {})
+        return format_attendance_stats(counters)
+    
+    @staticmethod
+    def summarize(records: List['FirebaseAttendance']) -> Dict[str, Any]:
+        """Display statistics over an explicit list of records"""
+        counters = employee_stats_counts(None)
+        for record in records:
+            for key, value in employee_stats_counts(record.to_dict()).items():
+                counters[key] += value
+        return format_attendance_stats(counters)
     
     def save(self) -> bool:
         """Save attendance to Firebase"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         
         # Convert datetime objects to ISO strings for Firebase
         sign_in_time_str = None
@@ -240,14 +404,14 @@ class FirebaseAttendance:
         try:
             if self.id:
                 # Update existing attendance
-                return firebase_service.update_attendance(self.id, attendance_data)
+                return storage.update_attendance(self.id, project_fields(attendance_data, self._fields))
             else:
                 # Create new attendance
-                doc_id = firebase_service.create_attendance(attendance_data)
+                doc_id = storage.create_attendance(attendance_data)
                 self.id = doc_id
                 return True
         except Exception as e:
-            print(f"❌ Error saving attendance: {e}")
+            logger.error("Error saving attendance: %s", e)
             return False
     
     def get_sign_in_datetime(self) -> Optional[datetime]:
@@ -284,11 +448,33 @@ class FirebaseAttendance:
             'created_at': self.created_at
         }
 
+def format_attendance_stats(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn employee_stats counters into the values shown on the attendance stats panel"""
+    total_days = counters.get('days', 0)
+    total_hours = counters.get('total_hours', 0)
+    
+    def average_time(minutes_key: str, count_key: str, default: str) -> str:
+        count = counters.get(count_key, 0)
+        if not count:
+            return default
+        minutes = int(counters.get(minutes_key, 0) / count)
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+    
+    return {
+        'total_days': total_days,
+        'total_hours': total_hours,
+        'complete_days': counters.get('complete_days', 0),
+        'avg_hours_per_day': total_hours / total_days if total_days > 0 else 0,
+        'avg_signin_time': average_time('sign_in_minutes', 'sign_in_count', '09:00'),
+        'avg_signout_time': average_time('sign_out_minutes', 'sign_out_count', '17:00')
+    }
+
 class FirebaseTimesheet:
     """Firebase Timesheet model for daily reports"""
     
-    def __init__(self, timesheet_data: Dict[str, Any]):
+    def __init__(self, timesheet_data: Dict[str, Any], fields: Optional[List[str]] = None):
         self.id = timesheet_data.get('id')  # Firestore document ID
+        self._fields = fields  # Fields loaded by a projected query, None for a full document
         self.employee_id = timesheet_data.get('employee_id')
         self.date = timesheet_data.get('date')  # String format: YYYY-MM-DD
         self.tasks_completed = timesheet_data.get('tasks_completed', '')
@@ -299,42 +485,83 @@ class FirebaseTimesheet:
         self.submitted_at = timesheet_data.get('submitted_at')
         self.created_at = timesheet_data.get('created_at')
         self.updated_at = timesheet_data.get('updated_at')
+        self.employee = None  # FirebaseEmployee, set by attach_employees()
     
     @staticmethod
     def find_by_employee_and_date(employee_id: str, date: datetime) -> Optional['FirebaseTimesheet']:
         """Find timesheet by employee and date"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         date_str = date.strftime('%Y-%m-%d')
-        timesheet_data = firebase_service.get_timesheet_by_employee_and_date(employee_id, date_str)
+        timesheet_data = storage.get_timesheet_by_employee_and_date(employee_id, date_str)
         if timesheet_data:
             return FirebaseTimesheet(timesheet_data)
         return None
     
     @staticmethod
-    def get_by_employee(employee_id: str, limit: int = 50) -> List['FirebaseTimesheet']:
-        """Get timesheet records for an employee"""
-        firebase_service = get_firebase_service()
-        timesheet_data_list = firebase_service.get_timesheets_by_employee(employee_id, limit)
-        return [FirebaseTimesheet(data) for data in timesheet_data_list]
+    async def find_by_employee_and_date_async(employee_id: str, date: datetime) -> Optional['FirebaseTimesheet']:
+        """find_by_employee_and_date() as a coroutine"""
+        timesheet_data = await get_async_storage_backend().get_timesheet_by_employee_and_date(
+            employee_id, date.strftime('%Y-%m-%d'))
+        return FirebaseTimesheet(timesheet_data) if timesheet_data else None
+    
+    @staticmethod
+    def get_by_employee(employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                        start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List['FirebaseTimesheet']:
+        """Get an employee's newest timesheet records, optionally within an inclusive date range"""
+        storage = get_storage_backend()
+        timesheet_data_list = storage.get_timesheets_by_employee(
+            employee_id, limit, select,
+            start_date.strftime('%Y-%m-%d') if start_date else None,
+            end_date.strftime('%Y-%m-%d') if end_date else None)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list]
+    
+    @staticmethod
+    async def get_by_employee_async(employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List['FirebaseTimesheet']:
+        """get_by_employee() as a coroutine"""
+        timesheet_data_list = await get_async_storage_backend().get_timesheets_by_employee(
+            employee_id, limit, select,
+            start_date.strftime('%Y-%m-%d') if start_date else None,
+            end_date.strftime('%Y-%m-%d') if end_date else None)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list]
     
     @staticmethod
-    def get_by_date(date: datetime) -> List['FirebaseTimesheet']:
+    def get_by_date(date: datetime, select: Optional[List[str]] = None) -> List['FirebaseTimesheet']:
         """Get all timesheet records for a specific date"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         date_str = date.strftime('%Y-%m-%d')
-        timesheet_data_list = firebase_service.get_timesheets_by_date(date_str)
-        return [FirebaseTimesheet(data) for data in timesheet_data_list]
+        timesheet_data_list = storage.get_timesheets_by_date(date_str, select)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list]
     
     @staticmethod
-    def get_recent(limit: int = 100) -> List['FirebaseTimesheet']:
+    async def get_by_date_async(date: datetime, select: Optional[List[str]] = None) -> List['FirebaseTimesheet']:
+        """get_by_date() as a coroutine"""
+        timesheet_data_list = await get_async_storage_backend().get_timesheets_by_date(date.strftime('%Y-%m-%d'), select)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list]
+    
+    @staticmethod
+    def get_recent(limit: int = 100, start_after: Optional[str] = None, select: Optional[List[str]] = None) -> List['FirebaseTimesheet']:
         """Get recent timesheet records"""
-        firebase_service = get_firebase_service()
-        timesheet_data_list = firebase_service.get_recent_timesheets(limit)
-        return [FirebaseTimesheet(data) for data in timesheet_data_list]
+        storage = get_storage_backend()
+        timesheet_data_list = storage.get_recent_timesheets(limit, start_after, select)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list]
+    
+    @staticmethod
+    def get_recent_page(limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List['FirebaseTimesheet'], Optional[str]]:
+        """Get a page of recent timesheet records and the next page token"""
+        storage = get_storage_backend()
+        timesheet_data_list, next_page_token = storage.get_recent_timesheets_page(limit, page_token, select)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list], next_page_token
+    
+    @staticmethod
+    async def get_recent_page_async(limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List['FirebaseTimesheet'], Optional[str]]:
+        """get_recent_page() as a coroutine"""
+        timesheet_data_list, next_page_token = await get_async_storage_backend().get_recent_timesheets_page(limit, page_token, select)
+        return [FirebaseTimesheet(data, select) for data in timesheet_data_list], next_page_token
     
     def save(self) -> bool:
         """Save timesheet to Firebase"""
-        firebase_service = get_firebase_service()
+        storage = get_storage_backend()
         
         timesheet_data = {
             'employee_id': self.employee_id,
@@ -350,14 +577,14 @@ class FirebaseTimesheet:
         try:
             if self.id:
                 # Update existing timesheet
-                return firebase_service.update_timesheet(self.id, timesheet_data)
+                return storage.update_timesheet(self.id, project_fields(timesheet_data, self._fields))
             else:
                 # Create new timesheet
-                doc_id = firebase_service.create_timesheet(timesheet_data)
+                doc_id = storage.create_timesheet(timesheet_data)
                 self.id = doc_id
                 return True
         except Exception as e:
-            print(f"❌ Error saving timesheet: {e}")
+            logger.error("Error saving timesheet: %s", e)
             return False
     
     def to_dict(self) -> Dict[str, Any]:
@@ -376,3 +603,14 @@ class FirebaseTimesheet:
             'updated_at': self.updated_at
         }
 
+def attach_employees(records: List[Any], employees: Optional[List[FirebaseEmployee]] = None) -> List[Any]:
+    """Set record.employee on attendance/timesheet records with one dict join (O(N+M))
+    
+    Fetches all employees when none are given; records for unknown employees get None.
+    """
+    if employees is None:
+        employees = FirebaseEmployee.get_all()
+    employees_by_id = {emp.employee_id: emp for emp in employees}
+    for record in records:
+        record.employee = employees_by_id.get(record.employee_id)
+    return records
@@ -1,18 +1,118 @@
+import logging
 import firebase_admin
 from firebase_admin import credentials, firestore
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Hashable, Callable, Iterable, Tuple
+from urllib.parse import quote
+from google.api_core.exceptions import AlreadyExists
+from config import Config
+from storage_backend import (StorageBackend, SignOutStatus, SignOutResult, attendance_summary_counts,
+                             employee_stats_counts, counter_deltas, build_daily_summary, build_employee_stats,
+                             encode_page_token, decode_page_token, sign_out_hours, job_is_claimable,
+                             attendance_status, count_store_operation, complete_daily_summary)
 
-class FirebaseService:
+logger = logging.getLogger(__name__)
+
+def record_doc_id(employee_id: str, date_str: str) -> str:
+    """Deterministic document ID for a per-employee, per-day record (attendance/timesheet)"""
+    # Firestore IDs cannot contain '/', so the employee ID is percent-encoded
+    return f"{quote(str(employee_id), safe='')}_{date_str}"
+
+def increments(deltas: Dict[str, Any]) -> Dict[str, Any]:
+    """Firestore Increment transforms for a dict of deltas"""
+    return {key: firestore.Increment(delta) for key, delta in deltas.items()}
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL"""
+    
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 30.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+    
+    def set(self, key: Hashable, value: Dict[str, Any]):
+        """Store a copy of value, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable):
+        """Drop a single key"""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def invalidate_doc(self, doc_id: str):
+        """Drop every entry whose cached document has the given Firestore ID"""
+        with self._lock:
+            stale = [key for key, (_, value) in self._entries.items() if value.get('id') == doc_id]
+            for key in stale:
+                del self._entries[key]
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+class FirebaseService(StorageBackend):
     """Firebase Firestore service for attendance system"""
     
     def __init__(self):
+        super().__init__()
         self.db = None
+        # Read-through cache for employee/admin lookups made on every authenticated request
+        self.cache = TTLCache(Config.LOOKUP_CACHE_MAX_SIZE, Config.LOOKUP_CACHE_TTL_SECONDS)
         self.initialize_firebase()
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the employee/admin lookup cache"""
+        return self.cache.stats()
+    
     def initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
+        if Config.FIRESTORE_IN_MEMORY:
+            # Offline stand-in: no credentials or network needed
+            from memory_firestore import MemoryClient
+            self.db = MemoryClient(Config.FIRESTORE_IN_MEMORY_LATENCY_MS, Config.FIRESTORE_IN_MEMORY_JITTER_MS)
+            logger.info("Using in-memory Firestore (%sms injected latency)", Config.FIRESTORE_IN_MEMORY_LATENCY_MS)
+            return
+        
         try:
             # Check if Firebase is already initialized
             firebase_admin.get_app()
@@ -27,10 +127,10 @@ class FirebaseService:
                     service_account_info = json.loads(firebase_json)
                     cred = credentials.Certificate(service_account_info)
                     firebase_admin.initialize_app(cred)
-                    print("✅ Firebase initialized with environment variable")
+                    logger.info("Firebase initialized with environment variable")
                 except Exception as e:
-                    print(f"❌ Failed to initialize Firebase with environment variable: {e}")
-                    print("⚠️ Continuing without Firebase - app will use SQLite fallback")
+                    logger.error("Failed to initialize Firebase with environment variable: %s", e)
+                    logger.warning("Continuing without Firebase - app will use SQLite fallback")
                     return
             
             # Option 2: Use service account key file (for local development)
@@ -40,7 +140,7 @@ class FirebaseService:
                 # Use service account file
                 cred = credentials.Certificate(service_account_path)
                 firebase_admin.initialize_app(cred)
-                print("✅ Firebase initialized with service account")
+                logger.info("Firebase initialized with service account")
             else:
                 # Option 2: Use environment variables (for local development)
                 try:
@@ -61,39 +161,50 @@ class FirebaseService:
                     if firebase_config['private_key']:
                         cred = credentials.Certificate(firebase_config)
                         firebase_admin.initialize_app(cred)
-                        print("✅ Firebase initialized with environment variables")
+                        logger.info("Firebase initialized with environment variables")
                     else:
                         # Option 3: Use Application Default Credentials (for Google Cloud)
                         cred = credentials.ApplicationDefault()
                         firebase_admin.initialize_app(cred, {
                             'projectId': 'duty-login',
                         })
-                        print("✅ Firebase initialized with Application Default Credentials")
+                        logger.info("Firebase initialized with Application Default Credentials")
                 
                 except Exception as e:
-                    print(f"❌ Firebase initialization failed: {e}")
-                    print("Please set up Firebase credentials (see README)")
-                    print("🔧 Attempting simplified setup...")
+                    logger.error("Firebase initialization failed: %s", e)
+                    logger.warning("Please set up Firebase credentials (see README)")
+                    logger.info("Attempting simplified setup...")
                     # Try with just project ID
                     try:
                         cred = credentials.ApplicationDefault()
                         firebase_admin.initialize_app(cred, {
                             'projectId': 'duty-login',
                         })
-                        print("✅ Firebase initialized with minimal credentials")
+                        logger.info("Firebase initialized with minimal credentials")
                     except Exception as e2:
-                        print(f"❌ Simplified setup also failed: {e2}")
+                        logger.error("Simplified setup also failed: %s", e2)
                         raise
         
         # Get Firestore client only if Firebase is properly initialized
         try:
             self.db = firestore.client()
-            print(f"🔥 Connected to Firestore database: duty-login")
+            logger.info("Connected to Firestore database: duty-login")
         except Exception as e:
-            print(f"❌ Failed to connect to Firestore: {e}")
-            print("⚠️ Firebase will not be available - app will use SQLite fallback")
+            logger.error("Failed to connect to Firestore: %s", e)
+            logger.warning("Firebase will not be available - app will use SQLite fallback")
             self.db = None
     
+    def warm_up(self) -> bool:
+        """Open the gRPC channel and authenticate with one single-field document read"""
+        if not self.db:
+            return False
+        try:
+            self._office_locations_ref().get(field_paths=['version'])
+            return True
+        except Exception as e:
+            logger.error("Firestore warm-up read failed: %s", e)
+            return False
+    
     # Employee CRUD Operations
     def create_employee(self, employee_data: Dict[str, Any]) -> str:
         """Create a new employee in Firestore"""
@@ -104,50 +215,64 @@ class FirebaseService:
             employee_data['created_at'] = firestore.SERVER_TIMESTAMP
             employee_data['updated_at'] = firestore.SERVER_TIMESTAMP
             doc_ref.set(employee_data)
-            print(f"✅ Employee created with ID: {doc_ref.id}")
+            count_store_operation(writes=1)
+            self.cache.invalidate(('employee_id', employee_data.get('employee_id')))
+            logger.info("Employee created with ID: %s", doc_ref.id)
             return doc_ref.id
         except Exception as e:
-            print(f"❌ Error creating employee: {e}")
+            logger.error("Error creating employee: %s", e)
             raise
     
-    def get_employee_by_id(self, employee_id: str) -> Optional[Dict[str, Any]]:
-        """Get employee by employee_id field"""
+    def get_employee_by_id(self, employee_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Get employee by employee_id field; use_cache=False reads (and re-caches) the stored document"""
+        cache_key = ('employee_id', employee_id)
+        cached = self.cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            count_store_operation(cache_hits=1)
+            return cached
         try:
-            employees = self.db.collection('employees').where('employee_id', '==', employee_id).get()
+            employees = self._read_query(self.db.collection('employees').where('employee_id', '==', employee_id))
             for employee in employees:
                 employee_data = employee.to_dict()
                 employee_data['id'] = employee.id
+                self.cache.set(cache_key, employee_data)
                 return employee_data
             return None
         except Exception as e:
-            print(f"❌ Error getting employee: {e}")
+            logger.error("Error getting employee: %s", e)
             return None
     
     def get_employee_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get employee by Firestore document ID"""
+        cache_key = ('employee_doc', doc_id)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            count_store_operation(cache_hits=1)
+            return cached
         try:
-            doc = self.db.collection('employees').document(doc_id).get()
+            doc = self._read_doc(self.db.collection('employees').document(doc_id))
             if doc.exists:
                 employee_data = doc.to_dict()
                 employee_data['id'] = doc.id
+                self.cache.set(cache_key, employee_data)
                 return employee_data
             return None
         except Exception as e:
-            print(f"❌ Error getting employee by doc ID: {e}")
+            logger.error("Error getting employee by doc ID: %s", e)
             return None
     
-    def get_all_employees(self) -> List[Dict[str, Any]]:
-        """Get all employees"""
+    def get_all_employees(self, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all employees, optionally projected to the given fields"""
         try:
             employees = []
-            docs = self.db.collection('employees').get()
+            docs = self._read_query(self._project(self.db.collection('employees'), select))
             for doc in docs:
                 employee_data = doc.to_dict()
                 employee_data['id'] = doc.id
                 employees.append(employee_data)
             return employees
         except Exception as e:
-            print(f"❌ Error getting all employees: {e}")
+            logger.error("Error getting all employees: %s", e)
             return []
     
     def update_employee(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
@@ -155,36 +280,83 @@ class FirebaseService:
         try:
             update_data['updated_at'] = firestore.SERVER_TIMESTAMP
             self.db.collection('employees').document(doc_id).update(update_data)
-            print(f"✅ Employee {doc_id} updated successfully")
+            count_store_operation(writes=1)
+            self.cache.invalidate_doc(doc_id)
+            logger.info("Employee %s updated successfully", doc_id)
             return True
         except Exception as e:
-            print(f"❌ Error updating employee: {e}")
+            logger.error("Error updating employee: %s", e)
             return False
     
-    def delete_employee(self, doc_id: str) -> bool:
-        """Delete employee and all their attendance records"""
+    def delete_employee(self, doc_id: str, progress: Optional[Callable[[str, int], None]] = None) -> bool:
+        """Delete employee and all their attendance and timesheet records
+        
+        Records are removed in chunked WriteBatch commits; ``progress(collection, deleted)``
+        is called after each chunk.
+        """
         try:
             # Get employee data first
             employee = self.get_employee_by_doc_id(doc_id)
             if not employee:
-                print(f"❌ Employee {doc_id} not found")
+                logger.warning("Employee %s not found", doc_id)
                 return False
             
             employee_id = employee.get('employee_id')
             
-            # Delete all attendance records for this employee
-            attendance_docs = self.db.collection('attendance').where('employee_id', '==', employee_id).get()
-            for doc in attendance_docs:
-                doc.reference.delete()
+            # Delete all attendance and timesheet records for this employee
+            for collection_name in ('attendance', 'timesheets'):
+                query = self.db.collection(collection_name).where('employee_id', '==', employee_id)
+                
+                def report(count, name=collection_name):
+                    if progress:
+                        progress(name, count)
+                
+                deleted = self._delete_query_in_batches(query, report, rollups=(collection_name == 'attendance'))
+                logger.info("Deleted %s %s records for %s", deleted, collection_name, employee_id)
             
-            # Delete the employee
-            self.db.collection('employees').document(doc_id).delete()
-            print(f"✅ Employee {doc_id} and their attendance records deleted")
+            # Delete the employee last so a failed run can be retried, together with their
+            # running stats so an employee later created under the same ID starts from scratch
+            batch = self.db.batch()
+            batch.delete(self.db.collection('employees').document(doc_id))
+            batch.delete(self.db.collection('employee_stats').document(quote(str(employee_id), safe='')))
+            batch.commit()
+            count_store_operation(writes=2)
+            self.cache.invalidate_doc(doc_id)
+            logger.info("Employee %s and their records deleted", doc_id)
             return True
         except Exception as e:
-            print(f"❌ Error deleting employee: {e}")
+            logger.error("Error deleting employee: %s", e)
             return False
     
+    def _delete_query_in_batches(self, query, progress: Optional[Callable[[int], None]] = None,
+                                 rollups: bool = False) -> int:
+        """Delete every document matched by query, one WriteBatch per chunk
+        
+        With rollups (attendance), each batch also marks the daily summaries and months of the records
+        it deletes as stale, so the rollups match every committed chunk even if the run stops part way.
+        """
+        # Only document names (and dates, for the rollups) are needed to delete. Each attendance
+        # record may also cost a summary write and a month mark, within Firestore's 500 per batch.
+        fields = ['date'] if rollups else ['__name__']
+        chunk_size = Config.WRITE_BATCH_SIZE // 3 if rollups else Config.WRITE_BATCH_SIZE
+        deleted = 0
+        while True:
+            docs = self._read_query(query.select(fields).limit(chunk_size))
+            if not docs:
+                return deleted
+            batch = self.db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            writes = len(docs)
+            if rollups:
+                dates = {(doc.to_dict() or {}).get('date') for doc in docs} - {None, ''}
+                writes += self._add_removal_writes(batch, dates)
+            batch.commit()
+            count_store_operation(writes=writes)
+            deleted += len(docs)
+            if progress:
+                progress(deleted)
+    
     # Admin CRUD Operations
     def create_admin(self, admin_data: Dict[str, Any]) -> str:
         """Create a new admin in Firestore"""
@@ -193,106 +365,138 @@ class FirebaseService:
             admin_data['created_at'] = firestore.SERVER_TIMESTAMP
             admin_data['updated_at'] = firestore.SERVER_TIMESTAMP
             doc_ref.set(admin_data)
-            print(f"✅ Admin created with ID: {doc_ref.id}")
+            count_store_operation(writes=1)
+            logger.info("Admin created with ID: %s", doc_ref.id)
             return doc_ref.id
         except Exception as e:
-            print(f"❌ Error creating admin: {e}")
+            logger.error("Error creating admin: %s", e)
             raise
     
     def get_admin_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get admin by username"""
         try:
-            admins = self.db.collection('admins').where('username', '==', username).get()
+            admins = self._read_query(self.db.collection('admins').where('username', '==', username))
             for admin in admins:
                 admin_data = admin.to_dict()
                 admin_data['id'] = admin.id
                 return admin_data
             return None
         except Exception as e:
-            print(f"❌ Error getting admin: {e}")
+            logger.error("Error getting admin: %s", e)
             return None
     
     def get_admin_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get admin by Firestore document ID"""
+        cache_key = ('admin_doc', doc_id)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            count_store_operation(cache_hits=1)
+            return cached
         try:
-            doc = self.db.collection('admins').document(doc_id).get()
+            doc = self._read_doc(self.db.collection('admins').document(doc_id))
             if doc.exists:
                 admin_data = doc.to_dict()
                 admin_data['id'] = doc.id
+                self.cache.set(cache_key, admin_data)
                 return admin_data
             return None
         except Exception as e:
-            print(f"❌ Error getting admin by doc ID: {e}")
+            logger.error("Error getting admin by doc ID: %s", e)
             return None
     
+    def update_admin(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update admin data"""
+        try:
+            update_data['updated_at'] = firestore.SERVER_TIMESTAMP
+            self.db.collection('admins').document(doc_id).update(update_data)
+            count_store_operation(writes=1)
+            self.cache.invalidate_doc(doc_id)
+            logger.info("Admin %s updated successfully", doc_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating admin: %s", e)
+            return False
+    
     # Attendance CRUD Operations
     def create_attendance(self, attendance_data: Dict[str, Any]) -> str:
-        """Create attendance record"""
+        """Create attendance record and count it in the daily/employee rollups in one atomic batch"""
         try:
-            doc_ref = self.db.collection('attendance').document()
             attendance_data['created_at'] = firestore.SERVER_TIMESTAMP
-            doc_ref.set(attendance_data)
-            print(f"✅ Attendance record created with ID: {doc_ref.id}")
+            attendance_data['status'] = attendance_status(attendance_data)
+            if Config.COMPOSITE_RECORD_IDS:
+                doc_ref = self.db.collection('attendance').document(
+                    record_doc_id(attendance_data['employee_id'], attendance_data['date']))
+            else:
+                doc_ref = self.db.collection('attendance').document()
+            
+            batch = self.db.batch()
+            if Config.COMPOSITE_RECORD_IDS:
+                batch.create(doc_ref, attendance_data)
+            else:
+                batch.set(doc_ref, attendance_data)
+            writes = 1 + self._add_rollup_writes(batch, None, attendance_data)
+            try:
+                batch.commit()
+                count_store_operation(writes=writes)
+            except AlreadyExists:
+                # Same-day double submit: the first sign-in wins
+                logger.info("Attendance record %s already exists", doc_ref.id)
+                return doc_ref.id
+            logger.info("Attendance record created with ID: %s", doc_ref.id)
             return doc_ref.id
         except Exception as e:
-            print(f"❌ Error creating attendance: {e}")
+            logger.error("Error creating attendance: %s", e)
             raise
     
     def get_attendance_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
         """Get attendance record for specific employee and date"""
         try:
-            attendance_docs = (self.db.collection('attendance')
-                             .where('employee_id', '==', employee_id)
-                             .where('date', '==', date_str)
-                             .get())
-            
-            for doc in attendance_docs:
+            doc = self._get_daily_record_snapshot('attendance', employee_id, date_str)
+            if doc:
                 attendance_data = doc.to_dict()
                 attendance_data['id'] = doc.id
                 return attendance_data
             return None
         except Exception as e:
-            print(f"❌ Error getting attendance: {e}")
+            logger.error("Error getting attendance: %s", e)
             return None
     
-    def get_attendance_by_employee(self, employee_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get attendance records for an employee"""
+    def get_attendance_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get an employee's newest attendance records, optionally within [start_date, end_date]
+        
+        Ordered server-side by date descending (composite index in firestore.indexes.json).
+        """
         try:
-            print(f"DEBUG: Querying attendance for employee_id: {employee_id}")
+            logger.debug("Querying attendance for employee_id: %s", employee_id)
             attendance_records = []
             
-            # Try without ordering first to see if records exist
-            docs = (self.db.collection('attendance')
-                   .where('employee_id', '==', employee_id)
-                   .limit(limit)
-                   .get())
-            
-            print(f"DEBUG: Found {len(docs)} documents (without ordering)")
+            query = self._employee_date_range_query('attendance', employee_id, start_date, end_date)
+            docs = self._read_query(self._project(query, select, 'date').limit(limit))
             
             for doc in docs:
                 attendance_data = doc.to_dict()
                 attendance_data['id'] = doc.id
                 attendance_records.append(attendance_data)
-                print(f"DEBUG: Document data: {attendance_data}")
             
-            # Sort by date in Python if we have records
-            if attendance_records:
-                attendance_records.sort(key=lambda x: x.get('date', ''), reverse=True)
-                print(f"DEBUG: Sorted records by date")
-            
-            print(f"DEBUG: Returning {len(attendance_records)} attendance records")
+            logger.debug("Returning %s attendance records", len(attendance_records))
             return attendance_records
         except Exception as e:
-            print(f"❌ Error getting employee attendance: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting employee attendance: %s", e)
             return []
     
-    def get_attendance_by_date(self, date_str: str) -> List[Dict[str, Any]]:
-        """Get all attendance records for a specific date"""
+    def get_attendance_by_date(self, date_str: str, limit: Optional[int] = None, select: Optional[List[str]] = None,
+                               status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all attendance records for a specific date (at most limit when given), optionally projected
+        and restricted to one attendance status"""
         try:
             attendance_records = []
-            docs = self.db.collection('attendance').where('date', '==', date_str).get()
+            query = self._project(self.db.collection('attendance').where('date', '==', date_str), select)
+            if status:
+                query = query.where('status', '==', status)
+            if limit:
+                query = query.limit(limit)
+            docs = self._read_query(query)
             
             for doc in docs:
                 attendance_data = doc.to_dict()
@@ -301,104 +505,447 @@ class FirebaseService:
             
             return attendance_records
         except Exception as e:
-            print(f"❌ Error getting attendance by date: {e}")
+            logger.error("Error getting attendance by date: %s", e)
             return []
     
-    def get_recent_attendance(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent attendance records"""
+    def get_recent_attendance_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None,
+                                   status: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of recent attendance records (optionally of one attendance status, using the
+        (status, date, __name__) index) and the token for the next page (None on the last page)"""
         try:
-            attendance_records = []
-            docs = (self.db.collection('attendance')
-                   .order_by('date', direction=firestore.Query.DESCENDING)
-                   .limit(limit)
-                   .get())
+            return self._get_recent_page('attendance', limit, page_token, select, status)
+        except Exception as e:
+            logger.error("Error getting recent attendance: %s", e)
+            return [], None
+    
+    def get_attendance_range_page(self, start_date: str, end_date: str, limit: int = 500, page_token: Optional[str] = None,
+                                  select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of attendance records within [start_date, end_date], oldest first (raises on failure)"""
+        return self._get_range_page('attendance', start_date, end_date, limit, page_token, select)
+    
+    def update_attendance(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update attendance record and adjust the daily/employee rollups in one transaction"""
+        try:
+            doc_ref = self.db.collection('attendance').document(doc_id)
             
-            for doc in docs:
-                attendance_data = doc.to_dict()
-                attendance_data['id'] = doc.id
-                attendance_records.append(attendance_data)
+            @self._transactional
+            def write(transaction):
+                before = self._read_doc(doc_ref, transaction=transaction).to_dict() or {}
+                after = dict(before, **update_data)
+                transaction.update(doc_ref, dict(update_data, status=attendance_status(after)))
+                count_store_operation(writes=1 + self._add_rollup_writes(transaction, before, after))
             
-            return attendance_records
+            write(self.db.transaction())
+            logger.info("Attendance %s updated successfully", doc_id)
+            return True
         except Exception as e:
-            print(f"❌ Error getting recent attendance: {e}")
-            return []
+            logger.error("Error updating attendance: %s", e)
+            return False
     
-    def update_attendance(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
-        """Update attendance record"""
+    def complete_sign_out(self, employee_id: str, date_str: str, now: datetime) -> SignOutResult:
+        """Validate and record an employee's sign-out in one transaction
+        
+        Reads the day's attendance (and timesheet, when REQUIRE_TIMESHEET_FOR_SIGNOUT) and writes
+        sign_out_time/total_hours plus rollups atomically, so concurrent submits cannot both succeed.
+        """
+        @self._transactional
+        def run(transaction) -> SignOutResult:
+            attendance_doc = self._get_daily_record_snapshot('attendance', employee_id, date_str, transaction)
+            before = attendance_doc.to_dict() if attendance_doc else {}
+            if not before.get('sign_in_time'):
+                return SignOutResult(SignOutStatus.NOT_SIGNED_IN)
+            if before.get('sign_out_time'):
+                return SignOutResult(SignOutStatus.ALREADY_SIGNED_OUT)
+            if (Config.REQUIRE_TIMESHEET_FOR_SIGNOUT and
+                    not self._get_daily_record_snapshot('timesheets', employee_id, date_str, transaction)):
+                return SignOutResult(SignOutStatus.TIMESHEET_REQUIRED)
+            
+            total_hours = sign_out_hours(before['sign_in_time'], now)
+            if total_hours is None:
+                return SignOutResult(SignOutStatus.INVALID_SIGN_IN)
+            
+            update_data = {'sign_out_time': now.isoformat(), 'total_hours': total_hours, 'status': 'completed'}
+            transaction.update(attendance_doc.reference, update_data)
+            count_store_operation(writes=1 + self._add_rollup_writes(transaction, before, dict(before, **update_data)))
+            return SignOutResult(SignOutStatus.SIGNED_OUT, total_hours)
+        
         try:
-            self.db.collection('attendance').document(doc_id).update(update_data)
-            print(f"✅ Attendance {doc_id} updated successfully")
+            result = run(self.db.transaction())
+            logger.info("Sign-out for %s on %s: %s", employee_id, date_str, result.status.value)
+            return result
+        except Exception as e:
+            logger.error("Error completing sign-out: %s", e)
+            return SignOutResult(SignOutStatus.ERROR)
+    
+    # Daily summary Operations
+    def get_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get the materialized attendance counters for a date
+        
+        A summary that counter increments started before it was ever rebuilt may be missing the
+        day's earlier records, so only one marked 'initialized' by rebuild_daily_summary counts.
+        """
+        try:
+            doc = self._read_doc(self.db.collection('daily_summaries').document(date_str))
+            summary_data = doc.to_dict() if doc.exists else None
+            if summary_data and summary_data.get('initialized'):
+                summary_data['id'] = doc.id
+                return complete_daily_summary(summary_data)
+            return None
+        except Exception as e:
+            logger.error("Error getting daily summary: %s", e)
+            return None
+    
+    def rebuild_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Recompute a date's summary from its attendance records and overwrite the stored document
+        
+        The summary and the records are read in the same transaction as the overwrite, so a counter
+        increment committed in between makes it retry instead of being lost.
+        """
+        summary_ref = self.db.collection('daily_summaries').document(date_str)
+        query = self.db.collection('attendance').where('date', '==', date_str)
+        
+        @self._transactional
+        def rebuild(transaction):
+            self._read_doc(summary_ref, transaction=transaction)
+            records = [doc.to_dict() for doc in self._read_query(query, transaction=transaction)]
+            summary_data = build_daily_summary(date_str, records, self._employee_department)
+            summary_data['initialized'] = True
+            transaction.set(summary_ref, dict(summary_data, updated_at=firestore.SERVER_TIMESTAMP))
+            count_store_operation(writes=1)
+            return summary_data
+        
+        try:
+            summary_data = rebuild(self.db.transaction())
+            logger.info("Daily summary for %s rebuilt", date_str)
+            summary_data['id'] = date_str
+            return summary_data
+        except Exception as e:
+            logger.error("Error rebuilding daily summary: %s", e)
+            return None
+    
+    def _add_rollup_writes(self, writer, before: Optional[Dict[str, Any]], after: Dict[str, Any]) -> int:
+        """Queue increments moving a record's contribution to its rollups from before to after,
+        returns the number of writes queued
+        
+        writer is a WriteBatch or Transaction, so the rollups commit atomically with the record.
+        """
+        if not after.get('date'):
+            return 0
+        writes = 0
+        if Config.DAILY_SUMMARY_ENABLED:
+            deltas = counter_deltas(attendance_summary_counts(before), attendance_summary_counts(after))
+            if deltas:
+                department = self._employee_department(after.get('employee_id'))
+                summary_update = increments(deltas)
+                summary_update['departments'] = {department: increments(deltas)}
+                summary_update['date'] = after['date']
+                summary_update['updated_at'] = firestore.SERVER_TIMESTAMP
+                summary_ref = self.db.collection('daily_summaries').document(after['date'])
+                writer.set(summary_ref, summary_update, merge=True)
+                writes += 1
+        
+        if Config.EMPLOYEE_STATS_ENABLED and after.get('employee_id'):
+            deltas = counter_deltas(employee_stats_counts(before), employee_stats_counts(after))
+            if deltas:
+                date_str = after['date']
+                stats_update = {
+                    'employee_id': after['employee_id'],
+                    'all': increments(deltas),
+                    'years': {date_str[:4]: increments(deltas)},
+                    'months': {date_str[:7]: increments(deltas)},
+                    'updated_at': firestore.SERVER_TIMESTAMP
+                }
+                stats_ref = self.db.collection('employee_stats').document(quote(str(after['employee_id']), safe=''))
+                writer.set(stats_ref, stats_update, merge=True)
+                writes += 1
+        
+        if Config.MONTHLY_ROLLUPS_ENABLED:
+            # A record moved to another date also changes the month it left
+            months = {after['date'][:7], ((before or {}).get('date') or after['date'])[:7]}
+            writes += self._add_month_changed_writes(writer, months)
+        return writes
+    
+    def _add_removal_writes(self, writer, dates: Iterable[str]) -> int:
+        """Queue writes marking the daily summaries and months of deleted attendance as stale, returns
+        the number of writes queued
+        
+        A summary loses 'initialized', so its next view rebuilds it from the remaining records
+        (dropping departments left empty) instead of trusting the counters.
+        """
+        dates = set(dates)
+        writes = 0
+        if Config.DAILY_SUMMARY_ENABLED:
+            for date_str in dates:
+                writer.set(self.db.collection('daily_summaries').document(date_str),
+                           {'initialized': False, 'updated_at': firestore.SERVER_TIMESTAMP}, merge=True)
+                writes += 1
+        if Config.MONTHLY_ROLLUPS_ENABLED:
+            writes += self._add_month_changed_writes(writer, {date_str[:7] for date_str in dates})
+        return writes
+    
+    def _add_month_changed_writes(self, writer, months: Iterable[str]) -> int:
+        """Queue source version bumps marking months whose payroll rollups must be recomputed,
+        returns the number of writes queued"""
+        months = set(months)
+        for month in months:
+            writer.set(self.db.collection('monthly_rollups').document(month),
+                       {'month': month, 'source_version': firestore.Increment(1)}, merge=True)
+        return len(months)
+    
+    # Employee statistics Operations
+    def get_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Get the running attendance aggregates for an employee (all time, per year, per month)
+        
+        Aggregates the increments started (e.g. on the first write after they were introduced) only
+        cover later records, so only a document marked 'initialized' by rebuild_employee_stats counts.
+        """
+        try:
+            doc = self._read_doc(self.db.collection('employee_stats').document(quote(str(employee_id), safe='')))
+            stats_data = doc.to_dict() if doc.exists else None
+            if stats_data and stats_data.get('initialized'):
+                stats_data['id'] = doc.id
+                return stats_data
+            return None
+        except Exception as e:
+            logger.error("Error getting employee stats: %s", e)
+            return None
+    
+    def rebuild_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Recompute an employee's aggregates from their full attendance history and store them
+        
+        History and stored aggregates are read in the same transaction as the overwrite, so an
+        increment committed in between makes it retry instead of being lost.
+        """
+        stats_ref = self.db.collection('employee_stats').document(quote(str(employee_id), safe=''))
+        query = self.db.collection('attendance').where('employee_id', '==', employee_id)
+        
+        @self._transactional
+        def rebuild(transaction):
+            self._read_doc(stats_ref, transaction=transaction)
+            docs = self._read_query(query, transaction=transaction)
+            stats_data = build_employee_stats(employee_id, (doc.to_dict() for doc in docs))
+            stats_data['initialized'] = True
+            transaction.set(stats_ref, dict(stats_data, updated_at=firestore.SERVER_TIMESTAMP))
+            count_store_operation(writes=1)
+            return stats_data
+        
+        try:
+            stats_data = rebuild(self.db.transaction())
+            logger.info("Employee stats for %s rebuilt", employee_id)
+            return stats_data
+        except Exception as e:
+            logger.error("Error rebuilding employee stats: %s", e)
+            return None
+    
+    def compute_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """An employee's aggregates computed from their full attendance history, without storing them"""
+        try:
+            docs = self._read_query(self.db.collection('attendance').where('employee_id', '==', employee_id)
+                                    .select(['date', 'sign_in_time', 'sign_out_time', 'total_hours']))
+            return build_employee_stats(employee_id, (doc.to_dict() for doc in docs))
+        except Exception as e:
+            logger.error("Error computing employee stats: %s", e)
+            return None
+    
+    # Monthly rollup Operations
+    def get_monthly_rollup(self, month: str) -> Optional[Dict[str, Any]]:
+        """Get a month's stored payroll rollup with its source and computed versions"""
+        try:
+            doc = self._read_doc(self.db.collection('monthly_rollups').document(month))
+            if doc.exists:
+                rollup_data = doc.to_dict()
+                rollup_data['id'] = doc.id
+                return rollup_data
+            return None
+        except Exception as e:
+            logger.error("Error getting monthly rollup: %s", e)
+            return None
+    
+    def save_monthly_rollup(self, month: str, rollup_data: Dict[str, Any], computed_version: int) -> bool:
+        """Overwrite a month's rollup in a transaction that carries its current source version over"""
+        doc_ref = self.db.collection('monthly_rollups').document(month)
+        
+        @self._transactional
+        def save(transaction):
+            snapshot = self._read_doc(doc_ref, transaction=transaction)
+            source_version = (snapshot.to_dict() or {}).get('source_version', 0) if snapshot.exists else 0
+            transaction.set(doc_ref, dict(rollup_data, source_version=source_version,
+                                          computed_version=computed_version, updated_at=firestore.SERVER_TIMESTAMP))
+            count_store_operation(writes=1)
+        
+        try:
+            save(self.db.transaction())
+            return True
+        except Exception as e:
+            logger.error("Error saving monthly rollup: %s", e)
+            return False
+    
+    def reconcile_monthly_rollups(self) -> int:
+        """Record in settings/monthly_rollups whether writes mark changed months; when marking is on
+        but was last recorded off (or never recorded), first bump every stored month's source version
+        
+        Rollups stored before marking went off would otherwise still look current, although
+        attendance written in between never marked their months.
+        """
+        settings_ref = self.db.collection('settings').document('monthly_rollups')
+        marking = Config.MONTHLY_ROLLUPS_ENABLED
+        snapshot = self._read_doc(settings_ref)
+        recorded = (snapshot.to_dict() or {}).get('marking') if snapshot.exists else None
+        if recorded == marking:
+            return 0
+        
+        months = []
+        if marking:
+            months = [doc.id for doc in self._read_query(self.db.collection('monthly_rollups').select(['__name__']))]
+            for start in range(0, len(months), Config.WRITE_BATCH_SIZE):
+                batch = self.db.batch()
+                writes = self._add_month_changed_writes(batch, months[start:start + Config.WRITE_BATCH_SIZE])
+                batch.commit()
+                count_store_operation(writes=writes)
+        # Recorded last, so a run that stops part way is repeated on the next start
+        settings_ref.set({'marking': marking, 'updated_at': firestore.SERVER_TIMESTAMP})
+        count_store_operation(writes=1)
+        return len(months)
+    
+    # Background job Operations
+    def create_job(self, job: Dict[str, Any]) -> bool:
+        """Store a new background job in 'jobs' under its ID"""
+        try:
+            self.db.collection('jobs').document(job['id']).set(dict(job, updated_at=firestore.SERVER_TIMESTAMP))
+            count_store_operation(writes=1)
             return True
         except Exception as e:
-            print(f"❌ Error updating attendance: {e}")
+            logger.error("Error creating job: %s", e)
             return False
     
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a background job's stored state and progress"""
+        try:
+            doc = self._read_doc(self.db.collection('jobs').document(job_id))
+            if doc.exists:
+                job = doc.to_dict()
+                job['id'] = doc.id
+                return job
+            return None
+        except Exception as e:
+            logger.error("Error getting job: %s", e)
+            return None
+    
+    def update_job(self, job_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update a background job's status, progress or lease"""
+        try:
+            self.db.collection('jobs').document(job_id).update(dict(update_data, updated_at=firestore.SERVER_TIMESTAMP))
+            count_store_operation(writes=1)
+            return True
+        except Exception as e:
+            logger.error("Error updating job: %s", e)
+            return False
+    
+    def get_running_jobs(self) -> List[Dict[str, Any]]:
+        """Get every background job that has not finished"""
+        try:
+            jobs = []
+            for doc in self._read_query(self.db.collection('jobs').where('status', '==', 'running')):
+                job = doc.to_dict()
+                job['id'] = doc.id
+                jobs.append(job)
+            return jobs
+        except Exception as e:
+            logger.error("Error getting running jobs: %s", e)
+            return []
+    
+    def claim_job(self, job_id: str, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Take a job's lease in a transaction, so only one worker can resume it"""
+        doc_ref = self.db.collection('jobs').document(job_id)
+        
+        @self._transactional
+        def claim(transaction):
+            snapshot = self._read_doc(doc_ref, transaction=transaction)
+            job = snapshot.to_dict() if snapshot.exists else None
+            now = time.time()
+            if not job_is_claimable(job, owner, now):
+                return None
+            lease = {'owner': owner, 'lease_expires_at': now + lease_seconds, 'attempts': (job.get('attempts') or 0) + 1}
+            transaction.update(doc_ref, dict(lease, updated_at=firestore.SERVER_TIMESTAMP))
+            count_store_operation(writes=1)
+            return dict(job, id=job_id, **lease)
+        
+        try:
+            return claim(self.db.transaction())
+        except Exception as e:
+            logger.error("Error claiming job: %s", e)
+            return None
+    
     # Timesheet CRUD Operations
     def create_timesheet(self, timesheet_data: Dict[str, Any]) -> str:
         """Create timesheet record"""
         try:
-            doc_ref = self.db.collection('timesheets').document()
             timesheet_data['created_at'] = firestore.SERVER_TIMESTAMP
             timesheet_data['updated_at'] = firestore.SERVER_TIMESTAMP
-            doc_ref.set(timesheet_data)
-            print(f"✅ Timesheet record created with ID: {doc_ref.id}")
+            if Config.COMPOSITE_RECORD_IDS:
+                doc_ref = self.db.collection('timesheets').document(
+                    record_doc_id(timesheet_data['employee_id'], timesheet_data['date']))
+                try:
+                    doc_ref.create(timesheet_data)
+                except AlreadyExists:
+                    # Same-day double submit: keep the original created_at, take the latest report
+                    update_data = {k: v for k, v in timesheet_data.items() if k != 'created_at'}
+                    doc_ref.update(update_data)
+                    count_store_operation(writes=1)
+                    logger.info("Timesheet record %s updated", doc_ref.id)
+                    return doc_ref.id
+            else:
+                doc_ref = self.db.collection('timesheets').document()
+                doc_ref.set(timesheet_data)
+            count_store_operation(writes=1)
+            logger.info("Timesheet record created with ID: %s", doc_ref.id)
             return doc_ref.id
         except Exception as e:
-            print(f"❌ Error creating timesheet: {e}")
+            logger.error("Error creating timesheet: %s", e)
             raise
     
     def get_timesheet_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
         """Get timesheet record for specific employee and date"""
         try:
-            timesheet_docs = (self.db.collection('timesheets')
-                            .where('employee_id', '==', employee_id)
-                            .where('date', '==', date_str)
-                            .get())
-            
-            for doc in timesheet_docs:
+            doc = self._get_daily_record_snapshot('timesheets', employee_id, date_str)
+            if doc:
                 timesheet_data = doc.to_dict()
                 timesheet_data['id'] = doc.id
                 return timesheet_data
             return None
         except Exception as e:
-            print(f"❌ Error getting timesheet: {e}")
+            logger.error("Error getting timesheet: %s", e)
             return None
     
-    def get_timesheets_by_employee(self, employee_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get timesheet records for an employee"""
+    def get_timesheets_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get an employee's newest timesheet records, optionally within [start_date, end_date]
+        
+        Ordered server-side by date descending (composite index in firestore.indexes.json).
+        """
         try:
-            print(f"DEBUG: Querying timesheets for employee_id: {employee_id}")
+            logger.debug("Querying timesheets for employee_id: %s", employee_id)
             timesheet_records = []
             
-            docs = (self.db.collection('timesheets')
-                   .where('employee_id', '==', employee_id)
-                   .limit(limit)
-                   .get())
-            
-            print(f"DEBUG: Found {len(docs)} timesheet documents")
+            query = self._employee_date_range_query('timesheets', employee_id, start_date, end_date)
+            docs = self._read_query(self._project(query, select, 'date').limit(limit))
             
             for doc in docs:
                 timesheet_data = doc.to_dict()
                 timesheet_data['id'] = doc.id
                 timesheet_records.append(timesheet_data)
             
-            # Sort by date in Python
-            if timesheet_records:
-                timesheet_records.sort(key=lambda x: x.get('date', ''), reverse=True)
-            
-            print(f"DEBUG: Returning {len(timesheet_records)} timesheet records")
+            logger.debug("Returning %s timesheet records", len(timesheet_records))
             return timesheet_records
         except Exception as e:
-            print(f"❌ Error getting employee timesheets: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting employee timesheets: %s", e)
             return []
     
-    def get_timesheets_by_date(self, date_str: str) -> List[Dict[str, Any]]:
-        """Get all timesheet records for a specific date"""
+    def get_timesheets_by_date(self, date_str: str, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all timesheet records for a specific date, optionally projected to the given fields"""
         try:
             timesheet_records = []
-            docs = self.db.collection('timesheets').where('date', '==', date_str).get()
+            docs = self._read_query(self._project(self.db.collection('timesheets').where('date', '==', date_str), select))
             
             for doc in docs:
                 timesheet_data = doc.to_dict()
@@ -407,39 +954,192 @@ class FirebaseService:
             
             return timesheet_records
         except Exception as e:
-            print(f"❌ Error getting timesheets by date: {e}")
+            logger.error("Error getting timesheets by date: %s", e)
             return []
     
-    def get_recent_timesheets(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent timesheet records"""
+    def get_recent_timesheets_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of recent timesheet records and the token for the next page (None on the last page)"""
         try:
-            timesheet_records = []
-            docs = (self.db.collection('timesheets')
-                   .order_by('date', direction=firestore.Query.DESCENDING)
-                   .limit(limit)
-                   .get())
-            
-            for doc in docs:
-                timesheet_data = doc.to_dict()
-                timesheet_data['id'] = doc.id
-                timesheet_records.append(timesheet_data)
-            
-            return timesheet_records
+            return self._get_recent_page('timesheets', limit, page_token, select)
         except Exception as e:
-            print(f"❌ Error getting recent timesheets: {e}")
-            return []
+            logger.error("Error getting recent timesheets: %s", e)
+            return [], None
+    
+    def get_timesheets_range_page(self, start_date: str, end_date: str, limit: int = 500, page_token: Optional[str] = None,
+                                  select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of timesheet records within [start_date, end_date], oldest first (raises on failure)"""
+        return self._get_range_page('timesheets', start_date, end_date, limit, page_token, select)
     
     def update_timesheet(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
         """Update timesheet record"""
         try:
             update_data['updated_at'] = firestore.SERVER_TIMESTAMP
             self.db.collection('timesheets').document(doc_id).update(update_data)
-            print(f"✅ Timesheet {doc_id} updated successfully")
+            count_store_operation(writes=1)
+            logger.info("Timesheet %s updated successfully", doc_id)
             return True
         except Exception as e:
-            print(f"❌ Error updating timesheet: {e}")
+            logger.error("Error updating timesheet: %s", e)
             return False
 
+    # Office location Operations
+    def _office_locations_ref(self):
+        return self.db.collection('settings').document('office_locations')
+    
+    def get_office_locations(self) -> Optional[Dict[str, Any]]:
+        """Saved office locations with their version, or None when never saved"""
+        try:
+            doc = self._read_doc(self._office_locations_ref())
+            if not doc.exists:
+                return None
+            data = doc.to_dict()
+            return {'version': data.get('version', 0), 'offices': data.get('offices', [])}
+        except Exception as e:
+            logger.error("Error getting office locations: %s", e)
+            return None
+    
+    def get_office_locations_version(self) -> Optional[int]:
+        """Version of the saved office locations; a projected read that skips the office list"""
+        try:
+            doc = self._read_doc(self._office_locations_ref(), field_paths=['version'])
+            return doc.get('version') if doc.exists else None
+        except Exception as e:
+            logger.error("Error getting office locations version: %s", e)
+            return None
+    
+    def set_office_locations(self, offices: List[Dict[str, Any]]) -> Optional[int]:
+        """Replace the saved office locations in a transaction that bumps the version"""
+        doc_ref = self._office_locations_ref()
+        
+        @self._transactional
+        def replace(transaction):
+            snapshot = self._read_doc(doc_ref, transaction=transaction)
+            version = ((snapshot.to_dict() or {}).get('version') or 0) + 1 if snapshot.exists else 1
+            transaction.set(doc_ref, {'version': version, 'offices': offices,
+                                      'updated_at': firestore.SERVER_TIMESTAMP})
+            count_store_operation(writes=1)
+            return version
+        
+        try:
+            version = replace(self.db.transaction())
+            logger.info("Office locations saved as version %s", version)
+            return version
+        except Exception as e:
+            logger.error("Error saving office locations: %s", e)
+            return None
+    
+    # Query helpers
+    def _transactional(self, to_wrap):
+        """firestore.transactional for the real client; the in-memory stand-in supplies its own"""
+        return getattr(self.db, 'transactional', firestore.transactional)(to_wrap)
+    
+    def _get_daily_record_snapshot(self, collection_name: str, employee_id: str, date_str: str, transaction=None):
+        """Snapshot of an employee's attendance/timesheet document for a date, or None
+        
+        A point read under COMPOSITE_RECORD_IDS, otherwise a two-field query; both can run in a transaction.
+        """
+        if Config.COMPOSITE_RECORD_IDS:
+            doc = self._read_doc(self.db.collection(collection_name).document(record_doc_id(employee_id, date_str)),
+                                 transaction=transaction)
+            return doc if doc.exists else None
+        
+        docs = self._read_query(self.db.collection(collection_name)
+                                .where('employee_id', '==', employee_id)
+                                .where('date', '==', date_str)
+                                .limit(1), transaction=transaction)
+        for doc in docs:
+            return doc
+        return None
+    
+    @staticmethod
+    def _read_doc(doc_ref, **kwargs):
+        """Get one document snapshot, counting the read for request metrics"""
+        doc = doc_ref.get(**kwargs)
+        count_store_operation(reads=1, documents=1 if doc.exists else 0)
+        return doc
+    
+    @staticmethod
+    def _read_query(query, **kwargs) -> list:
+        """Run a query, counting the read and the documents it returned for request metrics"""
+        docs = list(query.get(**kwargs))
+        count_store_operation(reads=1, documents=len(docs))
+        return docs
+    
+    @staticmethod
+    def _project(query, select: Optional[List[str]], *required: str):
+        """Apply a field projection to query; required fields (e.g. sort keys) are always kept"""
+        if not select:
+            return query
+        return query.select(list(dict.fromkeys([*select, *required])))
+    
+    def _employee_date_range_query(self, collection_name: str, employee_id: str,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """One employee's records newest first, bounded by inclusive YYYY-MM-DD dates"""
+        query = self.db.collection(collection_name).where('employee_id', '==', employee_id)
+        if start_date:
+            query = query.where('date', '>=', start_date)
+        if end_date:
+            query = query.where('date', '<=', end_date)
+        return query.order_by('date', direction=firestore.Query.DESCENDING)
+    
+    def _get_recent_page(self, collection_name: str, limit: int, page_token: Optional[str],
+                         select: Optional[List[str]] = None, status: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first page of a date-keyed collection using a (date, document ID) cursor"""
+        docs = self._read_query(self._recent_page_query(collection_name, limit, page_token, select, status))
+        return self._page_result(docs, limit)
+    
+    def _recent_page_query(self, collection_name: str, limit: int, page_token: Optional[str],
+                           select: Optional[List[str]] = None, status: Optional[str] = None):
+        query = self._project(self.db.collection(collection_name), select, 'date')
+        if status:
+            query = query.where('status', '==', status)
+        # Document ID breaks ties between the many records sharing a date
+        query = (query
+                 .order_by('date', direction=firestore.Query.DESCENDING)
+                 .order_by('__name__', direction=firestore.Query.DESCENDING))
+        
+        if page_token:
+            try:
+                date_str, doc_id = decode_page_token(page_token)
+                query = query.start_after({
+                    'date': date_str,
+                    '__name__': self.db.collection(collection_name).document(doc_id)
+                })
+            except ValueError as e:
+                logger.warning("%s - returning first page", e)
+        
+        # Fetch one extra document to learn whether another page exists
+        return query.limit(limit + 1)
+    
+    def _get_range_page(self, collection_name: str, start_date: str, end_date: str, limit: int,
+                        page_token: Optional[str], select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Oldest-first page of a date-keyed collection within inclusive dates, using a (date, document ID) cursor"""
+        query = self._project(self.db.collection(collection_name)
+                              .where('date', '>=', start_date)
+                              .where('date', '<=', end_date), select, 'date')
+        query = query.order_by('date').order_by('__name__')
+        if page_token:
+            # A bad token fails the export instead of silently restarting it
+            date_str, doc_id = decode_page_token(page_token)
+            query = query.start_after({
+                'date': date_str,
+                '__name__': self.db.collection(collection_name).document(doc_id)
+            })
+        return self._page_result(self._read_query(query.limit(limit + 1)), limit)
+    
+    @staticmethod
+    def _page_result(docs, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        records = []
+        for doc in docs[:limit]:
+            record_data = doc.to_dict()
+            record_data['id'] = doc.id
+            records.append(record_data)
+        
+        next_page_token = None
+        if len(docs) > limit and records:
+            next_page_token = encode_page_token(records[-1].get('date', ''), records[-1]['id'])
+        return records, next_page_token
+
 # Global Firebase service instance
 firebase_service = None
 
@@ -0,0 +1,272 @@
+import math
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # batch lookups fall back to the per-point index
+    np = None
+
+EARTH_RADIUS_M = 6371000.0
+
+# Grid cell size for the office bucket index; an office is registered in every cell its
+# bounding box overlaps, so a lookup inspects one cell's handful of candidates
+GRID_CELL_DEGREES = 0.05
+
+# Point x office haversine terms computed per NumPy block in locate_many, bounding memory
+BATCH_BLOCK_CELLS = 1 << 20
+
+def haversine_distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two points given in degrees"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+class GeofenceMatch(NamedTuple):
+    """Result of a geofence lookup; office_name/distance_m are None when nothing was measured"""
+    within: bool
+    office_name: Optional[str]
+    distance_m: Optional[float]
+
+class CompiledOffice:
+    """An office boundary with everything a lookup needs precomputed. Distances are measured
+    to the office's reference point: a circle's center or a polygon's centroid."""
+    
+    __slots__ = ('name', 'latitude', 'longitude', 'lat_rad', 'lon_rad', 'cos_lat',
+                 'min_lat', 'max_lat', 'min_lon', 'max_lon')
+    
+    def __init__(self, name: str, latitude: float, longitude: float):
+        self.name = name
+        self.latitude = float(latitude)
+        self.longitude = float(longitude)
+        self.lat_rad = math.radians(self.latitude)
+        self.lon_rad = math.radians(self.longitude)
+        self.cos_lat = math.cos(self.lat_rad)
+    
+    def in_bounds(self, latitude: float, longitude: float) -> bool:
+        return self.min_lat <= latitude <= self.max_lat and self.min_lon <= longitude <= self.max_lon
+    
+    def haversine(self, lat_rad: float, lon_rad: float, cos_lat: float) -> float:
+        """Haversine term to the reference point for a point already converted to radians"""
+        return (math.sin((lat_rad - self.lat_rad) / 2) ** 2
+                + cos_lat * self.cos_lat * math.sin((lon_rad - self.lon_rad) / 2) ** 2)
+    
+    def contains(self, latitude: float, longitude: float, a: float) -> bool:
+        """Whether the point (in degrees, with its haversine term a) is inside the boundary"""
+        raise NotImplementedError
+
+class CompiledCircle(CompiledOffice):
+    """An office circle: center plus radius_meters"""
+    
+    __slots__ = ('radius_meters', 'max_haversine')
+    
+    def __init__(self, office: Dict[str, Any]):
+        super().__init__(office['name'], office['latitude'], office['longitude'])
+        self.radius_meters = float(office['radius_meters'])
+        
+        # Haversine term at the boundary: distance <= radius exactly when a <= max_haversine,
+        # so membership needs no asin/sqrt
+        angular_radius = min(self.radius_meters / EARTH_RADIUS_M, math.pi)
+        self.max_haversine = math.sin(angular_radius / 2) ** 2
+        
+        # Exact bounding box of the circle on the sphere
+        lat_span = math.degrees(angular_radius)
+        self.min_lat = self.latitude - lat_span
+        self.max_lat = self.latitude + lat_span
+        sin_lon_span = math.sin(angular_radius) / self.cos_lat if self.cos_lat > 0 else 2.0
+        if self.min_lat <= -90 or self.max_lat >= 90 or sin_lon_span >= 1:
+            self.min_lon, self.max_lon = -180.0, 180.0
+        else:
+            lon_span = math.degrees(math.asin(sin_lon_span))
+            self.min_lon = self.longitude - lon_span
+            self.max_lon = self.longitude + lon_span
+    
+    def contains(self, latitude: float, longitude: float, a: float) -> bool:
+        return a <= self.max_haversine
+
+class CompiledPolygon(CompiledOffice):
+    """An office polygon given as [latitude, longitude] vertices, tested by ray casting against a
+    precompiled edge table. Vertices are treated as planar lat/lon, which is exact enough for
+    campus-sized boundaries away from the poles and the antimeridian."""
+    
+    __slots__ = ('vertices', 'edges')
+    
+    def __init__(self, office: Dict[str, Any]):
+        vertices = [(float(lat), float(lon)) for lat, lon in office['polygon']]
+        if len(vertices) > 1 and vertices[0] == vertices[-1]:
+            vertices.pop()  # closed rings repeat the first vertex
+        if len(vertices) < 3:
+            raise ValueError(f"Office {office.get('name')!r} polygon needs at least 3 vertices")
+        centroid_lat = sum(lat for lat, _ in vertices) / len(vertices)
+        centroid_lon = sum(lon for _, lon in vertices) / len(vertices)
+        super().__init__(office['name'], office.get('latitude', centroid_lat), office.get('longitude', centroid_lon))
+        self.vertices = vertices
+        self.min_lat = min(lat for lat, _ in vertices)
+        self.max_lat = max(lat for lat, _ in vertices)
+        self.min_lon = min(lon for _, lon in vertices)
+        self.max_lon = max(lon for _, lon in vertices)
+        
+        # Edge table: (low_lat, high_lat, lon at low_lat, lon change per degree of latitude).
+        # Edges along a parallel can never cross the test ray and are dropped.
+        self.edges = []
+        for (lat1, lon1), (lat2, lon2) in zip(vertices, vertices[1:] + vertices[:1]):
+            if lat1 == lat2:
+                continue
+            if lat1 > lat2:
+                lat1, lon1, lat2, lon2 = lat2, lon2, lat1, lon1
+            self.edges.append((lat1, lat2, lon1, (lon2 - lon1) / (lat2 - lat1)))
+        self.edges = tuple(self.edges)
+    
+    def contains(self, latitude: float, longitude: float, a: float = 0.0) -> bool:
+        inside = False
+        for low_lat, high_lat, low_lon, slope in self.edges:
+            if low_lat <= latitude < high_lat and longitude < low_lon + (latitude - low_lat) * slope:
+                inside = not inside
+        return inside
+
+def _polygon_contains_many(polygon: CompiledPolygon, latitudes, longitudes):
+    """Vectorized ray cast of NumPy point arrays against one polygon's edge table"""
+    inside = np.zeros(len(latitudes), dtype=bool)
+    candidates = ((latitudes >= polygon.min_lat) & (latitudes <= polygon.max_lat)
+                  & (longitudes >= polygon.min_lon) & (longitudes <= polygon.max_lon))
+    if not candidates.any():
+        return inside
+    lat, lon = latitudes[candidates], longitudes[candidates]
+    crossings = np.zeros(len(lat), dtype=bool)
+    for low_lat, high_lat, low_lon, slope in polygon.edges:
+        crossings ^= (low_lat <= lat) & (lat < high_lat) & (lon < low_lon + (lat - low_lat) * slope)
+    inside[candidates] = crossings
+    return inside
+
+def compile_office(office: Dict[str, Any]) -> CompiledOffice:
+    """Compile one OFFICE_LOCATIONS entry: a 'polygon' of vertices, or a circle with radius_meters"""
+    if office.get('polygon'):
+        return CompiledPolygon(office)
+    return CompiledCircle(office)
+
+def _haversine_to_meters(a: float) -> float:
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return math.floor(latitude / GRID_CELL_DEGREES), math.floor(longitude / GRID_CELL_DEGREES)
+
+class GeofenceIndex:
+    """Office boundaries compiled once into a grid of bounding boxes. A lookup is one dict probe,
+    a box test per candidate in that cell and an exact test only for boxes that hit."""
+    
+    def __init__(self, offices: List[Dict[str, Any]]):
+        self.offices = [compile_office(office) for office in offices]
+        self._grid = defaultdict(list)
+        self._global = []  # offices too large to bucket (polar/huge radius)
+        for office in self.offices:
+            if office.max_lon - office.min_lon >= 360:
+                self._global.append(office)
+                continue
+            min_row, min_col = _cell(office.min_lat, office.min_lon)
+            max_row, max_col = _cell(office.max_lat, office.max_lon)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self._grid[(row, col)].append(office)
+        self._grid = dict(self._grid)
+    
+    def _containing(self, latitude: float, longitude: float) -> Tuple[Optional[CompiledOffice], float]:
+        """Nearest office whose boundary contains the point and its haversine term, or (None, inf)"""
+        candidates = self._grid.get(_cell(latitude, longitude), ())
+        if self._global:
+            candidates = list(candidates) + self._global
+        best = None
+        best_a = math.inf
+        lat_rad = lon_rad = cos_lat = None
+        for office in candidates:
+            if not office.in_bounds(latitude, longitude):
+                continue
+            if lat_rad is None:
+                lat_rad, lon_rad = math.radians(latitude), math.radians(longitude)
+                cos_lat = math.cos(lat_rad)
+            a = office.haversine(lat_rad, lon_rad, cos_lat)
+            if a < best_a and office.contains(latitude, longitude, a):
+                best, best_a = office, a
+        return best, best_a
+    
+    def _closest(self, latitude: float, longitude: float) -> Tuple[CompiledOffice, float]:
+        """Nearest office overall and its haversine term, measuring every office"""
+        lat_rad, lon_rad = math.radians(latitude), math.radians(longitude)
+        cos_lat = math.cos(lat_rad)
+        return min(((office, office.haversine(lat_rad, lon_rad, cos_lat)) for office in self.offices),
+                   key=lambda pair: pair[1])
+    
+    def locate(self, latitude: float, longitude: float) -> GeofenceMatch:
+        """The nearest office whose boundary contains the point, with its distance"""
+        office, a = self._containing(latitude, longitude)
+        if office is None:
+            return GeofenceMatch(False, None, None)
+        return GeofenceMatch(True, office.name, _haversine_to_meters(a))
+    
+    def nearest(self, latitude: float, longitude: float) -> GeofenceMatch:
+        """The containing office when there is one, otherwise the nearest office overall with its
+        distance; measures every office on a miss, so meant for diagnostics"""
+        match = self.locate(latitude, longitude)
+        if match.within or not self.offices:
+            return match
+        office, a = self._closest(latitude, longitude)
+        return GeofenceMatch(False, office.name, _haversine_to_meters(a))
+    
+    def locate_many(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> Tuple[List[int], List[float]]:
+        """
+        Batch lookup for audits and replays, vectorized with NumPy when it is installed
+        Returns: (office_indexes, distances_m) - per point, the index into self.offices of the
+        nearest containing office (-1 when none) and the distance to it, or to the nearest
+        office when there is no match (NaN when there are no offices)
+        """
+        if len(latitudes) != len(longitudes):
+            raise ValueError("latitudes and longitudes must have the same length")
+        if np is None or not self.offices:
+            return self._locate_many_python(latitudes, longitudes)
+        
+        office_lat = np.array([office.lat_rad for office in self.offices])
+        office_lon = np.array([office.lon_rad for office in self.offices])
+        office_cos = np.array([office.cos_lat for office in self.offices])
+        office_max = np.array([getattr(office, 'max_haversine', -1.0) for office in self.offices])
+        polygons = [(j, office) for j, office in enumerate(self.offices) if isinstance(office, CompiledPolygon)]
+        lat_deg = np.asarray(latitudes, dtype=float)
+        lon_deg = np.asarray(longitudes, dtype=float)
+        lat = np.radians(lat_deg)
+        lon = np.radians(lon_deg)
+        
+        indexes = np.empty(len(lat), dtype=int)
+        haversines = np.empty(len(lat))
+        block = max(1, BATCH_BLOCK_CELLS // len(self.offices))
+        for start in range(0, len(lat), block):
+            block_lat = lat[start:start + block, None]
+            block_lon = lon[start:start + block, None]
+            a = (np.sin((block_lat - office_lat) / 2) ** 2
+                 + np.cos(block_lat) * office_cos * np.sin((block_lon - office_lon) / 2) ** 2)
+            contained = a <= office_max
+            for j, polygon in polygons:
+                contained[:, j] = _polygon_contains_many(polygon, lat_deg[start:start + block], lon_deg[start:start + block])
+            inside = np.where(contained, a, np.inf)
+            matched = inside.argmin(axis=1)
+            rows = np.arange(len(a))
+            hit = np.isfinite(inside[rows, matched])
+            nearest = a.argmin(axis=1)
+            indexes[start:start + block] = np.where(hit, matched, -1)
+            haversines[start:start + block] = np.where(hit, a[rows, matched], a[rows, nearest])
+        
+        distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(haversines, 1.0)))
+        return indexes.tolist(), distances.tolist()
+    
+    def _locate_many_python(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> Tuple[List[int], List[float]]:
+        if not self.offices:
+            return [-1] * len(latitudes), [math.nan] * len(latitudes)
+        positions = {id(office): i for i, office in enumerate(self.offices)}
+        indexes, distances = [], []
+        for latitude, longitude in zip(latitudes, longitudes):
+            latitude, longitude = float(latitude), float(longitude)
+            office, a = self._containing(latitude, longitude)
+            if office is None:
+                _, a = self._closest(latitude, longitude)
+            indexes.append(positions[id(office)] if office is not None else -1)
+            distances.append(_haversine_to_meters(a))
+        return indexes, distances
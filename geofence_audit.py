@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Re-validate exported sign-in coordinates against the current office list (Config.OFFICE_LOCATIONS)
+
+Reads a CSV file or a JSON list of records with latitude/longitude columns and writes them back
+out with the matched office and distance appended. Vectorized with NumPy when it is installed.
+
+Usage:
+    python geofence_audit.py signins.csv                        # summary only
+    python geofence_audit.py signins.json --output audit.csv    # annotated rows
+    python geofence_audit.py signins.csv --outside-only --output outside.csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+AUDIT_COLUMNS = ['within_office', 'matched_office', 'distance_m']
+
+
+def load_records(path):
+    """Rows of a CSV export, or the records of a JSON export (a list, or {'records': [...]})"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+            return data.get('records', []) if isinstance(data, dict) else data
+        return list(csv.DictReader(f))
+
+
+def parse_coordinates(records, lat_column, lon_column):
+    """Split records into those with usable coordinates (and their lat/lon lists) and the rest"""
+    usable, latitudes, longitudes, skipped = [], [], [], []
+    for record in records:
+        try:
+            latitude = float(record.get(lat_column))
+            longitude = float(record.get(lon_column))
+        except (TypeError, ValueError):
+            skipped.append(record)
+            continue
+        if math.isnan(latitude) or math.isnan(longitude):
+            skipped.append(record)
+            continue
+        usable.append(record)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+    return usable, latitudes, longitudes, skipped
+
+
+def write_records(path, records):
+    fieldnames = []
+    for record in records:
+        fieldnames.extend(key for key in record if key not in fieldnames)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames or AUDIT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-validate exported sign-in coordinates against the office geofences")
+    parser.add_argument('input', help="CSV or JSON export with one sign-in per record")
+    parser.add_argument('--lat-column', default='latitude', help="latitude column (default: latitude)")
+    parser.add_argument('--lon-column', default='longitude', help="longitude column (default: longitude)")
+    parser.add_argument('--output', help="write the annotated records to this CSV file")
+    parser.add_argument('--outside-only', action='store_true', help="only write records outside every office")
+    args = parser.parse_args()
+
+    print("📍 Geofence Audit")
+    print("=" * 50)
+
+    from config import Config
+    from geofence import np
+
+    records = load_records(args.input)
+    usable, latitudes, longitudes, skipped = parse_coordinates(records, args.lat_column, args.lon_column)
+    print(f"📋 {len(records)} records, {len(usable)} with coordinates, {len(skipped)} skipped")
+
+    index = Config.office_index()
+    started = time.perf_counter()
+    office_indexes, distances = index.locate_many(latitudes, longitudes)
+    elapsed = time.perf_counter() - started
+    engine = "NumPy" if np is not None else "pure Python"
+    print(f"⏱️  Checked against {len(index.offices)} offices in {elapsed:.3f}s ({engine})")
+
+    per_office = {office.name: 0 for office in index.offices}
+    outside = 0
+    for record, office_index, distance in zip(usable, office_indexes, distances):
+        within = office_index >= 0
+        record['within_office'] = within
+        record['matched_office'] = index.offices[office_index].name if within else ''
+        record['distance_m'] = round(distance, 2) if not math.isnan(distance) else ''
+        if within:
+            per_office[record['matched_office']] += 1
+        else:
+            outside += 1
+
+    for name, count in per_office.items():
+        print(f"  ✅ {name}: {count}")
+    print(f"  ❌ Outside every office: {outside}")
+
+    if args.output:
+        rows = [record for record in usable if not record['within_office']] if args.outside_only else usable
+        write_records(args.output, rows)
+        print(f"\n💾 Wrote {len(rows)} records to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Production server settings: gunicorn -c gunicorn.conf.py app:app
+
+Pre-fork workers, each running a pool of threads (gthread). The app is imported once in the
+master (preload_app) and shared copy-on-write, but the storage backend is created per worker
+after the fork: gRPC channels and SQLite connections must not cross fork(). Sign-in traffic
+mostly waits on the backend, so a few workers with several threads each beats many
+single-threaded workers; see "Production Server" in README_Firebase.md for sizing from
+benchmark.py results.
+
+Graceful restarts: `kill -HUP <master>` replaces the workers after they finish in-flight
+requests. With preload_app, new code needs a new master (`kill -USR2`, then `-WINCH` and
+`-QUIT` the old one) or GUNICORN_PRELOAD=false.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# WEB_CONCURRENCY is the conventional worker count variable on Heroku/Render-style hosts
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot build up; jitter avoids all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-' if os.environ.get('GUNICORN_ACCESS_LOG', 'false').lower() == 'true' else None
+
+
+def when_ready(server):
+    server.log.info("Serving with %s workers x %s threads", workers, threads)
+
+
+def post_fork(server, worker):
+    """Connect this worker's storage backend in the background; only the first worker seeds
+    the default admin, so concurrent workers cannot create it twice"""
+    from app import create_sample_data
+    from storage_backend import start_storage_warm_up
+    start_storage_warm_up(on_ready=create_sample_data if worker.age == 1 else None)
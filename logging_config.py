@@ -0,0 +1,69 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Dict
+from config import Config
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+_listener = None
+
+class SamplingFilter(logging.Filter):
+    """Pass only a fraction of a logger's records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'app.geofence=0.01,firebase_service=0.1' -> {'app.geofence': 0.01, 'firebase_service': 0.1}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            print(f"⚠️ Ignoring invalid LOG_SAMPLE_RATES entry: {item!r}", file=sys.stderr)
+    return rates
+
+def _start_listener():
+    """Fresh queue, listener thread and root QueueHandler"""
+    global _listener
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+def _restart_after_fork():
+    # A forked worker (e.g. gunicorn with preload_app) inherits the QueueHandler but not the
+    # listener thread, so nothing would ever drain the queue
+    if _listener is not None:
+        _start_listener()
+
+def configure_logging():
+    """Route all logging through a queue drained by a background thread, so request threads
+    never block on stream I/O; level and per-logger sampling come from Config. Idempotent."""
+    if _listener is not None:
+        return
+
+    _start_listener()
+    atexit.register(lambda: _listener.stop())
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+    logging.getLogger().setLevel(Config.LOG_LEVEL.upper())
+
+    for name, rate in parse_sample_rates(Config.LOG_SAMPLE_RATES).items():
+        logging.getLogger(name).addFilter(SamplingFilter(rate))
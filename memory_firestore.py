@@ -0,0 +1,464 @@
+"""
+In-process stand-in for the Firestore client, for offline load testing and profiling
+
+Implements the subset of the google-cloud-firestore API that firebase_service.py and
+rekey_records.py use: collection/document references, where/order_by/select/limit/
+start_after queries, WriteBatch (set with merge, create, update, delete), transactions,
+Increment and SERVER_TIMESTAMP. Every round trip (document read, query, single write,
+batch/transaction commit) sleeps for an injected latency so timings resemble a real backend.
+MemoryClient.async_client() reads the same documents through the AsyncClient query API.
+"""
+
+import asyncio
+import copy
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterator, Tuple
+from google.api_core.exceptions import Aborted, AlreadyExists, NotFound
+from google.cloud.firestore_v1.transforms import Increment, Sentinel
+
+_OPERATORS = {
+    '==': lambda value, operand: value == operand,
+    '!=': lambda value, operand: value != operand,
+    '<': lambda value, operand: value < operand,
+    '<=': lambda value, operand: value <= operand,
+    '>': lambda value, operand: value > operand,
+    '>=': lambda value, operand: value >= operand,
+    'in': lambda value, operand: value in operand,
+    'not-in': lambda value, operand: value not in operand,
+    'array_contains': lambda value, operand: isinstance(value, list) and operand in value
+}
+
+_MISSING = object()
+MAX_TRANSACTION_ATTEMPTS = 5  # same default as firestore.transactional
+
+def _order_key(value: Any) -> Tuple[int, Any]:
+    """Sort key ranking values by type first, as Firestore orders mixed-type fields"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    return (5, str(value))
+
+def _matches(value: Any, op_string: str, operand: Any) -> bool:
+    """Whether a stored value passes a where() filter; mismatched types never match"""
+    if value is _MISSING:
+        return False
+    try:
+        return _OPERATORS[op_string](value, operand)
+    except TypeError:
+        return False
+
+def _resolve(value: Any, current: Any) -> Any:
+    """Apply a field transform (Increment, SERVER_TIMESTAMP) against the stored value"""
+    if isinstance(value, Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, Sentinel):
+        return datetime.now(timezone.utc)
+    return copy.deepcopy(value)
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any]):
+    """Deep-merge data into target the way set(..., merge=True) merges nested maps"""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            _merge(target[key], value)
+        else:
+            target[key] = _resolve(value, target.get(key))
+
+def _field(data: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted field path, _MISSING when absent"""
+    for part in path.split('.'):
+        if not isinstance(data, dict) or part not in data:
+            return _MISSING
+        data = data[part]
+    return data
+
+def _set_field(data: Dict[str, Any], path: str, value: Any):
+    """Set a dotted field path, creating intermediate maps"""
+    *parents, leaf = path.split('.')
+    for part in parents:
+        if not isinstance(data.get(part), dict):
+            data[part] = {}
+        data = data[part]
+    data[leaf] = _resolve(value, data.get(leaf))
+
+class MemorySnapshot:
+    """Point-in-time copy of a document, like DocumentSnapshot"""
+    
+    def __init__(self, reference: 'MemoryDocumentReference', data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+    
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+    
+    def get(self, field_path: str) -> Any:
+        value = _field(self._data or {}, field_path)
+        return None if value is _MISSING else copy.deepcopy(value)
+
+class MemoryDocumentReference:
+    """Reference to one document, like DocumentReference"""
+    
+    def __init__(self, client: 'MemoryClient', collection_name: str, doc_id: str):
+        self._client = client
+        self._collection_name = collection_name
+        self.id = doc_id
+    
+    @property
+    def path(self) -> str:
+        return f"{self._collection_name}/{self.id}"
+    
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+    
+    def __hash__(self):
+        return hash(self.path)
+    
+    def get(self, field_paths: Optional[List[str]] = None,
+            transaction: Optional['MemoryTransaction'] = None) -> MemorySnapshot:
+        self._client._round_trip()
+        return self._read(field_paths, transaction)
+    
+    def _read(self, field_paths: Optional[List[str]], transaction: Optional['MemoryTransaction']) -> MemorySnapshot:
+        with self._client._lock:
+            data = self._client._collection(self._collection_name).get(self.id)
+            if transaction is not None:
+                transaction._record_read(self.path)
+            if data is not None and field_paths is not None:
+                data = {path: _field(data, path) for path in field_paths if _field(data, path) is not _MISSING}
+            return MemorySnapshot(self, copy.deepcopy(data))
+    
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        batch = self._client.batch()
+        batch.set(self, data, merge=merge)
+        batch.commit()
+    
+    def create(self, data: Dict[str, Any]):
+        batch = self._client.batch()
+        batch.create(self, data)
+        batch.commit()
+    
+    def update(self, data: Dict[str, Any]):
+        batch = self._client.batch()
+        batch.update(self, data)
+        batch.commit()
+    
+    def delete(self):
+        batch = self._client.batch()
+        batch.delete(self)
+        batch.commit()
+
+class MemoryQuery:
+    """Immutable query over one collection, like Query; each method returns a new query"""
+    
+    def __init__(self, client: 'MemoryClient', collection_name: str):
+        self._client = client
+        self._collection_name = collection_name
+        self._filters = []  # (field, op, operand)
+        self._orders = []  # (field, descending)
+        self._projection = None
+        self._limit = None
+        self._start_after = None
+    
+    def _copy(self, **changes) -> 'MemoryQuery':
+        query = copy.copy(self)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        query.__dict__.update(changes)
+        return query
+    
+    def where(self, field_path: str, op_string: str, value: Any) -> 'MemoryQuery':
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op_string!r}")
+        query = self._copy()
+        query._filters.append((field_path, op_string, value))
+        return query
+    
+    def order_by(self, field_path: str, direction: str = 'ASCENDING') -> 'MemoryQuery':
+        query = self._copy()
+        query._orders.append((field_path, direction == 'DESCENDING'))
+        return query
+    
+    def select(self, field_paths: List[str]) -> 'MemoryQuery':
+        return self._copy(_projection=list(field_paths))
+    
+    def limit(self, count: int) -> 'MemoryQuery':
+        return self._copy(_limit=count)
+    
+    def start_after(self, document_fields: Dict[str, Any]) -> 'MemoryQuery':
+        return self._copy(_start_after=document_fields)
+    
+    def _sort_value(self, doc_id: str, data: Dict[str, Any], field_path: str) -> Any:
+        if field_path == '__name__':
+            return doc_id
+        return _field(data, field_path)
+    
+    def _cursor_value(self, field_path: str) -> Any:
+        value = self._start_after.get(field_path)
+        return value.id if isinstance(value, MemoryDocumentReference) else value
+    
+    def _run(self, transaction: Optional['MemoryTransaction'] = None) -> List[MemorySnapshot]:
+        with self._client._lock:
+            documents = self._client._collection(self._collection_name)
+            matches = []
+            for doc_id, data in documents.items():
+                if all(_matches(_field(data, field), op, operand) for field, op, operand in self._filters):
+                    matches.append((doc_id, data))
+            
+            # Like Firestore, ordering on a field excludes documents that lack it
+            orders = self._orders or [('__name__', False)]
+            matches = [(doc_id, data) for doc_id, data in matches
+                       if all(self._sort_value(doc_id, data, field) is not _MISSING for field, _ in orders)]
+            for field, descending in reversed(orders):
+                matches.sort(key=lambda item: _order_key(self._sort_value(item[0], item[1], field)), reverse=descending)
+            
+            if self._start_after is not None:
+                cursor = tuple(_order_key(self._cursor_value(field)) for field, _ in orders)
+                
+                def after_cursor(item: Tuple[str, Dict[str, Any]]) -> bool:
+                    for (field, descending), bound in zip(orders, cursor):
+                        value = _order_key(self._sort_value(item[0], item[1], field))
+                        if value != bound:
+                            return value < bound if descending else value > bound
+                    return False
+                
+                matches = [item for item in matches if after_cursor(item)]
+            
+            if self._limit is not None:
+                matches = matches[:self._limit]
+            
+            snapshots = []
+            for doc_id, data in matches:
+                if self._projection is not None:
+                    data = {path: _field(data, path) for path in self._projection
+                            if path != '__name__' and _field(data, path) is not _MISSING}
+                reference = MemoryDocumentReference(self._client, self._collection_name, doc_id)
+                if transaction is not None:
+                    transaction._record_read(reference.path)
+                snapshots.append(MemorySnapshot(reference, copy.deepcopy(data)))
+            return snapshots
+    
+    def get(self, transaction: Optional['MemoryTransaction'] = None) -> List[MemorySnapshot]:
+        self._client._round_trip()
+        return self._run(transaction)
+    
+    def stream(self, transaction: Optional['MemoryTransaction'] = None) -> Iterator[MemorySnapshot]:
+        self._client._round_trip()
+        return iter(self._run(transaction))
+
+class MemoryCollectionReference(MemoryQuery):
+    """A collection, like CollectionReference"""
+    
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self._client, self._collection_name, document_id or uuid.uuid4().hex[:20])
+    
+    def add(self, document_data: Dict[str, Any]) -> Tuple[datetime, MemoryDocumentReference]:
+        reference = self.document()
+        reference.create(document_data)
+        return datetime.now(timezone.utc), reference
+
+class MemoryWriteBatch:
+    """Writes applied atomically on commit(), like WriteBatch"""
+    
+    def __init__(self, client: 'MemoryClient'):
+        self._client = client
+        self._writes = []  # (kind, reference, data, merge)
+    
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._writes.append(('set', reference, document_data, merge))
+    
+    def create(self, reference: MemoryDocumentReference, document_data: Dict[str, Any]):
+        self._writes.append(('create', reference, document_data, False))
+    
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any]):
+        self._writes.append(('update', reference, field_updates, False))
+    
+    def delete(self, reference: MemoryDocumentReference):
+        self._writes.append(('delete', reference, None, False))
+    
+    def commit(self) -> list:
+        self._client._round_trip()
+        with self._client._lock:
+            self._apply()
+        return []
+    
+    def _apply(self):
+        """Validate every write first so a failing batch changes nothing"""
+        store = self._client._store
+        pending = {}  # path -> document data after the writes so far (None when deleted)
+        for kind, reference, data, merge in self._writes:
+            current = pending.get(reference.path, _MISSING)
+            if current is _MISSING:
+                current = self._client._collection(reference._collection_name).get(reference.id)
+            if kind == 'create' and current is not None:
+                raise AlreadyExists(f"Document already exists: {reference.path}")
+            if kind == 'update' and current is None:
+                raise NotFound(f"No document to update: {reference.path}")
+            
+            if kind == 'delete':
+                updated = None
+            elif kind == 'update':
+                updated = copy.deepcopy(current)
+                for path, value in data.items():
+                    _set_field(updated, path, value)
+            else:
+                updated = copy.deepcopy(current) if merge and current is not None else {}
+                _merge(updated, data)
+            pending[reference.path] = updated
+        
+        for path, data in pending.items():
+            self._client._versions[path] = self._client._versions.get(path, 0) + 1
+            collection_name, doc_id = path.rsplit('/', 1)
+            documents = store.setdefault(collection_name, {})
+            if data is None:
+                documents.pop(doc_id, None)
+            else:
+                documents[doc_id] = data
+
+class MemoryTransaction(MemoryWriteBatch):
+    """Optimistic transaction: commit fails with Aborted if any document it read has changed since
+
+    Documents matched by a query are tracked, documents a query would newly match are not.
+    """
+    
+    def __init__(self, client: 'MemoryClient'):
+        super().__init__(client)
+        self._reads = {}  # path -> version when first read
+    
+    def _record_read(self, path: str):
+        """Called with the client lock held"""
+        self._reads.setdefault(path, self._client._versions.get(path, 0))
+    
+    def _reset(self):
+        self._writes = []
+        self._reads = {}
+    
+    def commit(self) -> list:
+        self._client._round_trip()
+        with self._client._lock:
+            for path, version in self._reads.items():
+                if self._client._versions.get(path, 0) != version:
+                    raise Aborted(f"Transaction contention on {path}")
+            self._apply()
+        return []
+
+class MemoryClient:
+    """In-memory Firestore client with injected per-round-trip latency
+    
+    latency_ms is the mean delay added to each round trip and jitter_ms a uniform +/- spread.
+    """
+    
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._store = {}  # collection name -> {document ID -> data}
+        self._versions = {}  # document path -> write count, for transaction conflict checks
+        self._lock = threading.RLock()
+    
+    def _delay_seconds(self) -> float:
+        return max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+    
+    def _round_trip(self):
+        delay = self._delay_seconds()
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _collection(self, collection_name: str) -> Dict[str, Dict[str, Any]]:
+        return self._store.get(collection_name, {})
+    
+    def collection(self, collection_name: str) -> MemoryCollectionReference:
+        return MemoryCollectionReference(self, collection_name)
+    
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+    
+    def transaction(self) -> MemoryTransaction:
+        return MemoryTransaction(self)
+    
+    def async_client(self) -> 'AsyncMemoryClient':
+        """An AsyncClient-style view of the same documents"""
+        return AsyncMemoryClient(self)
+    
+    def transactional(self, to_wrap):
+        """Counterpart of firestore.transactional: run to_wrap(transaction, ...) and commit its writes,
+        retrying from scratch when the commit loses a race with another writer
+        """
+        def run(transaction: MemoryTransaction, *args, **kwargs):
+            for attempt in range(1, MAX_TRANSACTION_ATTEMPTS + 1):
+                transaction._reset()
+                self._round_trip()  # begin
+                result = to_wrap(transaction, *args, **kwargs)
+                try:
+                    transaction.commit()
+                    return result
+                except Aborted:
+                    if attempt == MAX_TRANSACTION_ATTEMPTS:
+                        raise
+        return run
+    
+    def clear(self):
+        """Drop every collection"""
+        with self._lock:
+            self._store.clear()
+            self._versions.clear()
+
+class AsyncMemoryDocumentReference(MemoryDocumentReference):
+    """Document reference of AsyncMemoryClient, like AsyncDocumentReference"""
+    
+    async def get(self, field_paths: Optional[List[str]] = None,
+                  transaction: Optional['MemoryTransaction'] = None) -> MemorySnapshot:
+        await self._client._async_round_trip()
+        return self._read(field_paths, transaction)
+
+class AsyncMemoryQuery(MemoryQuery):
+    """Query of AsyncMemoryClient, like AsyncQuery"""
+    
+    async def get(self, transaction: Optional['MemoryTransaction'] = None) -> List[MemorySnapshot]:
+        await self._client._async_round_trip()
+        return self._run(transaction)
+    
+    async def stream(self, transaction: Optional['MemoryTransaction'] = None) -> AsyncIterator[MemorySnapshot]:
+        await self._client._async_round_trip()
+        for snapshot in self._run(transaction):
+            yield snapshot
+
+class AsyncMemoryCollectionReference(AsyncMemoryQuery):
+    """Collection of AsyncMemoryClient, like AsyncCollectionReference"""
+    
+    def document(self, document_id: Optional[str] = None) -> AsyncMemoryDocumentReference:
+        return AsyncMemoryDocumentReference(self._client, self._collection_name, document_id or uuid.uuid4().hex[:20])
+
+class AsyncMemoryClient:
+    """Reads a MemoryClient's documents the way AsyncClient does: round trips await asyncio.sleep,
+    so concurrent reads on one event loop overlap. Writes go through the synchronous client.
+    """
+    
+    def __init__(self, client: MemoryClient):
+        self._sync_client = client
+        self._store = client._store
+        self._versions = client._versions
+        self._lock = client._lock
+    
+    async def _async_round_trip(self):
+        delay = self._sync_client._delay_seconds()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def _collection(self, collection_name: str) -> Dict[str, Dict[str, Any]]:
+        return self._store.get(collection_name, {})
+    
+    def collection(self, collection_name: str) -> AsyncMemoryCollectionReference:
+        return AsyncMemoryCollectionReference(self, collection_name)
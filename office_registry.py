@@ -0,0 +1,168 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple
+from config import Config
+from geofence import GeofenceIndex, GeofenceMatch
+
+logger = logging.getLogger(__name__)
+
+class OfficeSnapshot(NamedTuple):
+    """One compiled generation of the office list; replaced as a whole, never modified"""
+    version: Any
+    offices: Tuple[Dict[str, Any], ...]
+    index: GeofenceIndex
+    loaded_at: float
+
+class ConfigOfficeSource:
+    """The static Config.OFFICE_LOCATIONS list"""
+    
+    name = 'config'
+    
+    def version(self) -> Any:
+        return self.name
+    
+    def load(self) -> Optional[Tuple[Any, List[Dict[str, Any]]]]:
+        return self.name, Config.OFFICE_LOCATIONS
+
+class FileOfficeSource:
+    """A JSON file holding a list of offices (or {'offices': [...]}); versioned by mtime and size"""
+    
+    name = 'file'
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def version(self) -> Any:
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+    
+    def load(self) -> Optional[Tuple[Any, List[Dict[str, Any]]]]:
+        try:
+            version = self.version()
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            return version, data.get('offices', []) if isinstance(data, dict) else data
+        except (OSError, ValueError) as e:
+            logger.error("Error loading office locations from %s: %s", self.path, e)
+            return None
+
+class BackendOfficeSource:
+    """Office locations saved in the storage backend by set_office_locations()"""
+    
+    name = 'backend'
+    
+    def version(self) -> Any:
+        from storage_backend import get_storage_backend
+        return get_storage_backend().get_office_locations_version()
+    
+    def load(self) -> Optional[Tuple[Any, List[Dict[str, Any]]]]:
+        from storage_backend import get_storage_backend
+        saved = get_storage_backend().get_office_locations()
+        return (saved['version'], saved['offices']) if saved else None
+
+class OfficeRegistry:
+    """Current compiled office locations, reloaded when the source's version changes
+    
+    Requests read the snapshot reference and never wait on a reload: the version is polled at
+    most every poll_seconds by whichever request thread gets there first, and a changed list is
+    compiled off to the side and swapped in with a single assignment.
+    """
+    
+    def __init__(self, source, poll_seconds: float):
+        self.source = source
+        self.poll_seconds = poll_seconds
+        self._snapshot = None
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+    
+    def current(self) -> OfficeSnapshot:
+        """The snapshot to check against; the first call loads, later calls poll when due"""
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() >= self._next_poll:
+            self._poll(wait=snapshot is None)
+            snapshot = self._snapshot
+        return snapshot
+    
+    def locate(self, latitude: float, longitude: float) -> GeofenceMatch:
+        return self.current().index.locate(latitude, longitude)
+    
+    def _poll(self, wait: bool):
+        # Only one thread polls; the others carry on with the snapshot they have
+        if not self._lock.acquire(blocking=wait):
+            return
+        try:
+            if self._snapshot is not None and time.monotonic() < self._next_poll:
+                return
+            self._next_poll = time.monotonic() + self.poll_seconds
+            try:
+                changed = self._snapshot is None or self.source.version() != self._snapshot.version
+            except Exception as e:
+                logger.error("Error polling %s office locations: %s", self.source.name, e)
+                changed = self._snapshot is None
+            if changed:
+                self._reload()
+        finally:
+            self._lock.release()
+    
+    def reload(self) -> OfficeSnapshot:
+        """Load and compile the source now, e.g. right after saving a new office list"""
+        with self._lock:
+            self._next_poll = time.monotonic() + self.poll_seconds
+            self._reload()
+        return self._snapshot
+    
+    def _reload(self):
+        try:
+            loaded = self.source.load()
+        except Exception as e:
+            logger.error("Error loading %s office locations: %s", self.source.name, e)
+            loaded = None
+        if loaded is not None:
+            version, offices = loaded
+            try:
+                offices = tuple(copy.deepcopy(list(offices)))
+                self._snapshot = OfficeSnapshot(version, offices, GeofenceIndex(offices), time.time())
+                logger.info("Loaded %s office locations from %s (version %s)", len(offices), self.source.name, version)
+                return
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error("Invalid office locations from %s (version %s): %s", self.source.name, version, e)
+        if self._snapshot is None:
+            # Nothing usable yet: fall back to the static list rather than lock everyone out
+            logger.warning("Using Config.OFFICE_LOCATIONS until %s office locations load", self.source.name)
+            offices = tuple(copy.deepcopy(Config.OFFICE_LOCATIONS))
+            self._snapshot = OfficeSnapshot(None, offices, GeofenceIndex(offices), time.time())
+
+def validate_offices(offices: Any) -> List[Dict[str, Any]]:
+    """Check an office list compiles, raising ValueError with the reason when it does not"""
+    if not isinstance(offices, list) or not all(isinstance(office, dict) for office in offices):
+        raise ValueError("offices must be a list of objects")
+    try:
+        GeofenceIndex(offices)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid office: {e}") from e
+    return offices
+
+# Global office registry instance
+office_registry = None
+
+def get_office_registry() -> OfficeRegistry:
+    """Get or create the registry for Config.OFFICE_LOCATIONS_SOURCE"""
+    global office_registry
+    if office_registry is None:
+        if Config.OFFICE_LOCATIONS_SOURCE == 'config':
+            source = ConfigOfficeSource()
+        elif Config.OFFICE_LOCATIONS_SOURCE == 'file':
+            source = FileOfficeSource(Config.OFFICE_LOCATIONS_FILE)
+        elif Config.OFFICE_LOCATIONS_SOURCE == 'backend':
+            source = BackendOfficeSource()
+        else:
+            raise ValueError(f"Unknown OFFICE_LOCATIONS_SOURCE: {Config.OFFICE_LOCATIONS_SOURCE!r}")
+        office_registry = OfficeRegistry(source, Config.OFFICE_LOCATIONS_POLL_SECONDS)
+    return office_registry
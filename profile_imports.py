@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile: where importing the app spends its time, from `python -X importtime`,
+and optionally how long the storage backend takes to create and connect afterwards
+
+Usage:
+    python profile_imports.py                     # top 20 imports of app by cumulative time
+    python profile_imports.py --module firebase_service --top 40
+    python profile_imports.py --warm              # also time backend creation + first round trip
+    python profile_imports.py --json profile.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+WARM_UP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from storage_backend import warm_up_storage_backend, get_storage_status
+warm_up_storage_backend()
+status = get_storage_status()
+status['import_ms'] = round((imported - started) * 1000, 1)
+print(json.dumps(status))
+"""
+
+
+def run_python(args):
+    """Run the interpreter in this directory with app logging kept quiet"""
+    env = dict(os.environ, LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'))
+    return subprocess.run([sys.executable, *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                          env=env, capture_output=True, text=True)
+
+
+def profile_import(module):
+    """[{'module', 'self_ms', 'cumulative_ms', 'depth'}] for every module imported by `import module`"""
+    result = run_python(['-X', 'importtime', '-c', f'import {module}'])
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(f"❌ import {module} failed")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({'module': name, 'self_ms': int(self_us) / 1000,
+                            'cumulative_ms': int(cumulative_us) / 1000, 'depth': len(indent) // 2})
+    return entries
+
+
+def package_totals(entries):
+    """Self time summed per top-level package, e.g. everything under google.*"""
+    totals = {}
+    for entry in entries:
+        package = entry['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + entry['self_ms']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time and backend start-up")
+    parser.add_argument('--module', default='app', help="module to import (default: app)")
+    parser.add_argument('--top', type=int, default=20, help="rows per table (default: 20)")
+    parser.add_argument('--warm', action='store_true', help="also create and warm up the storage backend")
+    parser.add_argument('--json', help="save the full profile to this file")
+    args = parser.parse_args()
+
+    print("🧊 Cold Start Profile")
+    print("=" * 50)
+
+    entries = profile_import(args.module)
+    total = next((entry['cumulative_ms'] for entry in reversed(entries) if entry['module'] == args.module), None)
+    if total is not None:
+        print(f"import {args.module}: {total:.1f} ms, {len(entries)} modules\n")
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in sorted(entries, key=lambda entry: entry['cumulative_ms'], reverse=True)[:args.top]:
+        print(f"{entry['cumulative_ms']:14.1f} {entry['self_ms']:9.1f}  {'  ' * entry['depth']}{entry['module']}")
+
+    print(f"\n{'self ms':>14}  top-level package")
+    packages = package_totals(entries)
+    for package, self_ms in packages[:args.top]:
+        print(f"{self_ms:14.1f}  {package}")
+
+    warm = None
+    if args.warm:
+        result = run_python(['-c', WARM_UP_SCRIPT])
+        try:
+            warm = json.loads(result.stdout.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            print(result.stderr, file=sys.stderr)
+            sys.exit("❌ Backend warm-up failed")
+        print(f"\n🔌 Backend '{warm['backend']}': import app {warm['import_ms']} ms, "
+              f"create {warm['init_ms']} ms, first round trip {warm['warm_ms']} ms -> {warm['state']}")
+        if warm['error']:
+            print(f"⚠️  {warm['error']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'module': args.module, 'total_ms': total, 'imports': entries,
+                       'packages': dict(packages), 'warm_up': warm}, f, indent=2)
+        print(f"\n💾 Profile saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Process-wide thread pool for running a request's independent storage calls side by side
+
+fan_out() submits plain synchronous calls (FirebaseService methods, model lookups) and returns
+their results in order, so a view waits for its slowest call instead of the sum of them. The
+same pool runs the async backend's thread fallback, so one setting bounds both.
+"""
+
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+class QueryPool:
+    """A bounded ThreadPoolExecutor for storage calls
+    
+    Calls run in a copy of the submitting thread's context, so the Flask request (and the
+    request metrics on flask.g) is visible to them.
+    """
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix='storage-query', initializer=self._mark_worker)
+    
+    @staticmethod
+    def _mark_worker():
+        _local.worker = True
+    
+    def fan_out(self, *calls: Callable[[], Any], timeout: Optional[float] = None) -> List[Any]:
+        """Run zero-argument calls concurrently and return their results in order
+        
+        Waits at most timeout seconds for the calls (None waits as long as they take) and raises
+        TimeoutError otherwise; the first exception raised by a call is re-raised here. Calls
+        not yet started when fan_out exits early (timeout or exception) are cancelled; calls
+        already running finish in the background and their results are dropped. A client
+        disconnecting does not stop the calls: the view only learns of it after it returns.
+        """
+        if getattr(_local, 'worker', False):
+            # Already on a pool thread: waiting on the pool from here could exhaust it
+            return [call() for call in calls]
+        
+        futures = [self.executor.submit(contextvars.copy_context().run, call) for call in calls]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            results = []
+            for call, future in zip(calls, futures):
+                try:
+                    results.append(future.result(None if deadline is None else max(deadline - time.monotonic(), 0)))
+                except concurrent.futures.TimeoutError:
+                    logger.warning("Storage call %s did not finish within %ss", _call_name(call), timeout)
+                    raise
+            return results
+        finally:
+            for future in futures:
+                future.cancel()
+
+def _call_name(call: Callable) -> str:
+    func = getattr(call, 'func', call)  # functools.partial
+    return getattr(func, '__qualname__', repr(func))
+
+# Global query pool, created per process on first use
+query_pool = None
+_query_pool_lock = threading.Lock()
+
+def get_query_pool() -> QueryPool:
+    """Get or create the pool sized by Config.QUERY_POOL_WORKERS"""
+    global query_pool
+    if query_pool is None:
+        with _query_pool_lock:
+            if query_pool is None:
+                query_pool = QueryPool(Config.QUERY_POOL_WORKERS)
+    return query_pool
+
+def fan_out(*calls: Callable[[], Any], timeout: Optional[float] = None) -> List[Any]:
+    """Run calls concurrently on the shared pool, waiting up to timeout seconds (default
+    Config.QUERY_TIMEOUT_SECONDS, 0 waits indefinitely)
+        
+        today_attendance, employees = fan_out(
+            partial(FirebaseAttendance.get_by_date, today),
+            partial(FirebaseEmployee.get_active, select=Config.EMPLOYEE_LIST_FIELDS))
+    """
+    if timeout is None:
+        timeout = Config.QUERY_TIMEOUT_SECONDS
+    return get_query_pool().fan_out(*calls, timeout=timeout or None)
+
+def _reset_after_fork():
+    """Pool threads do not survive fork(); a worker builds its own pool"""
+    global query_pool, _query_pool_lock
+    query_pool = None
+    _query_pool_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
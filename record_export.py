@@ -0,0 +1,180 @@
+"""
+Streaming CSV/XLSX export of attendance and timesheet records over a date range
+
+Records are read from the storage backend a page at a time and written out as they arrive, so
+an export holds one page and one output chunk in memory however long the range is. XLSX is
+written directly into a streamed zip archive with inline strings, so no spreadsheet library is
+needed and nothing is buffered until the end.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+from config import Config
+from storage_backend import StorageBackend
+
+# Record fields exported per kind; the employee's name and department follow the employee ID
+EXPORT_FIELDS = {
+    'attendance': ['date', 'employee_id', 'sign_in_time', 'sign_out_time', 'total_hours'],
+    'timesheets': ['date', 'employee_id', 'tasks_completed', 'challenges_faced', 'achievements',
+                   'tomorrow_plans', 'additional_notes', 'submitted_at']
+}
+
+# Columns of the monthly payroll report download
+PAYROLL_COLUMNS = ['employee_id', 'name', 'department', 'days_present', 'total_hours', 'late_arrivals', 'early_departures']
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+ROWS_PER_CHUNK = 500
+
+# Spreadsheet apps run cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def export_header(kind: str) -> List[str]:
+    fields = EXPORT_FIELDS[kind]
+    return [fields[0], fields[1], 'name', 'department', *fields[2:]]
+
+def export_rows(storage: StorageBackend, kind: str, start_date: str, end_date: str,
+                department: Optional[str] = None) -> Iterator[List[Any]]:
+    """The header, then one row per record dated within [start_date, end_date], oldest first
+    
+    Records do not carry a department, so that filter is applied here against the employee list.
+    """
+    fields = EXPORT_FIELDS[kind]
+    employees = {employee.get('employee_id'): employee
+                 for employee in storage.get_all_employees(['employee_id', 'name', 'department'])}
+    if kind == 'attendance':
+        records = storage.iter_attendance_range(start_date, end_date, fields, Config.EXPORT_PAGE_SIZE)
+    else:
+        records = storage.iter_timesheets_range(start_date, end_date, fields, Config.EXPORT_PAGE_SIZE)
+    
+    yield export_header(kind)
+    for record in records:
+        employee = employees.get(record.get('employee_id')) or {}
+        employee_department = employee.get('department') or 'Unassigned'
+        if department and employee_department != department:
+            continue
+        yield [record.get(fields[0]), record.get(fields[1]), employee.get('name'), employee_department,
+               *(record.get(field) for field in fields[2:])]
+
+def csv_chunks(rows: Iterable[List[Any]]) -> Iterator[str]:
+    """CSV text for rows, a chunk every ROWS_PER_CHUNK rows; starts with a BOM so Excel reads UTF-8"""
+    buffer = io.StringIO()
+    buffer.write('\ufeff')
+    writer = csv.writer(buffer)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_value(value) for value in row])
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable stream collecting what zipfile writes, so it can be handed out in chunks"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>')
+}
+
+def xlsx_chunks(rows: Iterable[List[Any]], sheet_name: str = 'Export') -> Iterator[bytes]:
+    """A single-sheet XLSX workbook of rows, streamed as zip data every ROWS_PER_CHUNK rows"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, xml in _XLSX_PARTS.items():
+            workbook.writestr(name, xml.replace('{sheet_name}', escape(sheet_name[:31])))
+        # The sheet's size is unknown up front, so allow it to pass 4 GB
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            for number, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(number, row))
+                if number % ROWS_PER_CHUNK == 0:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+def _xlsx_row(number: int, row: List[Any]) -> bytes:
+    cells = []
+    for index, value in enumerate(row):
+        if value is None or value == '':
+            continue
+        ref = f'{_column_letters(index)}{number}'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub('', str(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'.encode()
+
+def _column_letters(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def export_chunks(rows: Iterable[List[Any]], export_format: str, sheet_name: str = 'Export') -> Iterator[Any]:
+    """Response body for rows in 'csv' or 'xlsx'"""
+    if export_format == 'xlsx':
+        return xlsx_chunks(rows, sheet_name)
+    return csv_chunks(rows)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+One-off tool to move attendance and timesheet documents from auto-generated IDs
+to deterministic '<employee_id>_<YYYY-MM-DD>' IDs (see Config.COMPOSITE_RECORD_IDS)
+
+Usage:
+    python rekey_records.py             # rekey both collections
+    python rekey_records.py --dry-run   # report what would change without writing
+"""
+
+import argparse
+import math
+import os
+import sys
+from datetime import datetime
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+COLLECTIONS = ['attendance', 'timesheets']
+BATCH_SIZE = 200  # each moved document costs two writes (set + delete), Firestore caps batches at 500
+
+
+def _seconds(value):
+    """A stored timestamp (Firestore datetime or ISO string; naive values are local time) as epoch
+    seconds, or infinity when missing or unparseable so it sorts as the newest"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return math.inf
+    return value.timestamp() if isinstance(value, datetime) else math.inf
+
+
+def pick_primary(docs):
+    """Choose which of several same-day documents to keep: the most complete, then the oldest by
+    created_at, then by sign_in_time; the document ID settles any remaining tie"""
+    def rank(doc):
+        data = doc.to_dict()
+        missing = (not data.get('sign_out_time'), not data.get('sign_in_time'), not data.get('tasks_completed'))
+        return missing, _seconds(data.get('created_at')), _seconds(data.get('sign_in_time')), doc.id
+    return min(docs, key=rank)
+
+
+def rekey_collection(db, collection_name, dry_run=False):
+    """Rekey one collection, returns (moved, duplicates_dropped, skipped)"""
+    from firebase_service import record_doc_id
+
+    print(f"\n📋 Rekeying '{collection_name}'...")
+    groups = {}
+    skipped = 0
+    for doc in db.collection(collection_name).stream():
+        data = doc.to_dict()
+        employee_id = data.get('employee_id')
+        date_str = data.get('date')
+        if not employee_id or not date_str:
+            print(f"⚠️  Skipping {doc.id}: missing employee_id or date")
+            skipped += 1
+            continue
+        groups.setdefault(record_doc_id(employee_id, date_str), []).append(doc)
+
+    moved = 0
+    duplicates = 0
+    batch = db.batch()
+    pending = 0
+    for target_id, docs in groups.items():
+        existing = [doc for doc in docs if doc.id == target_id]
+        primary = existing[0] if existing else pick_primary(docs)
+        if len(docs) > 1:
+            duplicates += len(docs) - 1
+            print(f"⚠️  {len(docs)} documents for {target_id}, keeping {primary.id}")
+
+        if primary.id != target_id:
+            moved += 1
+            if not dry_run:
+                batch.set(db.collection(collection_name).document(target_id), primary.to_dict())
+                pending += 1
+        for doc in docs:
+            if doc.id != target_id and not dry_run:
+                batch.delete(doc.reference)
+                pending += 1
+
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    action = "Would move" if dry_run else "Moved"
+    print(f"✅ {action} {moved} documents, {duplicates} duplicates dropped, {skipped} skipped")
+    return moved, duplicates, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rekey attendance/timesheet documents to composite IDs")
+    parser.add_argument('--dry-run', action='store_true', help="report changes without writing")
+    parser.add_argument('--collection', choices=COLLECTIONS, action='append',
+                        help="collection to rekey (default: all)")
+    args = parser.parse_args()
+
+    print("🔑 Composite ID Rekeying Tool")
+    print("=" * 50)
+
+    from firebase_service import get_firebase_service
+    firebase_service = get_firebase_service()
+    if not firebase_service.db:
+        print("❌ Firebase connection failed")
+        sys.exit(1)
+
+    for collection_name in args.collection or COLLECTIONS:
+        rekey_collection(firebase_service.db, collection_name, dry_run=args.dry_run)
+
+    if not args.dry_run:
+        print("\n🎉 Rekeying completed! Set COMPOSITE_RECORD_IDS=true to use point reads.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import threading
+import time
+from typing import Any, Dict
+from flask import Flask, g, has_request_context, request, template_rendered, before_render_template
+from storage_backend import StorageBackend, on_storage_backend_created, on_store_operation
+from async_backend import AsyncStorageBackend, on_async_storage_backend_created
+
+# Public StorageBackend methods that never reach the store themselves (the iterators' page
+# reads are counted one by one)
+UNCOUNTED_METHODS = {'get_cache_stats', 'warm_up', 'iter_attendance_range', 'iter_timesheets_range'}
+
+class RequestMetrics:
+    """Backend and template timings for the request in flight, kept on flask.g
+
+    Calls and their time are taken per storage method; reads, writes, documents and cache hits
+    are reported by the backends where each store call is made (count_store_operation).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls = 0
+        self.reads = 0
+        self.writes = 0
+        self.documents = 0
+        self.cache_hits = 0
+        self.backend_ms = 0.0
+        self.render_ms = 0.0
+        self.methods = {}  # storage method name -> calls
+        self._render_started = None
+        self._lock = threading.Lock()  # calls gathered concurrently finish on other threads
+
+    def record_call(self, name: str, elapsed_ms: float):
+        with self._lock:
+            self.calls += 1
+            self.backend_ms += elapsed_ms
+            self.methods[name] = self.methods.get(name, 0) + 1
+
+    def record_operation(self, reads: int = 0, writes: int = 0, documents: int = 0, cache_hits: int = 0):
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            self.documents += documents
+            self.cache_hits += cache_hits
+
+    def server_timing(self, total_ms: float) -> str:
+        """Server-Timing header value; backend time sums every call, so it can exceed the total
+        when calls overlap"""
+        return ', '.join([
+            f'backend;dur={self.backend_ms:.1f};desc="{self.calls} calls: {self.reads} reads, '
+            f'{self.writes} writes, {self.documents} docs, {self.cache_hits} cache hits"',
+            f'render;dur={self.render_ms:.1f}',
+            f'total;dur={total_ms:.1f}'
+        ])
+
+class RouteStats:
+    """Running per-route totals across requests"""
+
+    FIELDS = ('requests', 'calls', 'reads', 'writes', 'documents', 'cache_hits', 'total_ms', 'backend_ms', 'render_ms')
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, metrics: RequestMetrics, total_ms: float):
+        with self._lock:
+            totals = self._routes.setdefault(route, dict.fromkeys(self.FIELDS, 0))
+            totals['requests'] += 1
+            totals['calls'] += metrics.calls
+            totals['reads'] += metrics.reads
+            totals['writes'] += metrics.writes
+            totals['documents'] += metrics.documents
+            totals['cache_hits'] += metrics.cache_hits
+            totals['total_ms'] += total_ms
+            totals['backend_ms'] += metrics.backend_ms
+            totals['render_ms'] += metrics.render_ms
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Totals plus per-request averages for every route seen so far"""
+        with self._lock:
+            routes = {route: dict(totals) for route, totals in self._routes.items()}
+        for totals in routes.values():
+            count = totals['requests']
+            for field in self.FIELDS[1:]:
+                totals[f"avg_{field}"] = round(totals[field] / count, 2)
+            for field in ('total_ms', 'backend_ms', 'render_ms'):
+                totals[field] = round(totals[field], 2)
+        return routes
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+route_stats = RouteStats()
+_local = threading.local()
+
+def _current_metrics():
+    return g.get('request_metrics') if has_request_context() else None
+
+def _wrap(name: str, method):
+    """Time a storage method and charge it to the current request; nested storage calls are
+    part of the outer call and not counted again"""
+    def timed(*args, **kwargs):
+        metrics = _current_metrics()
+        depth = getattr(_local, 'depth', 0)
+        if metrics is None or depth:
+            return method(*args, **kwargs)
+        _local.depth = 1
+        started = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            _local.depth = 0
+        metrics.record_call(name, (time.perf_counter() - started) * 1000)
+        return result
+    timed.__wrapped__ = method
+    return timed
+
+def _count_store_operation(**counts):
+    """Charge a store operation a backend reported to the current request, if any"""
+    metrics = _current_metrics()
+    if metrics is not None:
+        metrics.record_operation(**counts)
+
+def instrument_backend(storage: StorageBackend) -> StorageBackend:
+    """Wrap the public storage methods of one backend instance with per-request accounting"""
+    for name in dir(StorageBackend):
+        if name.startswith('_') or name in UNCOUNTED_METHODS:
+            continue
+        method = getattr(storage, name)
+        if callable(method):
+            setattr(storage, name, _wrap(name, method))
+    return storage
+
+def _wrap_async(name: str, method):
+    """Time a storage coroutine; gather() runs it in the request's context"""
+    async def timed(*args, **kwargs):
+        metrics = _current_metrics()
+        if metrics is None:
+            return await method(*args, **kwargs)
+        started = time.perf_counter()
+        result = await method(*args, **kwargs)
+        metrics.record_call(name, (time.perf_counter() - started) * 1000)
+        return result
+    timed.__wrapped__ = method
+    return timed
+
+def instrument_async_backend(storage: AsyncStorageBackend) -> AsyncStorageBackend:
+    """Wrap the methods an async backend awaits natively; the others run the synchronous
+    backend's already instrumented methods on a worker thread"""
+    for name in dir(StorageBackend):
+        if name.startswith('_') or name in UNCOUNTED_METHODS or not hasattr(type(storage), name):
+            continue
+        setattr(storage, name, _wrap_async(name, getattr(storage, name)))
+    return storage
+
+def init_app(app: Flask):
+    """Start per-request metrics, add Server-Timing to every response and feed route_stats;
+    the storage backends are instrumented when they are created"""
+    on_storage_backend_created(instrument_backend)
+    on_async_storage_backend_created(instrument_async_backend)
+    on_store_operation(_count_store_operation)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_metrics = RequestMetrics()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        metrics = g.get('request_metrics')
+        if metrics is None:
+            return response
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+        response.headers['Server-Timing'] = metrics.server_timing(total_ms)
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        route_stats.add(f"{request.method} {route}", metrics, total_ms)
+        return response
+
+    def render_started(sender, template, context, **extra):
+        metrics = _current_metrics()
+        if metrics is not None:
+            metrics._render_started = time.perf_counter()
+
+    def render_finished(sender, template, context, **extra):
+        metrics = _current_metrics()
+        if metrics is not None and metrics._render_started is not None:
+            metrics.render_ms += (time.perf_counter() - metrics._render_started) * 1000
+            metrics._render_started = None
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
@@ -6,6 +6,7 @@ Employee Attendance System - Startup Script
 import os
 import sys
 from app import app, create_sample_data
+from config import Config
 
 def main():
     """Main startup function"""
@@ -41,11 +42,11 @@ def main():
     except Exception as e:
         print(f"⚠ Could not print geofence config: {e}")
 
-    # Run the application
+    # Run the application (development server; production uses gunicorn.conf.py)
     app.run(
         host='0.0.0.0',
         port=port,
-        debug=True
+        debug=Config.DEBUG
     )
 
 if __name__ == '__main__':
@@ -0,0 +1,793 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from config import Config
+from storage_backend import (StorageBackend, SignOutStatus, SignOutResult, build_daily_summary,
+                             build_employee_stats, encode_page_token, decode_page_token, sign_out_hours,
+                             job_is_claimable, count_store_operation)
+
+logger = logging.getLogger(__name__)
+
+# WHERE conditions matching each attendance_status, so status filters run in the query
+ATTENDANCE_STATUS_SQL = {
+    'completed': "COALESCE(sign_in_time, '') != '' AND COALESCE(sign_out_time, '') != ''",
+    'incomplete': "COALESCE(sign_in_time, '') != '' AND COALESCE(sign_out_time, '') = ''",
+    'absent': "COALESCE(sign_in_time, '') = ''"
+}
+
+# Columns of each table; writes drop unknown keys and projections ignore unknown fields
+COLUMNS = {
+    'employees': ['id', 'employee_id', 'name', 'email', 'department', 'password_hash', 'is_active',
+                  'created_at', 'updated_at'],
+    'admins': ['id', 'username', 'name', 'password_hash', 'created_at', 'updated_at'],
+    'attendance': ['id', 'employee_id', 'date', 'sign_in_time', 'sign_out_time', 'total_hours', 'created_at'],
+    'timesheets': ['id', 'employee_id', 'date', 'tasks_completed', 'challenges_faced', 'achievements',
+                   'tomorrow_plans', 'additional_notes', 'submitted_at', 'created_at', 'updated_at']
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    id TEXT PRIMARY KEY,
+    employee_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    email TEXT,
+    department TEXT,
+    password_hash TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS admins (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    name TEXT,
+    password_hash TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    id TEXT PRIMARY KEY,
+    employee_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    sign_in_time TEXT,
+    sign_out_time TEXT,
+    total_hours REAL,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS timesheets (
+    id TEXT PRIMARY KEY,
+    employee_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    tasks_completed TEXT,
+    challenges_faced TEXT,
+    achievements TEXT,
+    tomorrow_plans TEXT,
+    additional_notes TEXT,
+    submitted_at TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+-- Small JSON documents such as the office location registry, versioned for change polling
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at TEXT
+);
+-- Stored payroll rollup per month (JSON) and the attendance version it was computed from
+CREATE TABLE IF NOT EXISTS monthly_rollups (
+    month TEXT PRIMARY KEY,
+    source_version INTEGER NOT NULL DEFAULT 0,
+    computed_version INTEGER,
+    value TEXT,
+    updated_at TEXT
+);
+-- Background jobs as JSON; status is a column so running jobs can be found after a restart
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+-- Every attendance change bumps its month's source version, marking the rollup stale
+CREATE TRIGGER IF NOT EXISTS trg_attendance_insert_month AFTER INSERT ON attendance BEGIN
+    INSERT INTO monthly_rollups (month, source_version) VALUES (substr(NEW.date, 1, 7), 1)
+    ON CONFLICT (month) DO UPDATE SET source_version = source_version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_attendance_update_month AFTER UPDATE ON attendance BEGIN
+    INSERT INTO monthly_rollups (month, source_version) VALUES (substr(NEW.date, 1, 7), 1)
+    ON CONFLICT (month) DO UPDATE SET source_version = source_version + 1;
+    INSERT INTO monthly_rollups (month, source_version)
+    SELECT substr(OLD.date, 1, 7), 1 WHERE substr(OLD.date, 1, 7) != substr(NEW.date, 1, 7)
+    ON CONFLICT (month) DO UPDATE SET source_version = source_version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_attendance_delete_month AFTER DELETE ON attendance BEGIN
+    INSERT INTO monthly_rollups (month, source_version) VALUES (substr(OLD.date, 1, 7), 1)
+    ON CONFLICT (month) DO UPDATE SET source_version = source_version + 1;
+END;
+-- One record per employee per day; also serves per-employee history ordered by date
+CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_employee_date ON attendance (employee_id, date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_timesheets_employee_date ON timesheets (employee_id, date);
+-- Per-date listings and the newest-first (date, id) pagination cursor
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date, id);
+CREATE INDEX IF NOT EXISTS idx_timesheets_date ON timesheets (date, id);
+"""
+
+class SQLiteService(StorageBackend):
+    """Embedded SQLite storage for single-site deployments
+    
+    Uses WAL mode with one connection per thread, so reads never block on the writer.
+    Daily summaries and employee stats are computed from indexed queries on read
+    rather than maintained as separate rollup rows. Monthly payroll rollups are stored,
+    and triggers on attendance mark their month stale.
+    """
+    
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        logger.info("Connected to SQLite database: %s", db_path)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; multi-statement writes use _transaction()
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front, so read-then-write is atomic"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    
+    def warm_up(self) -> bool:
+        """Open this thread's connection and touch the database file"""
+        try:
+            self._connection().execute('SELECT 1 FROM settings LIMIT 1').fetchall()
+            return True
+        except Exception as e:
+            logger.error("SQLite warm-up query failed: %s", e)
+            return False
+    
+    # Row helpers
+    @staticmethod
+    def _to_dict(table: str, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        """Convert a row to the record dict shape the Firestore backend returns"""
+        if row is None:
+            return None
+        data = dict(row)
+        if table == 'employees' and 'is_active' in data:
+            data['is_active'] = bool(data['is_active'])
+        return data
+    
+    @staticmethod
+    def _columns(table: str, select: Optional[List[str]], *required: str) -> str:
+        """SELECT column list for a projection; 'id' and required fields (e.g. sort keys) are always kept"""
+        if not select:
+            return '*'
+        fields = dict.fromkeys(['id', *select, *required])
+        return ', '.join(field for field in fields if field in COLUMNS[table])
+    
+    @staticmethod
+    def _read(conn: sqlite3.Connection, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        """Run a SELECT, counting the read and the rows it returned for request metrics"""
+        rows = conn.execute(sql, params).fetchall()
+        count_store_operation(reads=1, documents=len(rows))
+        return rows
+    
+    @staticmethod
+    def _write(conn: sqlite3.Connection, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        """Run an INSERT, UPDATE or DELETE, counting the rows it changed (trigger writes included)
+        for request metrics"""
+        changes = conn.total_changes
+        cursor = conn.execute(sql, params)
+        count_store_operation(writes=conn.total_changes - changes)
+        return cursor
+    
+    def _fetch_one(self, table: str, where: str, params: Tuple) -> Optional[Dict[str, Any]]:
+        rows = self._read(self._connection(), f"SELECT * FROM {table} WHERE {where}", params)
+        return self._to_dict(table, rows[0] if rows else None)
+    
+    def _fetch_all(self, table: str, sql: str, params: Tuple) -> List[Dict[str, Any]]:
+        return [self._to_dict(table, row) for row in self._read(self._connection(), sql, params)]
+    
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, table: str, data: Dict[str, Any]) -> str:
+        """Insert data under a new ID, returns the ID"""
+        data = {key: value for key, value in data.items() if key in COLUMNS[table]}
+        data['id'] = uuid.uuid4().hex
+        placeholders = ', '.join('?' for _ in data)
+        SQLiteService._write(conn, f"INSERT INTO {table} ({', '.join(data)}) VALUES ({placeholders})",
+                             tuple(data.values()))
+        return data['id']
+    
+    @staticmethod
+    def _update(conn: sqlite3.Connection, table: str, doc_id: str, data: Dict[str, Any]) -> bool:
+        """Update the given columns of one row, returns whether the row exists"""
+        data = {key: value for key, value in data.items() if key in COLUMNS[table] and key != 'id'}
+        if not data:
+            return bool(SQLiteService._read(conn, f"SELECT 1 FROM {table} WHERE id = ?", (doc_id,)))
+        assignments = ', '.join(f"{key} = ?" for key in data)
+        cursor = SQLiteService._write(conn, f"UPDATE {table} SET {assignments} WHERE id = ?", (*data.values(), doc_id))
+        return cursor.rowcount > 0
+    
+    # Employee CRUD Operations
+    def create_employee(self, employee_data: Dict[str, Any]) -> str:
+        """Create a new employee"""
+        try:
+            now = datetime.now().isoformat()
+            employee_data['created_at'] = now
+            employee_data['updated_at'] = now
+            doc_id = self._insert(self._connection(), 'employees', employee_data)
+            logger.info("Employee created with ID: %s", doc_id)
+            return doc_id
+        except Exception as e:
+            logger.error("Error creating employee: %s", e)
+            raise
+    
+    def get_employee_by_id(self, employee_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Get employee by employee_id; there is no lookup cache, so use_cache has no effect"""
+        try:
+            return self._fetch_one('employees', 'employee_id = ?', (employee_id,))
+        except Exception as e:
+            logger.error("Error getting employee: %s", e)
+            return None
+    
+    def get_employee_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Get employee by row ID"""
+        try:
+            return self._fetch_one('employees', 'id = ?', (doc_id,))
+        except Exception as e:
+            logger.error("Error getting employee by doc ID: %s", e)
+            return None
+    
+    def get_all_employees(self, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all employees, optionally projected to the given fields"""
+        try:
+            columns = self._columns('employees', select)
+            return self._fetch_all('employees', f"SELECT {columns} FROM employees ORDER BY id", ())
+        except Exception as e:
+            logger.error("Error getting all employees: %s", e)
+            return []
+    
+    def update_employee(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update employee data"""
+        try:
+            update_data['updated_at'] = datetime.now().isoformat()
+            if not self._update(self._connection(), 'employees', doc_id, update_data):
+                logger.warning("Employee %s not found", doc_id)
+                return False
+            logger.info("Employee %s updated successfully", doc_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating employee: %s", e)
+            return False
+    
+    def delete_employee(self, doc_id: str, progress: Optional[Callable[[str, int], None]] = None) -> bool:
+        """Delete employee and all their attendance and timesheet records
+        
+        Records are removed in chunks of WRITE_BATCH_SIZE so the write lock is never held for
+        long; ``progress(collection, deleted)`` is called after each chunk.
+        """
+        try:
+            employee = self.get_employee_by_doc_id(doc_id)
+            if not employee:
+                logger.warning("Employee %s not found", doc_id)
+                return False
+            
+            employee_id = employee.get('employee_id')
+            conn = self._connection()
+            for table in ('attendance', 'timesheets'):
+                deleted = 0
+                while True:
+                    cursor = self._write(
+                        conn, f"DELETE FROM {table} WHERE id IN "
+                        f"(SELECT id FROM {table} WHERE employee_id = ? LIMIT ?)",
+                        (employee_id, Config.WRITE_BATCH_SIZE))
+                    if cursor.rowcount <= 0:
+                        break
+                    deleted += cursor.rowcount
+                    if progress:
+                        progress(table, deleted)
+                logger.info("Deleted %s %s records for %s", deleted, table, employee_id)
+            
+            # Delete the employee last so a failed run can be retried
+            self._write(conn, "DELETE FROM employees WHERE id = ?", (doc_id,))
+            logger.info("Employee %s and their records deleted", doc_id)
+            return True
+        except Exception as e:
+            logger.error("Error deleting employee: %s", e)
+            return False
+    
+    # Admin CRUD Operations
+    def create_admin(self, admin_data: Dict[str, Any]) -> str:
+        """Create a new admin"""
+        try:
+            now = datetime.now().isoformat()
+            admin_data['created_at'] = now
+            admin_data['updated_at'] = now
+            doc_id = self._insert(self._connection(), 'admins', admin_data)
+            logger.info("Admin created with ID: %s", doc_id)
+            return doc_id
+        except Exception as e:
+            logger.error("Error creating admin: %s", e)
+            raise
+    
+    def get_admin_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get admin by username"""
+        try:
+            return self._fetch_one('admins', 'username = ?', (username,))
+        except Exception as e:
+            logger.error("Error getting admin: %s", e)
+            return None
+    
+    def get_admin_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Get admin by row ID"""
+        try:
+            return self._fetch_one('admins', 'id = ?', (doc_id,))
+        except Exception as e:
+            logger.error("Error getting admin by doc ID: %s", e)
+            return None
+    
+    def update_admin(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update admin data"""
+        try:
+            update_data['updated_at'] = datetime.now().isoformat()
+            if not self._update(self._connection(), 'admins', doc_id, update_data):
+                logger.warning("Admin %s not found", doc_id)
+                return False
+            logger.info("Admin %s updated successfully", doc_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating admin: %s", e)
+            return False
+    
+    # Attendance CRUD Operations
+    def create_attendance(self, attendance_data: Dict[str, Any]) -> str:
+        """Create attendance record; a second record for the same employee and day returns the first"""
+        try:
+            attendance_data['created_at'] = datetime.now().isoformat()
+            try:
+                doc_id = self._insert(self._connection(), 'attendance', attendance_data)
+            except sqlite3.IntegrityError:
+                # Same-day double submit: the first sign-in wins
+                existing = self.get_attendance_by_employee_and_date(attendance_data['employee_id'], attendance_data['date'])
+                if not existing:
+                    raise
+                logger.info("Attendance record %s already exists", existing['id'])
+                return existing['id']
+            logger.info("Attendance record created with ID: %s", doc_id)
+            return doc_id
+        except Exception as e:
+            logger.error("Error creating attendance: %s", e)
+            raise
+    
+    def get_attendance_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get attendance record for specific employee and date"""
+        try:
+            return self._fetch_one('attendance', 'employee_id = ? AND date = ?', (employee_id, date_str))
+        except Exception as e:
+            logger.error("Error getting attendance: %s", e)
+            return None
+    
+    def get_attendance_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get an employee's newest attendance records, optionally within [start_date, end_date]"""
+        try:
+            return self._employee_date_range('attendance', employee_id, limit, select, start_date, end_date)
+        except Exception as e:
+            logger.error("Error getting employee attendance: %s", e)
+            return []
+    
+    def get_attendance_by_date(self, date_str: str, limit: Optional[int] = None, select: Optional[List[str]] = None,
+                               status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all attendance records for a specific date (at most limit when given), optionally projected
+        and restricted to one attendance status"""
+        try:
+            columns = self._columns('attendance', select)
+            where = 'date = ?'
+            if status:
+                where += f" AND {ATTENDANCE_STATUS_SQL[status]}"
+            # LIMIT -1 means no limit
+            return self._fetch_all('attendance', f"SELECT {columns} FROM attendance WHERE {where} LIMIT ?",
+                                   (date_str, limit or -1))
+        except Exception as e:
+            logger.error("Error getting attendance by date: %s", e)
+            return []
+    
+    def get_recent_attendance_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None,
+                                   status: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of recent attendance records (optionally of one attendance status) and the
+        token for the next page (None on the last page)"""
+        try:
+            where = ATTENDANCE_STATUS_SQL[status] if status else None
+            return self._get_recent_page('attendance', limit, page_token, select, where)
+        except Exception as e:
+            logger.error("Error getting recent attendance: %s", e)
+            return [], None
+    
+    def get_attendance_range_page(self, start_date: str, end_date: str, limit: int = 500, page_token: Optional[str] = None,
+                                  select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of attendance records within [start_date, end_date], oldest first (raises on failure)"""
+        return self._get_range_page('attendance', start_date, end_date, limit, page_token, select)
+    
+    def update_attendance(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update attendance record"""
+        try:
+            if not self._update(self._connection(), 'attendance', doc_id, update_data):
+                logger.warning("Attendance %s not found", doc_id)
+                return False
+            logger.info("Attendance %s updated successfully", doc_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating attendance: %s", e)
+            return False
+    
+    def complete_sign_out(self, employee_id: str, date_str: str, now: datetime) -> SignOutResult:
+        """Validate and record an employee's sign-out in one IMMEDIATE transaction
+        
+        Concurrent submits serialize on the write lock, so only the first can succeed.
+        """
+        try:
+            with self._transaction() as conn:
+                rows = self._read(conn, "SELECT * FROM attendance WHERE employee_id = ? AND date = ?",
+                                  (employee_id, date_str))
+                row = rows[0] if rows else None
+                if row is None or not row['sign_in_time']:
+                    result = SignOutResult(SignOutStatus.NOT_SIGNED_IN)
+                elif row['sign_out_time']:
+                    result = SignOutResult(SignOutStatus.ALREADY_SIGNED_OUT)
+                elif (Config.REQUIRE_TIMESHEET_FOR_SIGNOUT and
+                        not self._read(conn, "SELECT 1 FROM timesheets WHERE employee_id = ? AND date = ?",
+                                       (employee_id, date_str))):
+                    result = SignOutResult(SignOutStatus.TIMESHEET_REQUIRED)
+                else:
+                    total_hours = sign_out_hours(row['sign_in_time'], now)
+                    if total_hours is None:
+                        result = SignOutResult(SignOutStatus.INVALID_SIGN_IN)
+                    else:
+                        self._update(conn, 'attendance', row['id'],
+                                     {'sign_out_time': now.isoformat(), 'total_hours': total_hours})
+                        result = SignOutResult(SignOutStatus.SIGNED_OUT, total_hours)
+            logger.info("Sign-out for %s on %s: %s", employee_id, date_str, result.status.value)
+            return result
+        except Exception as e:
+            logger.error("Error completing sign-out: %s", e)
+            return SignOutResult(SignOutStatus.ERROR)
+    
+    # Daily summary Operations
+    def get_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Attendance counters for a date, computed from the date index with departments joined in"""
+        try:
+            rows = self._read(
+                self._connection(),
+                "SELECT a.employee_id, a.sign_in_time, a.sign_out_time, a.total_hours, e.department "
+                "FROM attendance a LEFT JOIN employees e ON e.employee_id = a.employee_id "
+                "WHERE a.date = ?", (date_str,))
+            departments = {row['employee_id']: row['department'] or 'Unassigned' for row in rows}
+            summary_data = build_daily_summary(date_str, (dict(row) for row in rows), departments.get)
+            summary_data['id'] = date_str
+            return summary_data
+        except Exception as e:
+            logger.error("Error getting daily summary: %s", e)
+            return None
+    
+    def rebuild_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Summaries are always computed on read, so this is the same as get_daily_summary"""
+        return self.get_daily_summary(date_str)
+    
+    # Employee statistics Operations
+    def get_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Attendance aggregates for an employee (all time, per year, per month) from the (employee_id, date) index"""
+        try:
+            rows = self._read(
+                self._connection(),
+                "SELECT date, sign_in_time, sign_out_time, total_hours FROM attendance WHERE employee_id = ?",
+                (employee_id,))
+            return build_employee_stats(employee_id, (dict(row) for row in rows))
+        except Exception as e:
+            logger.error("Error getting employee stats: %s", e)
+            return None
+    
+    def rebuild_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Stats are always computed on read, so this is the same as get_employee_stats"""
+        return self.get_employee_stats(employee_id)
+    
+    def compute_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Stats are always computed on read, so this is the same as get_employee_stats"""
+        return self.get_employee_stats(employee_id)
+    
+    # Monthly rollup Operations
+    def get_monthly_rollup(self, month: str) -> Optional[Dict[str, Any]]:
+        """Get a month's stored payroll rollup with its source and computed versions"""
+        try:
+            rows = self._read(
+                self._connection(),
+                "SELECT source_version, computed_version, value FROM monthly_rollups WHERE month = ?", (month,))
+            if not rows:
+                return None
+            row = rows[0]
+            rollup_data = json.loads(row['value']) if row['value'] else {'month': month}
+            rollup_data.update(id=month, source_version=row['source_version'], computed_version=row['computed_version'])
+            return rollup_data
+        except Exception as e:
+            logger.error("Error getting monthly rollup: %s", e)
+            return None
+    
+    def save_monthly_rollup(self, month: str, rollup_data: Dict[str, Any], computed_version: int) -> bool:
+        """Store a month's rollup; an upsert, so the source version the triggers keep is left alone"""
+        try:
+            self._write(
+                self._connection(),
+                "INSERT INTO monthly_rollups (month, computed_version, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (month) DO UPDATE SET computed_version = excluded.computed_version, "
+                "value = excluded.value, updated_at = excluded.updated_at",
+                (month, computed_version, json.dumps(rollup_data), datetime.now().isoformat()))
+            return True
+        except Exception as e:
+            logger.error("Error saving monthly rollup: %s", e)
+            return False
+    
+    # Background job Operations
+    @staticmethod
+    def _save_job(conn: sqlite3.Connection, job: Dict[str, Any]):
+        SQLiteService._write(conn, "INSERT OR REPLACE INTO jobs (id, status, value, updated_at) VALUES (?, ?, ?, ?)",
+                             (job['id'], job['status'], json.dumps(job), datetime.now().isoformat()))
+    
+    @staticmethod
+    def _load_job(conn: sqlite3.Connection, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = SQLiteService._read(conn, "SELECT value FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(rows[0]['value']) if rows else None
+    
+    def create_job(self, job: Dict[str, Any]) -> bool:
+        """Store a new background job under its ID"""
+        try:
+            self._save_job(self._connection(), job)
+            return True
+        except Exception as e:
+            logger.error("Error creating job: %s", e)
+            return False
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a background job's stored state and progress"""
+        try:
+            return self._load_job(self._connection(), job_id)
+        except Exception as e:
+            logger.error("Error getting job: %s", e)
+            return None
+    
+    def update_job(self, job_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update a background job's status, progress or lease"""
+        try:
+            with self._transaction() as conn:
+                job = self._load_job(conn, job_id)
+                if job is not None:
+                    job.update(update_data)
+                    self._save_job(conn, job)
+            if job is None:
+                logger.warning("Job %s not found", job_id)
+                return False
+            return True
+        except Exception as e:
+            logger.error("Error updating job: %s", e)
+            return False
+    
+    def get_running_jobs(self) -> List[Dict[str, Any]]:
+        """Get every background job that has not finished"""
+        try:
+            rows = self._read(self._connection(), "SELECT value FROM jobs WHERE status = 'running'")
+            return [json.loads(row['value']) for row in rows]
+        except Exception as e:
+            logger.error("Error getting running jobs: %s", e)
+            return []
+    
+    def claim_job(self, job_id: str, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Take a job's lease under the write lock, so only one worker can resume it"""
+        try:
+            with self._transaction() as conn:
+                job = self._load_job(conn, job_id)
+                now = time.time()
+                if not job_is_claimable(job, owner, now):
+                    return None
+                job.update(owner=owner, lease_expires_at=now + lease_seconds, attempts=(job.get('attempts') or 0) + 1)
+                self._save_job(conn, job)
+            return job
+        except Exception as e:
+            logger.error("Error claiming job: %s", e)
+            return None
+    
+    # Timesheet CRUD Operations
+    def create_timesheet(self, timesheet_data: Dict[str, Any]) -> str:
+        """Create timesheet record; resubmitting for the same day replaces the report"""
+        try:
+            now = datetime.now().isoformat()
+            timesheet_data['created_at'] = now
+            timesheet_data['updated_at'] = now
+            with self._transaction() as conn:
+                rows = self._read(conn, "SELECT id FROM timesheets WHERE employee_id = ? AND date = ?",
+                                  (timesheet_data['employee_id'], timesheet_data['date']))
+                existing = rows[0] if rows else None
+                if existing:
+                    # Same-day double submit: keep the original created_at, take the latest report
+                    update_data = {k: v for k, v in timesheet_data.items() if k != 'created_at'}
+                    self._update(conn, 'timesheets', existing['id'], update_data)
+                else:
+                    doc_id = self._insert(conn, 'timesheets', timesheet_data)
+            if existing:
+                logger.info("Timesheet record %s updated", existing['id'])
+                return existing['id']
+            logger.info("Timesheet record created with ID: %s", doc_id)
+            return doc_id
+        except Exception as e:
+            logger.error("Error creating timesheet: %s", e)
+            raise
+    
+    def get_timesheet_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get timesheet record for specific employee and date"""
+        try:
+            return self._fetch_one('timesheets', 'employee_id = ? AND date = ?', (employee_id, date_str))
+        except Exception as e:
+            logger.error("Error getting timesheet: %s", e)
+            return None
+    
+    def get_timesheets_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get an employee's newest timesheet records, optionally within [start_date, end_date]"""
+        try:
+            return self._employee_date_range('timesheets', employee_id, limit, select, start_date, end_date)
+        except Exception as e:
+            logger.error("Error getting employee timesheets: %s", e)
+            return []
+    
+    def get_timesheets_by_date(self, date_str: str, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all timesheet records for a specific date, optionally projected to the given fields"""
+        try:
+            columns = self._columns('timesheets', select)
+            return self._fetch_all('timesheets', f"SELECT {columns} FROM timesheets WHERE date = ?", (date_str,))
+        except Exception as e:
+            logger.error("Error getting timesheets by date: %s", e)
+            return []
+    
+    def get_recent_timesheets_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of recent timesheet records and the token for the next page (None on the last page)"""
+        try:
+            return self._get_recent_page('timesheets', limit, page_token, select)
+        except Exception as e:
+            logger.error("Error getting recent timesheets: %s", e)
+            return [], None
+    
+    def get_timesheets_range_page(self, start_date: str, end_date: str, limit: int = 500, page_token: Optional[str] = None,
+                                  select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of timesheet records within [start_date, end_date], oldest first (raises on failure)"""
+        return self._get_range_page('timesheets', start_date, end_date, limit, page_token, select)
+    
+    def update_timesheet(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update timesheet record"""
+        try:
+            update_data['updated_at'] = datetime.now().isoformat()
+            if not self._update(self._connection(), 'timesheets', doc_id, update_data):
+                logger.warning("Timesheet %s not found", doc_id)
+                return False
+            logger.info("Timesheet %s updated successfully", doc_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating timesheet: %s", e)
+            return False
+    
+    # Office location Operations
+    def get_office_locations(self) -> Optional[Dict[str, Any]]:
+        """Saved office locations with their version, or None when never saved"""
+        try:
+            rows = self._read(self._connection(), "SELECT version, value FROM settings WHERE key = 'office_locations'")
+            if not rows:
+                return None
+            return {'version': rows[0]['version'], 'offices': json.loads(rows[0]['value'])}
+        except Exception as e:
+            logger.error("Error getting office locations: %s", e)
+            return None
+    
+    def get_office_locations_version(self) -> Optional[int]:
+        """Version of the saved office locations, without reading the office list"""
+        try:
+            rows = self._read(self._connection(), "SELECT version FROM settings WHERE key = 'office_locations'")
+            return rows[0]['version'] if rows else None
+        except Exception as e:
+            logger.error("Error getting office locations version: %s", e)
+            return None
+    
+    def set_office_locations(self, offices: List[Dict[str, Any]]) -> Optional[int]:
+        """Replace the saved office locations, bumping the version in the same transaction"""
+        try:
+            with self._transaction() as conn:
+                rows = self._read(conn, "SELECT version FROM settings WHERE key = 'office_locations'")
+                version = (rows[0]['version'] if rows else 0) + 1
+                self._write(conn, "INSERT OR REPLACE INTO settings (key, value, version, updated_at) VALUES (?, ?, ?, ?)",
+                            ('office_locations', json.dumps(offices), version, datetime.now().isoformat()))
+            logger.info("Office locations saved as version %s", version)
+            return version
+        except Exception as e:
+            logger.error("Error saving office locations: %s", e)
+            return None
+    
+    # Query helpers
+    def _employee_date_range(self, table: str, employee_id: str, limit: int, select: Optional[List[str]],
+                             start_date: Optional[str], end_date: Optional[str]) -> List[Dict[str, Any]]:
+        """One employee's records newest first, bounded by inclusive YYYY-MM-DD dates"""
+        where = ['employee_id = ?']
+        params = [employee_id]
+        if start_date:
+            where.append('date >= ?')
+            params.append(start_date)
+        if end_date:
+            where.append('date <= ?')
+            params.append(end_date)
+        columns = self._columns(table, select, 'date')
+        sql = f"SELECT {columns} FROM {table} WHERE {' AND '.join(where)} ORDER BY date DESC LIMIT ?"
+        return self._fetch_all(table, sql, (*params, limit))
+    
+    def _get_recent_page(self, table: str, limit: int, page_token: Optional[str],
+                         select: Optional[List[str]] = None, condition: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first page of a date-keyed table using a (date, id) cursor, optionally restricted
+        by an extra SQL condition"""
+        conditions = [condition] if condition else []
+        params = ()
+        if page_token:
+            try:
+                params = decode_page_token(page_token)
+                conditions.append('(date, id) < (?, ?)')
+            except ValueError as e:
+                logger.warning("%s - returning first page", e)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        # Fetch one extra row to learn whether another page exists
+        columns = self._columns(table, select, 'date')
+        sql = f"SELECT {columns} FROM {table} {where} ORDER BY date DESC, id DESC LIMIT ?"
+        rows = self._fetch_all(table, sql, (*params, limit + 1))
+        records = rows[:limit]
+        
+        next_page_token = None
+        if len(rows) > limit and records:
+            next_page_token = encode_page_token(records[-1]['date'], records[-1]['id'])
+        return records, next_page_token
+    
+    def _get_range_page(self, table: str, start_date: str, end_date: str, limit: int, page_token: Optional[str],
+                        select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Oldest-first page of a date-keyed table within inclusive dates, using a (date, id) cursor"""
+        where = 'date BETWEEN ? AND ?'
+        params = (start_date, end_date)
+        if page_token:
+            where += ' AND (date, id) > (?, ?)'
+            params += decode_page_token(page_token)
+        
+        columns = self._columns(table, select, 'date')
+        sql = f"SELECT {columns} FROM {table} WHERE {where} ORDER BY date, id LIMIT ?"
+        rows = self._fetch_all(table, sql, (*params, limit + 1))
+        records = rows[:limit]
+        
+        next_page_token = None
+        if len(rows) > limit and records:
+            next_page_token = encode_page_token(records[-1]['date'], records[-1]['id'])
+        return records, next_page_token
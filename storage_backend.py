@@ -0,0 +1,683 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import base64
+import calendar
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from enum import Enum
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, NamedTuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def attendance_summary_counts(attendance_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Contribution of one attendance record to its daily summary counters"""
+    attendance_data = attendance_data or {}
+    signed_in = bool(attendance_data.get('sign_in_time'))
+    signed_out = bool(attendance_data.get('sign_out_time'))
+    return {
+        'records': 1 if attendance_data else 0,
+        'present': 1 if signed_in else 0,
+        'signed_in': 1 if signed_in and not signed_out else 0,
+        'signed_out': 1 if signed_out else 0,
+        'total_hours': attendance_data.get('total_hours') or 0
+    }
+
+def _minutes_since_midnight(value: Any) -> Optional[int]:
+    """Minutes since midnight of an ISO timestamp string or datetime, None if unparseable"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value.hour * 60 + value.minute
+    return None
+
+def attendance_status(attendance_data: Optional[Dict[str, Any]]) -> str:
+    """Session state of an attendance record: 'completed' (signed in and out), 'incomplete'
+    (signed in only) or 'absent'; stored on Firestore records so listings filter on it server-side"""
+    attendance_data = attendance_data or {}
+    if not attendance_data.get('sign_in_time'):
+        return 'absent'
+    return 'completed' if attendance_data.get('sign_out_time') else 'incomplete'
+
+def complete_daily_summary(summary_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in, with zero, the counters of a stored summary (overall and per department) that
+    increments never created; Firestore only adds a counter once it moves off zero"""
+    summary_data.update({**attendance_summary_counts(None), **summary_data})
+    summary_data['departments'] = {department: {**attendance_summary_counts(None), **counts}
+                                   for department, counts in (summary_data.get('departments') or {}).items()}
+    return summary_data
+
+def employee_stats_counts(attendance_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Contribution of one attendance record to its employee's running aggregates"""
+    attendance_data = attendance_data or {}
+    sign_in_minutes = _minutes_since_midnight(attendance_data.get('sign_in_time'))
+    sign_out_minutes = _minutes_since_midnight(attendance_data.get('sign_out_time'))
+    return {
+        'days': 1 if attendance_data else 0,
+        'complete_days': 1 if attendance_data.get('sign_in_time') and attendance_data.get('sign_out_time') else 0,
+        'total_hours': attendance_data.get('total_hours') or 0,
+        'sign_in_count': 0 if sign_in_minutes is None else 1,
+        'sign_in_minutes': sign_in_minutes or 0,
+        'sign_out_count': 0 if sign_out_minutes is None else 1,
+        'sign_out_minutes': sign_out_minutes or 0
+    }
+
+def counter_deltas(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Non-zero per-key differences between two counter dicts"""
+    deltas = {key: value - before.get(key, 0) for key, value in after.items()}
+    return {key: delta for key, delta in deltas.items() if delta}
+
+def build_daily_summary(date_str: str, attendance_records: Iterable[Dict[str, Any]],
+                        department_of: Callable[[Optional[str]], str]) -> Dict[str, Any]:
+    """Fold a date's attendance records into its summary counters, overall and per department"""
+    summary_data = {'date': date_str, 'departments': {}}
+    summary_data.update(attendance_summary_counts(None))
+    for attendance_data in attendance_records:
+        counts = attendance_summary_counts(attendance_data)
+        department = department_of(attendance_data.get('employee_id'))
+        bucket = summary_data['departments'].setdefault(department, attendance_summary_counts(None))
+        for key, value in counts.items():
+            summary_data[key] += value
+            bucket[key] += value
+    return summary_data
+
+def build_employee_stats(employee_id: str, attendance_records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold an employee's attendance history into all-time, per-year and per-month aggregates"""
+    stats_data = {'employee_id': employee_id, 'all': employee_stats_counts(None), 'years': {}, 'months': {}}
+    for attendance_data in attendance_records:
+        date_str = attendance_data.get('date') or ''
+        if not date_str:
+            continue
+        counts = employee_stats_counts(attendance_data)
+        for bucket in (stats_data['all'],
+                       stats_data['years'].setdefault(date_str[:4], employee_stats_counts(None)),
+                       stats_data['months'].setdefault(date_str[:7], employee_stats_counts(None))):
+            for key, value in counts.items():
+                bucket[key] += value
+    return stats_data
+
+# Attendance fields the monthly payroll rollup reads
+PAYROLL_FIELDS = ['employee_id', 'date', 'sign_in_time', 'sign_out_time', 'total_hours']
+
+def payroll_counts(attendance_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Contribution of one attendance record to its employee's monthly payroll totals
+    
+    Arriving after WORKING_HOURS_START or leaving before WORKING_HOURS_END counts against
+    the day; a day without a sign-out is never an early departure.
+    """
+    attendance_data = attendance_data or {}
+    sign_in_minutes = _minutes_since_midnight(attendance_data.get('sign_in_time'))
+    sign_out_minutes = _minutes_since_midnight(attendance_data.get('sign_out_time'))
+    return {
+        'days_present': 1 if attendance_data.get('sign_in_time') else 0,
+        'total_hours': attendance_data.get('total_hours') or 0,
+        'late_arrivals': 1 if sign_in_minutes is not None and sign_in_minutes > Config.WORKING_HOURS_START * 60 else 0,
+        'early_departures': 1 if sign_out_minutes is not None and sign_out_minutes < Config.WORKING_HOURS_END * 60 else 0
+    }
+
+def month_bounds(month: str) -> Tuple[str, str]:
+    """First and last date of a YYYY-MM month, raises ValueError if it is malformed"""
+    first = datetime.strptime(month, '%Y-%m')
+    last_day = calendar.monthrange(first.year, first.month)[1]
+    return first.strftime('%Y-%m-%d'), first.replace(day=last_day).strftime('%Y-%m-%d')
+
+def build_monthly_rollup(month: str, attendance_records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold a month's attendance records into per-employee payroll totals in a single pass"""
+    rollup_data = {
+        'month': month,
+        'working_hours': [Config.WORKING_HOURS_START, Config.WORKING_HOURS_END],
+        'employees': {}
+    }
+    for attendance_data in attendance_records:
+        employee_id = attendance_data.get('employee_id')
+        if not employee_id:
+            continue
+        bucket = rollup_data['employees'].setdefault(employee_id, payroll_counts(None))
+        for key, value in payroll_counts(attendance_data).items():
+            bucket[key] += value
+    for bucket in rollup_data['employees'].values():
+        bucket['total_hours'] = round(bucket['total_hours'], 2)
+    return rollup_data
+
+def monthly_rollup_is_current(rollup_data: Optional[Dict[str, Any]]) -> bool:
+    """Whether a stored rollup was computed from its month's latest attendance, with today's working hours"""
+    return (rollup_data is not None and 'employees' in rollup_data
+            and rollup_data.get('computed_version') == rollup_data.get('source_version')
+            and rollup_data.get('working_hours') == [Config.WORKING_HOURS_START, Config.WORKING_HOURS_END])
+
+def encode_page_token(date_str: str, doc_id: str) -> str:
+    """Opaque, URL-safe cursor pointing just past the given (date, document ID) position"""
+    payload = json.dumps({'date': date_str, 'id': doc_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_page_token(page_token: str) -> Tuple[str, str]:
+    """Inverse of encode_page_token, raises ValueError on a malformed token"""
+    try:
+        padded = page_token + '=' * (-len(page_token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload['date'], payload['id']
+    except Exception as e:
+        raise ValueError(f"Invalid page token: {page_token!r}") from e
+
+def sign_out_hours(sign_in_time: Any, now: datetime) -> Optional[float]:
+    """Hours between a stored sign-in timestamp and now, None if the sign-in is unparseable"""
+    try:
+        signed_in_at = datetime.fromisoformat(str(sign_in_time).replace('Z', '+00:00'))
+        return round((now - signed_in_at).total_seconds() / 3600, 2)
+    except (TypeError, ValueError):
+        return None
+
+def _iter_pages(get_page: Callable, start_date: str, end_date: str, select: Optional[List[str]],
+                page_size: int) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a date-range page method, following its page tokens to the end"""
+    page_token = None
+    while True:
+        records, page_token = get_page(start_date, end_date, page_size, page_token, select)
+        yield from records
+        if page_token is None:
+            return
+
+def job_owner() -> str:
+    """Identifies this worker process as the holder of a background job's lease"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def job_is_claimable(job: Optional[Dict[str, Any]], owner: str, now: float) -> bool:
+    """Whether owner may take over a job: it is still running and its lease is owner's or has lapsed"""
+    return (job is not None and job.get('status') == 'running'
+            and (job.get('owner') == owner or (job.get('lease_expires_at') or 0) < now))
+
+class SignOutStatus(Enum):
+    """Outcome of StorageBackend.complete_sign_out"""
+    SIGNED_OUT = 'signed_out'
+    NOT_SIGNED_IN = 'not_signed_in'
+    ALREADY_SIGNED_OUT = 'already_signed_out'
+    TIMESHEET_REQUIRED = 'timesheet_required'
+    INVALID_SIGN_IN = 'invalid_sign_in'
+    ERROR = 'error'
+
+class SignOutResult(NamedTuple):
+    """Status of a sign-out attempt and the hours recorded when it succeeded"""
+    status: SignOutStatus
+    total_hours: Optional[float] = None
+
+class StorageBackend(ABC):
+    """Repository interface the models call through
+    
+    Records are plain dicts carrying their backend ID under 'id'. Implementations:
+    FirebaseService (firebase_service.py) and SQLiteService (sqlite_service.py). A backend must
+    implement every abstract method to be instantiated; the concrete methods (jobs, range
+    iterators, monthly rollup rebuilds) are built on them and shared.
+    """
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the backend's lookup cache, empty when it has none"""
+        return {}
+    
+    def warm_up(self) -> bool:
+        """Make one cheap round trip so connections are open before the first request"""
+        return True
+    
+    # Employee Operations
+    @abstractmethod
+    def create_employee(self, employee_data: Dict[str, Any]) -> str:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_employee_by_id(self, employee_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_employee_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_all_employees(self, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def update_employee(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def delete_employee(self, doc_id: str, progress: Optional[Callable[[str, int], None]] = None) -> bool:
+        raise NotImplementedError
+    
+    def start_delete_employee_job(self, doc_id: str) -> Optional[str]:
+        """Deactivate an employee and delete them with their records on a background thread
+        
+        The job is stored in the backend, so any worker can report its progress, and it holds a
+        lease renewed after every chunk; if its worker stops, another takes it over (resume_job).
+        Returns a job ID for get_job(), or None if the employee does not exist.
+        """
+        employee = self.get_employee_by_doc_id(doc_id)
+        if not employee:
+            return None
+        
+        # Block logins straight away; the record itself goes once the attendance/timesheets are gone
+        self.update_employee(doc_id, {'is_active': False})
+        
+        job = {
+            'id': uuid.uuid4().hex,
+            'type': 'delete_employee',
+            'doc_id': doc_id,
+            'employee_id': employee.get('employee_id'),
+            'status': 'running',
+            'deleted': {'attendance': 0, 'timesheets': 0},
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'owner': job_owner(),
+            'lease_expires_at': time.time() + Config.JOB_LEASE_SECONDS,
+            'attempts': 1
+        }
+        if not self.create_job(job):
+            return None
+        self._start_job_thread(job)
+        return job['id']
+    
+    def resume_job(self, job: Dict[str, Any]) -> bool:
+        """Take over a running job whose lease has lapsed (its worker stopped) and finish it here"""
+        if not job_is_claimable(job, job_owner(), time.time()):
+            return False
+        claimed = self.claim_job(job['id'], job_owner(), Config.JOB_LEASE_SECONDS)
+        if claimed is None:
+            return False  # another worker got there first
+        logger.warning("Resuming %s job %s (attempt %s)", claimed['type'], claimed['id'], claimed['attempts'])
+        self._start_job_thread(claimed)
+        return True
+    
+    def resume_jobs(self) -> int:
+        """Resume every running job whose lease has lapsed, returns how many were taken over"""
+        return sum(1 for job in self.get_running_jobs() if self.resume_job(job))
+    
+    def _start_job_thread(self, job: Dict[str, Any]):
+        runners = {'delete_employee': self._run_delete_employee_job}
+        threading.Thread(target=runners[job['type']], args=(job,),
+                         name=f"{job['type']}-{job['id']}", daemon=True).start()
+    
+    def _run_delete_employee_job(self, job: Dict[str, Any]):
+        """Delete the job's employee and records, storing progress (and renewing the lease) per chunk
+        
+        Deletion is idempotent: a resumed run deletes whatever is left, adding to the counts so far.
+        """
+        earlier = dict(job['deleted'])
+        
+        def report(collection_name, count):
+            job['deleted'][collection_name] = earlier.get(collection_name, 0) + count
+            self.update_job(job['id'], {'deleted': dict(job['deleted']),
+                                        'lease_expires_at': time.time() + Config.JOB_LEASE_SECONDS})
+        
+        if self.get_employee_by_doc_id(job['doc_id']) is None:
+            # An earlier run deleted the employee (the last step) but stopped before recording it
+            succeeded = job['attempts'] > 1
+        else:
+            succeeded = self.delete_employee(job['doc_id'], progress=report)
+        self.update_job(job['id'], {'status': 'completed' if succeeded else 'failed',
+                                    'finished_at': datetime.now().isoformat(), 'lease_expires_at': None})
+    
+    # Background job Operations
+    @abstractmethod
+    def create_job(self, job: Dict[str, Any]) -> bool:
+        """Store a new background job under job['id']"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a background job's stored state and progress"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def update_job(self, job_id: str, update_data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_running_jobs(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def claim_job(self, job_id: str, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Atomically make owner the holder of a running job if job_is_claimable, returns the
+        updated job (attempts incremented) or None"""
+        raise NotImplementedError
+    
+    # Admin Operations
+    @abstractmethod
+    def create_admin(self, admin_data: Dict[str, Any]) -> str:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_admin_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_admin_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def update_admin(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+    
+    # Attendance Operations
+    @abstractmethod
+    def create_attendance(self, attendance_data: Dict[str, Any]) -> str:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_attendance_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_attendance_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_attendance_by_date(self, date_str: str, limit: Optional[int] = None, select: Optional[List[str]] = None,
+                               status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A date's attendance records, only those with the given attendance_status when status is set"""
+        raise NotImplementedError
+    
+    def get_recent_attendance(self, limit: int = 100, start_after: Optional[str] = None, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get recent attendance records, optionally continuing from a page token"""
+        records, _ = self.get_recent_attendance_page(limit, start_after, select)
+        return records
+    
+    @abstractmethod
+    def get_recent_attendance_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None,
+                                   status: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """A newest-first page of attendance records, filtered by attendance_status in the query when
+        status is set, so a page is only short when it is the last one"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_attendance_range_page(self, start_date: str, end_date: str, limit: int = 500, page_token: Optional[str] = None,
+                                  select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of the attendance records dated within [start_date, end_date], oldest first, and the
+        token for the next page (None on the last page). Raises on failure rather than returning a short page."""
+        raise NotImplementedError
+    
+    def iter_attendance_range(self, start_date: str, end_date: str, select: Optional[List[str]] = None,
+                              page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Every attendance record dated within [start_date, end_date], oldest first, read a page at a time"""
+        return _iter_pages(self.get_attendance_range_page, start_date, end_date, select, page_size)
+    
+    @abstractmethod
+    def update_attendance(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def complete_sign_out(self, employee_id: str, date_str: str, now: datetime) -> SignOutResult:
+        raise NotImplementedError
+    
+    # Rollup Operations
+    @abstractmethod
+    def get_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def rebuild_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    def compute_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """A date's summary counters computed from its attendance records, without storing them"""
+        try:
+            return build_daily_summary(date_str, self.get_attendance_by_date(date_str), self._employee_department)
+        except Exception as e:
+            logger.error("Error computing daily summary: %s", e)
+            return None
+    
+    @abstractmethod
+    def get_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def rebuild_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def compute_employee_stats(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """An employee's aggregates computed from their attendance history, without storing them"""
+        raise NotImplementedError
+    
+    # Monthly rollup Operations
+    @abstractmethod
+    def get_monthly_rollup(self, month: str) -> Optional[Dict[str, Any]]:
+        """The stored payroll rollup for a YYYY-MM month, or None when there is none
+        
+        Carries 'source_version', bumped by every attendance write in the month, and
+        'computed_version', the source version the stored totals were computed from.
+        """
+        raise NotImplementedError
+    
+    @abstractmethod
+    def save_monthly_rollup(self, month: str, rollup_data: Dict[str, Any], computed_version: int) -> bool:
+        """Store recomputed totals for a month without touching its source version"""
+        raise NotImplementedError
+    
+    def compute_monthly_rollup(self, month: str) -> Optional[Dict[str, Any]]:
+        """A month's payroll totals from one streamed pass over its attendance, without storing them"""
+        try:
+            start_date, end_date = month_bounds(month)
+            records = self.iter_attendance_range(start_date, end_date, PAYROLL_FIELDS, Config.EXPORT_PAGE_SIZE)
+            return build_monthly_rollup(month, records)
+        except Exception as e:
+            logger.error("Error computing monthly rollup: %s", e)
+            return None
+    
+    def rebuild_monthly_rollup(self, month: str) -> Optional[Dict[str, Any]]:
+        """Recompute a month's payroll totals in one streamed pass over its attendance and store them"""
+        # Read the version first, so a write landing during the pass leaves the result stale
+        source_version = (self.get_monthly_rollup(month) or {}).get('source_version') or 0
+        rollup_data = self.compute_monthly_rollup(month)
+        if rollup_data is None:
+            return None
+        self.save_monthly_rollup(month, rollup_data, source_version)
+        logger.info("Monthly rollup for %s rebuilt from source version %s", month, source_version)
+        rollup_data.update(id=month, source_version=source_version, computed_version=source_version)
+        return rollup_data
+    
+    def reconcile_monthly_rollups(self) -> int:
+        """Make stored rollups safe to reuse after MONTHLY_ROLLUPS_ENABLED changed, returns the number
+        of months marked changed
+        
+        Backends whose writes mark months regardless of the setting (SQLite triggers) have nothing to do.
+        """
+        return 0
+    
+    def _employee_department(self, employee_id: Optional[str]) -> str:
+        """Department used to bucket an employee's attendance in daily summaries"""
+        employee = self.get_employee_by_id(employee_id) if employee_id else None
+        return (employee or {}).get('department') or 'Unassigned'
+    
+    # Timesheet Operations
+    @abstractmethod
+    def create_timesheet(self, timesheet_data: Dict[str, Any]) -> str:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_timesheet_by_employee_and_date(self, employee_id: str, date_str: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_timesheets_by_employee(self, employee_id: str, limit: int = 50, select: Optional[List[str]] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_timesheets_by_date(self, date_str: str, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    def get_recent_timesheets(self, limit: int = 100, start_after: Optional[str] = None, select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get recent timesheet records, optionally continuing from a page token"""
+        records, _ = self.get_recent_timesheets_page(limit, start_after, select)
+        return records
+    
+    @abstractmethod
+    def get_recent_timesheets_page(self, limit: int = 100, page_token: Optional[str] = None, select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_timesheets_range_page(self, start_date: str, end_date: str, limit: int = 500, page_token: Optional[str] = None,
+                                  select: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of the timesheet records dated within [start_date, end_date], oldest first, and the
+        token for the next page (None on the last page). Raises on failure rather than returning a short page."""
+        raise NotImplementedError
+    
+    def iter_timesheets_range(self, start_date: str, end_date: str, select: Optional[List[str]] = None,
+                              page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Every timesheet record dated within [start_date, end_date], oldest first, read a page at a time"""
+        return _iter_pages(self.get_timesheets_range_page, start_date, end_date, select, page_size)
+    
+    @abstractmethod
+    def update_timesheet(self, doc_id: str, update_data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+    
+    # Office location Operations
+    @abstractmethod
+    def get_office_locations(self) -> Optional[Dict[str, Any]]:
+        """{'version': int, 'offices': [...]} as last saved, or None when never saved"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_office_locations_version(self) -> Optional[int]:
+        """Only the version of the saved office locations, for cheap change polling"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def set_office_locations(self, offices: List[Dict[str, Any]]) -> Optional[int]:
+        """Replace the saved office locations, returns the new version (None on failure)"""
+        raise NotImplementedError
+
+# Global storage backend instance, created on first use so importing the app stays cheap
+storage_backend = None
+_storage_backend_lock = threading.RLock()
+_storage_backend_hooks = []
+_warm_up_thread = None
+
+# Start-up progress of the backend, reported by the readiness endpoint
+storage_status = {
+    'state': 'cold',  # cold -> warming -> ready | failed
+    'backend': Config.STORAGE_BACKEND,
+    'init_ms': None,  # creating the backend, including SDK imports and credentials
+    'warm_ms': None,  # first round trip to the store
+    'error': None
+}
+
+def on_storage_backend_created(hook: Callable[[StorageBackend], Any]):
+    """Run hook(backend) when the backend is created, or now if it already exists"""
+    with _storage_backend_lock:
+        if storage_backend is None:
+            _storage_backend_hooks.append(hook)
+            return
+    hook(storage_backend)
+
+# Receivers of the store operations backends report (request_metrics charges them to the request)
+_store_operation_counters = []
+
+def on_store_operation(counter: Callable[..., Any]):
+    """Run counter(reads=, writes=, documents=, cache_hits=) for every store operation a backend reports"""
+    if counter not in _store_operation_counters:
+        _store_operation_counters.append(counter)
+
+def count_store_operation(reads: int = 0, writes: int = 0, documents: int = 0, cache_hits: int = 0):
+    """Report one store call where it is made: read round trips, documents (rows) written and
+    documents read; cache_hits are lookups answered without a round trip"""
+    for counter in _store_operation_counters:
+        counter(reads=reads, writes=writes, documents=documents, cache_hits=cache_hits)
+
+def _create_storage_backend() -> StorageBackend:
+    if Config.STORAGE_BACKEND == 'firestore':
+        from firebase_service import get_firebase_service
+        return get_firebase_service()
+    if Config.STORAGE_BACKEND == 'sqlite':
+        from sqlite_service import SQLiteService
+        return SQLiteService(Config.SQLITE_DATABASE_PATH)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {Config.STORAGE_BACKEND!r}")
+
+def get_storage_backend() -> StorageBackend:
+    """Get or create the backend selected by Config.STORAGE_BACKEND"""
+    global storage_backend
+    if storage_backend is None:
+        with _storage_backend_lock:
+            if storage_backend is None:
+                started = time.perf_counter()
+                backend = _create_storage_backend()
+                for hook in _storage_backend_hooks:
+                    hook(backend)
+                storage_status['init_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                storage_backend = backend
+    return storage_backend
+
+def warm_up_storage_backend(on_ready: Optional[Callable[[], Any]] = None) -> bool:
+    """Create the backend and make one round trip, so the first request pays for neither;
+    on_ready runs (e.g. seeding the default admin) before the backend is reported ready"""
+    storage_status['state'] = 'warming'
+    try:
+        backend = get_storage_backend()
+        started = time.perf_counter()
+        if not backend.warm_up():
+            raise RuntimeError(f"{Config.STORAGE_BACKEND} backend is not connected")
+        storage_status['warm_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if on_ready is not None:
+            on_ready()
+    except Exception as e:
+        logger.error("Storage backend warm-up failed: %s", e)
+        storage_status.update(state='failed', error=str(e))
+        return False
+    storage_status.update(state='ready', error=None)
+    logger.info("Storage backend ready: %s (init %sms, first round trip %sms)",
+                Config.STORAGE_BACKEND, storage_status['init_ms'], storage_status['warm_ms'])
+    return True
+
+def start_storage_warm_up(on_ready: Optional[Callable[[], Any]] = None):
+    """Warm the backend up on a background thread, once per process"""
+    global _warm_up_thread
+    with _storage_backend_lock:
+        if _warm_up_thread is not None:
+            return
+        _warm_up_thread = threading.Thread(target=_warm_up_and_recover, args=(on_ready,),
+                                           name='storage-warm-up', daemon=True)
+    _warm_up_thread.start()
+
+def _warm_up_and_recover(on_ready: Optional[Callable[[], Any]] = None):
+    """Warm up, invalidate payroll rollups if month marking was off, then finish background jobs
+    a stopped or recycled worker left running"""
+    if not warm_up_storage_backend(on_ready):
+        return
+    try:
+        invalidated = storage_backend.reconcile_monthly_rollups()
+        if invalidated:
+            logger.warning("Marked %s monthly rollups for recomputation after month marking was off", invalidated)
+    except Exception as e:
+        logger.error("Error reconciling monthly rollups: %s", e)
+    try:
+        resumed = storage_backend.resume_jobs()
+        if resumed:
+            logger.warning("Resumed %s background jobs left by a stopped worker", resumed)
+    except Exception as e:
+        logger.error("Error resuming background jobs: %s", e)
+
+def get_storage_status() -> Dict[str, Any]:
+    """Copy of the backend's start-up progress"""
+    return dict(storage_status)
+
+def _reset_after_fork():
+    """Give a forked worker its own lock and warm-up; the backend itself must be created there"""
+    global _storage_backend_lock, _warm_up_thread
+    _storage_backend_lock = threading.RLock()
+    _warm_up_thread = None
+    if storage_backend is None:
+        storage_status.update(state='cold', init_ms=None, warm_ms=None, error=None)
+    else:
+        # gRPC channels and SQLite connections do not survive fork()
+        logger.warning("Storage backend was created before fork; create it in each worker instead")
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)